@@ -0,0 +1,143 @@
+"""
+Bounded executor for running CPU-bound work off the event loop.
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorBusyError(RuntimeError):
+    """Raised when an executor already has as much queued work as it accepts."""
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a cap on queued work, for async views.
+
+    At most ``max_workers`` jobs run at once and at most ``max_pending`` more
+    wait for a worker. Further submissions are rejected immediately with
+    ExecutorBusyError so callers can shed load instead of piling up requests.
+    """
+
+    def __init__(
+        self, max_workers: int = 2, max_pending: int = 8, name: str = "executor"
+    ):
+        """
+        Initialize the executor.
+
+        Args:
+            max_workers: Number of worker threads
+            max_pending: Number of jobs allowed to wait for a worker
+            name: Name used for worker threads, logs and stats
+        """
+        if max_workers < 1:
+            raise ValueError("Executor needs at least one worker")
+        if max_pending < 0:
+            raise ValueError("max_pending cannot be negative")
+
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._submitted = 0
+        self._rejected = 0
+        self._timeouts = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Create the worker threads on first use."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix=self.name
+                )
+            return self._executor
+
+    def _release(self, future: Optional[Future]):
+        """Free the slot held by a finished or cancelled job."""
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Queue a job, rejecting it if the executor is full.
+
+        Raises:
+            ExecutorBusyError: If all workers and queue slots are taken
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise ExecutorBusyError(f"{self.name} is at capacity")
+
+        with self._lock:
+            self._in_flight += 1
+            self._submitted += 1
+
+        try:
+            future = self._get_executor().submit(fn, *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(
+        self, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs
+    ) -> Any:
+        """
+        Run a job on a worker thread and await its result.
+
+        A job that times out while still queued is cancelled; one that has
+        already started keeps its worker until it finishes.
+
+        Args:
+            fn: Callable to run
+            timeout: Seconds to wait for the result (wait forever if None)
+
+        Raises:
+            ExecutorBusyError: If all workers and queue slots are taken
+            TimeoutError: If the result is not ready within ``timeout``
+        """
+        future = self.submit(fn, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except TimeoutError:
+            with self._lock:
+                self._timeouts += 1
+            logger.warning(f"Job in {self.name} timed out after {timeout}s")
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get executor load metrics.
+
+        Returns:
+            Dict[str, Any]: Capacity, in-flight jobs and rejection counts
+        """
+        with self._lock:
+            return {
+                "name": self.name,
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "in_flight": self._in_flight,
+                "submitted": self._submitted,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts,
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker threads."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
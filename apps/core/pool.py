@@ -0,0 +1,170 @@
+"""
+Bounded pool of reusable, lazily created instances.
+"""
+
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(TimeoutError):
+    """Raised when no pooled instance becomes available in time."""
+
+
+class InstancePool:
+    """
+    Thread-safe pool of expensive, non-thread-safe instances such as ML models.
+
+    Instances are created on demand, up to ``size`` of them, and handed out to
+    one caller at a time. When all instances are busy, callers wait for one to
+    be returned. Wait times are recorded so queueing can be monitored.
+    """
+
+    def __init__(self, factory: Callable[[], Any], size: int = 1, name: str = "pool"):
+        """
+        Initialize the pool.
+
+        Args:
+            factory: Callable that creates a new instance
+            size: Maximum number of instances
+            name: Name used in logs and stats
+        """
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+
+        self.name = name
+        self.size = size
+        self._factory = factory
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._acquisitions = 0
+        self._waits = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _checkout(self, timeout: Optional[float]):
+        """Take an idle instance, create a new one, or wait for one."""
+        start = time.monotonic()
+        waited = False
+
+        try:
+            instance = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self.size
+                if create:
+                    self._created += 1
+
+            if create:
+                try:
+                    instance = self._factory()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+                logger.info(
+                    f"Created instance {self._created}/{self.size} in {self.name}"
+                )
+            else:
+                waited = True
+                try:
+                    instance = self._idle.get(timeout=timeout)
+                except queue.Empty:
+                    raise PoolTimeoutError(
+                        f"No instance available in {self.name} after {timeout}s"
+                    ) from None
+
+        wait = time.monotonic() - start
+        with self._lock:
+            self._in_use += 1
+            self._acquisitions += 1
+            if waited:
+                self._waits += 1
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+
+        return instance
+
+    def _checkin(self, instance):
+        """Return an instance to the pool."""
+        with self._lock:
+            self._in_use -= 1
+        self._idle.put(instance)
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None):
+        """
+        Borrow an instance for the duration of a ``with`` block.
+
+        Args:
+            timeout: Seconds to wait for a busy pool (wait forever if None)
+
+        Raises:
+            PoolTimeoutError: If no instance became available in time
+        """
+        instance = self._checkout(timeout)
+        try:
+            yield instance
+        finally:
+            self._checkin(instance)
+
+    def prefill(self, count: Optional[int] = None):
+        """Create instances ahead of time, up to ``count`` (default: pool size)."""
+        count = self.size if count is None else min(count, self.size)
+        instances = []
+        try:
+            while len(instances) < count:
+                with self._lock:
+                    if self._created >= count:
+                        break
+                instances.append(self._checkout(timeout=None))
+        finally:
+            for instance in instances:
+                self._checkin(instance)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool usage and queue-wait metrics.
+
+        Returns:
+            Dict[str, Any]: Pool size, instance counts and wait statistics
+        """
+        with self._lock:
+            return {
+                "name": self.name,
+                "size": self.size,
+                "created": self._created,
+                "in_use": self._in_use,
+                "acquisitions": self._acquisitions,
+                "waits": self._waits,
+                "total_wait_seconds": round(self._total_wait, 4),
+                "max_wait_seconds": round(self._max_wait, 4),
+                "avg_wait_seconds": round(self._total_wait / self._waits, 4)
+                if self._waits
+                else 0.0,
+            }
+
+    def close(self):
+        """Close and discard all idle instances."""
+        while True:
+            try:
+                instance = self._idle.get_nowait()
+            except queue.Empty:
+                break
+
+            with self._lock:
+                self._created -= 1
+
+            close = getattr(instance, "close", None)
+            if callable(close):
+                try:
+                    close()
+                except Exception as e:
+                    logger.warning(f"Error closing instance in {self.name}: {e}")
@@ -0,0 +1,89 @@
+"""
+Shared S3 client and transfer settings for every storage service.
+
+boto3 clients are thread-safe, so one client per process is reused for all
+requests. It keeps a pool of kept-alive connections, and credentials and the
+endpoint are resolved only once.
+"""
+
+import logging
+import threading
+from typing import Any, Optional
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_client = None
+
+
+def get_s3_client() -> Any:
+    """
+    Get the process-wide S3 client, creating it on first use.
+
+    Returns:
+        S3 client configured from AWS_* settings and S3_CLIENT tuning
+    """
+    global _client
+
+    if _client is None:
+        with _lock:
+            if _client is None:
+                options = settings.S3_CLIENT
+                # Sessions are not thread-safe, so build the client from one
+                # that is only used here, under the lock
+                session = boto3.session.Session()
+                _client = session.client(
+                    "s3",
+                    region_name=getattr(settings, "AWS_S3_REGION_NAME", None),
+                    endpoint_url=getattr(settings, "AWS_S3_ENDPOINT_URL", None),
+                    aws_access_key_id=getattr(settings, "AWS_ACCESS_KEY_ID", None),
+                    aws_secret_access_key=getattr(
+                        settings, "AWS_SECRET_ACCESS_KEY", None
+                    ),
+                    config=Config(
+                        max_pool_connections=options["MAX_POOL_CONNECTIONS"],
+                        tcp_keepalive=options["TCP_KEEPALIVE"],
+                        retries={
+                            "mode": "standard",
+                            "max_attempts": options["MAX_ATTEMPTS"],
+                        },
+                    ),
+                )
+                logger.info(
+                    f"Created S3 client with {options['MAX_POOL_CONNECTIONS']} "
+                    "pooled connections"
+                )
+    return _client
+
+
+def get_transfer_config(max_concurrency: Optional[int] = None) -> TransferConfig:
+    """
+    Get transfer settings for uploads and downloads with the shared client.
+
+    Args:
+        max_concurrency: Concurrent requests per transfer, by default
+            S3_CLIENT["TRANSFER_CONCURRENCY"]; keep it within the client's
+            connection pool
+
+    Returns:
+        TransferConfig: Multipart threshold and part size of TRANSFER_CHUNK_BYTES
+    """
+    options = settings.S3_CLIENT
+    return TransferConfig(
+        max_concurrency=max_concurrency or options["TRANSFER_CONCURRENCY"],
+        multipart_threshold=options["TRANSFER_CHUNK_BYTES"],
+        multipart_chunksize=options["TRANSFER_CHUNK_BYTES"],
+    )
+
+
+def reset_s3_client():
+    """Drop the shared client, so the next use creates one from current settings."""
+    global _client
+
+    with _lock:
+        _client = None
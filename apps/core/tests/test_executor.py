@@ -0,0 +1,63 @@
+"""
+Tests for the core bounded executor.
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from apps.core.executor import BoundedExecutor, ExecutorBusyError
+
+
+class TestBoundedExecutor:
+    """Tests for BoundedExecutor."""
+
+    def test_run_returns_result(self):
+        """Test that a job's result is awaited from the worker thread."""
+        executor = BoundedExecutor(max_workers=1, max_pending=0)
+        try:
+            result = asyncio.run(executor.run(lambda x, y: x + y, 2, y=3))
+        finally:
+            executor.shutdown()
+
+        assert result == 5
+        assert executor.stats()["in_flight"] == 0
+
+    def test_submit_rejects_when_full(self):
+        """Test that work beyond workers plus queue slots is rejected."""
+        executor = BoundedExecutor(max_workers=1, max_pending=1, name="busy")
+        release = threading.Event()
+        try:
+            running = executor.submit(release.wait)
+            queued = executor.submit(lambda: None)
+
+            with pytest.raises(ExecutorBusyError):
+                executor.submit(lambda: None)
+
+            release.set()
+            running.result(timeout=5)
+            queued.result(timeout=5)
+
+            # Capacity is freed again once jobs finish
+            executor.submit(lambda: None).result(timeout=5)
+        finally:
+            release.set()
+            executor.shutdown()
+
+        stats = executor.stats()
+        assert stats["rejected"] == 1
+        assert stats["submitted"] == 3
+
+    def test_run_times_out(self):
+        """Test that a slow job raises TimeoutError and is counted."""
+        executor = BoundedExecutor(max_workers=1, max_pending=0)
+        release = threading.Event()
+        try:
+            with pytest.raises(TimeoutError):
+                asyncio.run(executor.run(release.wait, timeout=0.01))
+        finally:
+            release.set()
+            executor.shutdown()
+
+        assert executor.stats()["timeouts"] == 1
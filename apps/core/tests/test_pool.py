@@ -0,0 +1,91 @@
+"""
+Tests for the core instance pool.
+"""
+
+import threading
+
+import pytest
+
+from apps.core.pool import InstancePool, PoolTimeoutError
+
+
+class TestInstancePool:
+    """Tests for InstancePool."""
+
+    def test_instances_are_created_lazily_and_reused(self):
+        """Test that an idle instance is reused instead of creating a new one."""
+        created = []
+        pool = InstancePool(lambda: created.append(object()) or created[-1], size=2)
+
+        with pool.acquire() as first:
+            pass
+        with pool.acquire() as second:
+            pass
+
+        assert first is second
+        assert len(created) == 1
+        assert pool.stats()["acquisitions"] == 2
+
+    def test_pool_never_exceeds_size(self):
+        """Test that concurrent callers share at most ``size`` instances."""
+        pool = InstancePool(object, size=2)
+        barrier = threading.Barrier(4)
+        seen = set()
+
+        def worker():
+            barrier.wait()
+            for _ in range(20):
+                with pool.acquire(timeout=5) as instance:
+                    seen.add(id(instance))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = pool.stats()
+        assert stats["created"] <= 2
+        assert len(seen) <= 2
+        assert stats["in_use"] == 0
+        assert stats["acquisitions"] == 80
+
+    def test_acquire_times_out_when_exhausted(self):
+        """Test that waiting on a busy pool raises PoolTimeoutError."""
+        pool = InstancePool(object, size=1, name="busy")
+
+        with pool.acquire():
+            with pytest.raises(PoolTimeoutError):
+                with pool.acquire(timeout=0.01):
+                    pass
+
+        stats = pool.stats()
+        assert stats["waits"] == 0
+        assert stats["in_use"] == 0
+
+    def test_prefill_creates_instances_up_front(self):
+        """Test that prefill creates instances without leaving them checked out."""
+        pool = InstancePool(object, size=3)
+        pool.prefill(2)
+
+        stats = pool.stats()
+        assert stats["created"] == 2
+        assert stats["in_use"] == 0
+
+    def test_failed_factory_does_not_consume_capacity(self):
+        """Test that a factory error frees the slot it reserved."""
+        calls = []
+
+        def factory():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("model failed to load")
+            return object()
+
+        pool = InstancePool(factory, size=1)
+        with pytest.raises(RuntimeError):
+            with pool.acquire():
+                pass
+
+        with pool.acquire(timeout=0.01) as instance:
+            assert instance is not None
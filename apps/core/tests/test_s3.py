@@ -0,0 +1,47 @@
+"""
+Tests for the shared S3 client.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.conf import settings
+from django.test import override_settings
+
+from apps.core.s3 import get_s3_client, get_transfer_config, reset_s3_client
+
+
+@pytest.fixture(autouse=True)
+def fresh_client():
+    """Create the shared client from each test's settings."""
+    reset_s3_client()
+    yield
+    reset_s3_client()
+
+
+class TestSharedS3Client:
+    """Tests for get_s3_client and get_transfer_config."""
+
+    def test_client_is_created_once_across_threads(self):
+        """Test that concurrent callers all get the same client."""
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            clients = list(pool.map(lambda _: get_s3_client(), range(32)))
+
+        assert all(client is clients[0] for client in clients)
+
+    def test_client_uses_tuned_connection_pool(self):
+        """Test that pool size and keep-alive come from S3_CLIENT."""
+        options = {**settings.S3_CLIENT, "MAX_POOL_CONNECTIONS": 64}
+        with override_settings(S3_CLIENT=options):
+            config = get_s3_client().meta.config
+
+        assert config.max_pool_connections == 64
+        assert config.tcp_keepalive is True
+
+    def test_transfer_config_concurrency(self):
+        """Test that transfers default to the configured concurrency."""
+        assert (
+            get_transfer_config().max_request_concurrency
+            == settings.S3_CLIENT["TRANSFER_CONCURRENCY"]
+        )
+        assert get_transfer_config(3).max_request_concurrency == 3
@@ -0,0 +1,124 @@
+"""
+Tests for model warm-up and the readiness health check.
+"""
+
+import json
+import threading
+import time
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.core.warmup import WarmupRegistry
+
+
+class WarmupRegistryTests(TestCase):
+    """Tests for WarmupRegistry."""
+
+    def test_ready_without_warmup(self):
+        """Test that a process that never warms up serves traffic lazily."""
+        registry = WarmupRegistry()
+        registry.register("model", lambda: None)
+
+        self.assertTrue(registry.is_ready())
+        self.assertEqual(registry.status()["tasks"]["model"]["state"], "pending")
+
+    def test_ready_after_tasks_succeed(self):
+        """Test that all tasks run once and the process becomes ready."""
+        calls = []
+        registry = WarmupRegistry()
+        registry.register("first", lambda: calls.append("first"))
+        registry.register("second", lambda: calls.append("second"))
+
+        registry.start(background=False)
+        registry.start(background=False)
+
+        self.assertEqual(calls, ["first", "second"])
+        self.assertTrue(registry.is_ready())
+        self.assertEqual(registry.status()["tasks"]["second"]["state"], "ready")
+
+    def test_failed_task_keeps_process_unready(self):
+        """Test that a failing task is reported and blocks readiness."""
+        registry = WarmupRegistry()
+        self.addCleanup(registry.stop)
+        registry.register("ok", lambda: None)
+        registry.register("broken", lambda: 1 / 0)
+
+        registry.start(background=False, retry_delay=60)
+
+        status = registry.status()
+        self.assertFalse(status["ready"])
+        self.assertEqual(status["tasks"]["broken"]["state"], "failed")
+        self.assertIn("division by zero", status["tasks"]["broken"]["error"])
+
+    def test_failed_task_is_retried_until_ready(self):
+        """Test that a transient failure is retried and the process recovers."""
+        calls = []
+        recovered = threading.Event()
+
+        def flaky():
+            calls.append("flaky")
+            if calls.count("flaky") < 3:
+                raise ConnectionError("S3 unavailable")
+            recovered.set()
+
+        registry = WarmupRegistry()
+        self.addCleanup(registry.stop)
+        registry.register("ok", lambda: calls.append("ok"))
+        registry.register("flaky", flaky)
+
+        registry.start(background=False, retry_delay=0.01, max_retry_delay=0.02)
+        self.assertFalse(registry.is_ready())
+
+        self.assertTrue(recovered.wait(timeout=5))
+        deadline = time.monotonic() + 5
+        while not registry.is_ready() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        status = registry.status()
+        self.assertTrue(status["ready"])
+        self.assertEqual(status["tasks"]["flaky"]["attempts"], 3)
+        # Tasks that already succeeded are not run again
+        self.assertEqual(calls.count("ok"), 1)
+
+    def test_stop_ends_retries(self):
+        """Test that stopping the registry ends the retry thread right away."""
+        calls = []
+
+        def broken():
+            calls.append("broken")
+            raise ConnectionError("S3 unavailable")
+
+        registry = WarmupRegistry()
+        registry.register("broken", broken)
+
+        registry.start(background=False, retry_delay=60)
+        registry.stop(timeout=5)
+
+        self.assertFalse(registry._thread.is_alive())
+        self.assertEqual(calls, ["broken"])
+
+    def test_readiness_check(self):
+        """Test that the readiness endpoint mirrors warm-up status."""
+        registry = WarmupRegistry()
+        self.addCleanup(registry.stop)
+        registry.register("model", lambda: 1 / 0)
+
+        with patch("config.urls.warmup", registry):
+            response = self.client.get(reverse("readiness_check"))
+            self.assertEqual(response.status_code, 200)
+
+            registry.start(background=False, retry_delay=60)
+            response = self.client.get(reverse("readiness_check"))
+
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(json.loads(response.content)["ready"])
+
+    def test_apps_register_model_warmup(self):
+        """Test that the writing and signing apps register their warm-up."""
+        from apps.core.warmup import warmup
+
+        tasks = warmup.status()["tasks"]
+        self.assertIn("writing.recognition", tasks)
+        self.assertIn("signing.sign_comparer", tasks)
@@ -0,0 +1,184 @@
+"""
+Registry of warm-up tasks run when a server process starts.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupRegistry:
+    """
+    Runs registered warm-up tasks once per process and tracks readiness.
+
+    Apps register tasks (e.g. loading ML models) from ``AppConfig.ready``; the
+    ASGI entry point starts them before or while the server accepts traffic.
+    The process counts as ready once every task has succeeded. A process that
+    never started warm-up is always ready and keeps loading models lazily.
+    Failed tasks are retried in the background with exponential backoff, so
+    a transient error (e.g. S3 being briefly unavailable) does not leave the
+    process unready until it is restarted.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._tasks: Dict[str, Callable[[], Any]] = {}
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._started = False
+        self._retrying = False
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, name: str, func: Callable[[], Any]):
+        """
+        Register a warm-up task.
+
+        Args:
+            name: Unique task name shown in readiness reports
+            func: Callable that raises if warm-up failed
+        """
+        with self._lock:
+            self._tasks[name] = func
+            self._status[name] = {"state": self.PENDING}
+
+    def start(
+        self,
+        background: bool = True,
+        retry_delay: float = 5.0,
+        max_retry_delay: float = 300.0,
+    ):
+        """
+        Run all registered tasks, once per process, retrying failed ones.
+
+        Args:
+            background: Run in a daemon thread instead of blocking the caller;
+                when blocking, failed tasks are retried in a thread afterwards
+            retry_delay: Seconds before failed tasks are first retried
+            max_retry_delay: Longest wait between retries as the delay doubles
+        """
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+
+        if background:
+            self._start_retrying(retry_delay, max_retry_delay, run_first=True)
+        elif not self.run():
+            self._start_retrying(retry_delay, max_retry_delay)
+
+    def _start_retrying(self, delay: float, max_delay: float, run_first=False):
+        """Run failed tasks in a daemon thread until every task succeeds."""
+        with self._lock:
+            if self._retrying:
+                return
+            self._retrying = True
+
+        def retry():
+            wait = delay
+            ready = self.run() if run_first else False
+            while not ready:
+                logger.warning(f"Retrying failed warm-up tasks in {wait}s")
+                if self._stopping.wait(wait):
+                    break
+                wait = min(wait * 2, max_delay)
+                ready = self.run()
+            with self._lock:
+                self._retrying = False
+
+        self._thread = threading.Thread(target=retry, name="warmup", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Stop retrying failed tasks and wait for the warm-up thread to finish.
+
+        A task that is running is not interrupted, only further retries are
+        skipped.
+
+        Args:
+            timeout: Longest wait for the thread in seconds, None to wait for it
+        """
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def run(self) -> bool:
+        """
+        Run every task that has not succeeded yet, in registration order.
+
+        Returns:
+            bool: True if every task succeeded
+        """
+        with self._lock:
+            tasks = [
+                (name, func, self._status[name].get("attempts", 0))
+                for name, func in self._tasks.items()
+                if self._status[name]["state"] != self.READY
+            ]
+
+        for name, func, attempts in tasks:
+            attempts += 1
+            self._set_status(name, state=self.RUNNING, attempts=attempts)
+            start = time.monotonic()
+            try:
+                func()
+            except Exception as e:
+                logger.exception(f"Warm-up task {name} failed")
+                self._set_status(
+                    name,
+                    state=self.FAILED,
+                    error=str(e),
+                    seconds=round(time.monotonic() - start, 3),
+                    attempts=attempts,
+                )
+            else:
+                seconds = round(time.monotonic() - start, 3)
+                logger.info(f"Warm-up task {name} finished in {seconds}s")
+                self._set_status(
+                    name, state=self.READY, seconds=seconds, attempts=attempts
+                )
+
+        return self.is_ready()
+
+    def _set_status(self, name: str, **status):
+        """Replace the status of a task."""
+        with self._lock:
+            self._status[name] = status
+
+    def is_ready(self) -> bool:
+        """Whether this process has finished warming up successfully."""
+        with self._lock:
+            if not self._started:
+                return True
+            return all(
+                status["state"] == self.READY for status in self._status.values()
+            )
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Get readiness and per-task warm-up status.
+
+        Returns:
+            Dict[str, Any]: Overall readiness, whether warm-up ran, and task states
+        """
+        ready = self.is_ready()
+        with self._lock:
+            return {
+                "ready": ready,
+                "warmup_started": self._started,
+                "tasks": {name: dict(status) for name, status in self._status.items()},
+            }
+
+
+# Create a singleton instance
+warmup = WarmupRegistry()
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import SigningProgress, SignReference
+from .models import SignAttempt, SigningProgress, SignReference
 
 
 @admin.register(SignReference)
@@ -12,14 +12,29 @@ class SignReferenceAdmin(admin.ModelAdmin):
         (None, {"fields": ("name", "meaning", "video", "thumbnail")}),
         (
             "Details",
-            {"fields": ("description", "example_sentence", "difficulty", "landmarks")},
+            {
+                "fields": (
+                    "description",
+                    "example_sentence",
+                    "difficulty",
+                    "landmark_shape",
+                    "landmark_fps",
+                    "annotated_clip",
+                )
+            },
         ),
         (
             "Metadata",
             {"fields": ("created_at", "updated_at"), "classes": ("collapse",)},
         ),
     )
-    readonly_fields = ("created_at", "updated_at")
+    readonly_fields = (
+        "landmark_shape",
+        "landmark_fps",
+        "annotated_clip",
+        "created_at",
+        "updated_at",
+    )
 
 
 @admin.register(SigningProgress)
@@ -36,3 +51,12 @@ class SigningProgressAdmin(admin.ModelAdmin):
     list_filter = ("mastered", "last_practiced")
     search_fields = ("user__username", "sign__name")
     readonly_fields = ("accuracy",)
+
+
+@admin.register(SignAttempt)
+class SignAttemptAdmin(admin.ModelAdmin):
+    list_display = ("user", "sign", "similarity_score", "is_successful", "created_at")
+    list_filter = ("is_successful", "created_at")
+    search_fields = ("user__username", "sign__name")
+    readonly_fields = ("landmark_shape", "landmark_fps", "visualization", "created_at")
+    exclude = ("keyframes", "alignment")
@@ -3,3 +3,26 @@ from django.apps import AppConfig
 
 class SigningConfig(AppConfig):
     name = "apps.signing"
+
+    def ready(self):
+        """Register the sign comparison warm-up run at server startup."""
+        from apps.core.warmup import warmup
+
+        warmup.register("signing.sign_comparer", _warm_up_sign_comparer)
+
+
+def _warm_up_sign_comparer():
+    """Build every pooled MediaPipe Hands graph and run a blank frame through it."""
+    from contextlib import ExitStack
+
+    import numpy as np
+
+    from apps.signing.services.sign_comparer import clip_comparers, frame_trackers
+
+    blank = np.zeros((256, 256, 3), dtype=np.uint8)
+    for pool in (clip_comparers, frame_trackers):
+        # Hold every instance at once so each one gets warmed up
+        with ExitStack() as stack:
+            for _ in range(pool.size):
+                comparer = stack.enter_context(pool.acquire())
+                comparer.extract_landmarks_from_frames([blank])
@@ -0,0 +1,337 @@
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
+
+from .models import SignReference
+from .services import SignComparer
+from .services.analysis import AnalysisError, StreamingAttempt
+from .tasks import attempts_group
+
+logger = logging.getLogger(__name__)
+
+
+class HandTrackingConsumer(AsyncWebsocketConsumer):
+    """
+    Stream webcam frames in and hand landmarks out over one WebSocket.
+
+    Clients send each frame as a binary message containing an encoded image
+    (JPEG). Every connection gets its own MediaPipe tracker, so hands are
+    tracked from frame to frame instead of being detected from scratch. Only
+    one frame is processed at a time and only the newest waiting frame is
+    kept: when the client sends faster than frames can be processed, older
+    frames are dropped rather than queued.
+
+    A sign attempt can also be streamed: between ``start_attempt`` and
+    ``finish_attempt`` messages no frame is dropped, every frame is scored
+    against the reference as it is tracked, and ``progress`` messages report
+    the partial score and position in the reference. The final ``result`` is
+    sent as soon as the last frame is tracked. At most ANALYSIS_MAX_FRAMES
+    frames are kept per attempt, and recording stops by itself if the attempt
+    fails to start or is not finished within ATTEMPT_RECORDING_TIMEOUT.
+    """
+
+    # Open tracking connections in this process
+    active_connections = 0
+
+    async def connect(self):
+        """Handle WebSocket connection."""
+        self.user = self.scope["user"]
+        self.tracker = None
+        self.worker = None
+
+        # Reject connection if user is not authenticated
+        if not self.user.is_authenticated:
+            await self.close()
+            return
+
+        # Each connection holds a MediaPipe graph, so cap them per process
+        if (
+            HandTrackingConsumer.active_connections
+            >= settings.SIGNING["MAX_TRACKING_CONNECTIONS"]
+        ):
+            logger.warning("Rejecting hand tracking connection: too many open")
+            await self.close()
+            return
+
+        HandTrackingConsumer.active_connections += 1
+        # Frames and attempt messages, processed in the order they came in
+        self.queue = deque()
+        self.frames_received = 0
+        self.frames_dropped = 0
+        self.reset_requested = False
+        self.set_recording(False)
+        self.attempt = None
+        self.closing = False
+        self.frame_ready = asyncio.Event()
+
+        await self.accept()
+        self.worker = asyncio.create_task(self.process_frames())
+        logger.info(f"Hand tracking connected: user {self.user.username}")
+
+    async def disconnect(self, close_code):
+        """Handle WebSocket disconnection."""
+        if self.worker is None:
+            return
+
+        # Let the frame being processed finish before releasing the tracker
+        self.closing = True
+        self.frame_ready.set()
+        await asyncio.gather(self.worker, return_exceptions=True)
+        self.worker = None
+        HandTrackingConsumer.active_connections -= 1
+
+        if self.tracker is not None:
+            await sync_to_async(self.tracker.close, thread_sensitive=False)()
+            self.tracker = None
+
+        logger.info(
+            f"Hand tracking disconnected: {self.frames_received} frames received, "
+            f"{self.frames_dropped} dropped, code {close_code}"
+        )
+
+    async def receive(self, text_data=None, bytes_data=None):
+        """Handle incoming frames and control messages."""
+        if bytes_data is not None:
+            await self.handle_frame(bytes_data)
+            return
+
+        try:
+            data = json.loads(text_data)
+        except json.JSONDecodeError:
+            logger.error("Failed to parse hand tracking message")
+            return
+
+        message_type = data.get("type")
+        if message_type == "reset":
+            # Start tracking afresh, e.g. before recording a new attempt
+            self.reset_requested = True
+        elif message_type in ("start_attempt", "finish_attempt"):
+            # Frames of an attempt are all kept until it is finished
+            self.set_recording(message_type == "start_attempt")
+            self.queue.append((message_type, data))
+            self.frame_ready.set()
+        else:
+            logger.warning(f"Unknown message type: {message_type}")
+
+    async def handle_frame(self, frame_data):
+        """Queue a frame, dropping older waiting ones unless recording."""
+        if len(frame_data) > settings.SIGNING["MAX_FRAME_BYTES"]:
+            await self.send_error("Frame is too large")
+            return
+
+        self.frames_received += 1
+        if self.recording and (
+            time.monotonic() - self.recording_started
+            > settings.SIGNING["ATTEMPT_RECORDING_TIMEOUT"]
+        ):
+            logger.warning("Streamed attempt was not finished in time")
+            self.set_recording(False)
+
+        if self.recording:
+            # Longer attempts would be cut down for analysis anyway
+            if self.recording_frames >= settings.SIGNING["ANALYSIS_MAX_FRAMES"]:
+                self.frames_dropped += 1
+                return
+            self.recording_frames += 1
+
+        # Only the newest frame matters for showing landmarks, but frames
+        # queued before an attempt message belong to that attempt
+        while not self.recording and self.queue and self.queue[-1][0] == "frame":
+            self.queue.pop()
+            self.frames_dropped += 1
+
+        self.queue.append(("frame", (self.frames_received, frame_data)))
+        self.frame_ready.set()
+
+    def set_recording(self, recording):
+        """Start or stop keeping every frame for a streamed attempt."""
+        self.recording = recording
+        self.recording_frames = 0
+        self.recording_started = time.monotonic()
+
+    async def process_frames(self):
+        """Work through queued frames and attempt messages one at a time."""
+        handlers = {
+            "frame": self.process_frame,
+            "start_attempt": self.start_attempt,
+            "finish_attempt": self.finish_attempt,
+        }
+        while True:
+            await self.frame_ready.wait()
+            self.frame_ready.clear()
+
+            # Items arriving while one is processed set the event again
+            while self.queue and not self.closing:
+                kind, payload = self.queue.popleft()
+                await handlers[kind](payload)
+
+            if self.closing:
+                return
+
+    async def process_frame(self, frame):
+        """Track hands in a frame and send its landmarks back."""
+        frame_number, frame_data = frame
+        reset, self.reset_requested = self.reset_requested, False
+        attempt = self.attempt
+        if attempt is not None and attempt.full:
+            # Longer attempts would be cut down for analysis anyway
+            self.frames_dropped += 1
+            return
+
+        try:
+            landmarks = await sync_to_async(self.track, thread_sensitive=False)(
+                frame_data, reset
+            )
+            progress = None
+            if attempt is not None and landmarks is not None:
+                progress = await sync_to_async(
+                    attempt.add_frame, thread_sensitive=False
+                )(landmarks, frame_data)
+        except Exception as e:
+            logger.exception(f"Error tracking hands: {e}")
+            await self.send_error(str(e))
+            return
+
+        if self.closing:
+            return
+
+        if landmarks is None:
+            await self.send_error("Could not decode frame")
+            return
+
+        await self.send(
+            text_data=json.dumps(
+                {
+                    "type": "landmarks",
+                    "frame": frame_number,
+                    "landmarks": landmarks,
+                    "dropped": self.frames_dropped,
+                }
+            )
+        )
+        if progress is not None:
+            await self.send(text_data=json.dumps({"type": "progress", **progress}))
+
+    async def start_attempt(self, data):
+        """Start scoring the frames that follow against a sign's reference."""
+        self.attempt = None
+        # Each attempt is tracked as a clip of its own
+        self.reset_requested = True
+
+        try:
+            self.attempt = await database_sync_to_async(self.create_attempt)(
+                data.get("sign_id"), data.get("fps")
+            )
+        except SignReference.DoesNotExist:
+            await self.attempt_failed_to_start("Sign not found")
+        except AnalysisError as e:
+            await self.attempt_failed_to_start(str(e))
+        except Exception as e:
+            logger.exception(f"Error starting streamed attempt: {e}")
+            await self.attempt_failed_to_start(str(e))
+
+    async def attempt_failed_to_start(self, error):
+        """Go back to dropping stale frames; no finish_attempt will follow."""
+        # Unless the client has already started another attempt
+        if not any(kind == "start_attempt" for kind, _ in self.queue):
+            self.set_recording(False)
+        await self.send_attempt_error(error)
+
+    def create_attempt(self, sign_id, fps):
+        """Load the sign and its reference sequence for a streamed attempt."""
+        try:
+            fps = float(fps) if fps else None
+        except (TypeError, ValueError):
+            fps = None
+
+        # Reference landmarks are only loaded if they are not cached yet
+        sign = SignReference.objects.defer("landmark_data").get(pk=sign_id)
+        if self.tracker is None:
+            self.tracker = SignComparer()
+        return StreamingAttempt(
+            sign, self.tracker, fps or settings.SIGNING["ANALYSIS_FPS"]
+        )
+
+    async def finish_attempt(self, data):
+        """Score the streamed attempt exactly and send the result."""
+        attempt, self.attempt = self.attempt, None
+        if attempt is None:
+            await self.send_attempt_error("No attempt is being recorded")
+            return
+
+        try:
+            result = await database_sync_to_async(attempt.finish)(self.user)
+        except AnalysisError as e:
+            await self.send_attempt_error(str(e))
+            return
+        except Exception as e:
+            logger.exception(f"Error scoring streamed attempt: {e}")
+            await self.send_attempt_error(str(e))
+            return
+
+        await self.send(text_data=json.dumps({"type": "result", **result}))
+
+    def track(self, frame_data, reset=False):
+        """Decode a frame and track hands in it, creating the tracker if needed."""
+        if self.tracker is None:
+            self.tracker = SignComparer()
+        if reset:
+            self.tracker.reset()
+
+        frame = self.tracker.decode_frame(frame_data)
+        if frame is None:
+            return None
+        return self.tracker.track_frame(frame)
+
+    async def send_error(self, message):
+        """Send an error message to the client."""
+        await self.send(text_data=json.dumps({"type": "error", "error": message}))
+
+    async def send_attempt_error(self, message):
+        """Send the reason a streamed attempt could not be scored."""
+        await self.send(
+            text_data=json.dumps({"type": "attempt_error", "error": message})
+        )
+
+
+class SignAttemptConsumer(AsyncWebsocketConsumer):
+    """
+    Push the results of sign attempts analyzed in the background.
+
+    Results are sent to a group per user, so a page can connect before it
+    submits an attempt and never miss a result that comes back quickly.
+    """
+
+    async def connect(self):
+        """Handle WebSocket connection."""
+        self.user = self.scope["user"]
+        self.group_name = None
+
+        # Reject connection if user is not authenticated
+        if not self.user.is_authenticated:
+            await self.close()
+            return
+
+        self.group_name = attempts_group(self.user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        """Handle WebSocket disconnection."""
+        if self.group_name:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def attempt_result(self, event):
+        """Send the score and feedback of an analyzed attempt."""
+        await self.send(text_data=json.dumps({**event, "type": "result"}))
+
+    async def attempt_error(self, event):
+        """Send the reason an attempt could not be analyzed."""
+        await self.send(text_data=json.dumps({**event, "type": "error"}))
@@ -0,0 +1,128 @@
+"""
+Django management command to benchmark DTW sign comparison.
+"""
+
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from fastdtw import fastdtw
+from scipy.spatial.distance import euclidean
+
+from apps.signing.models import SignReference
+from apps.signing.services.dtw import dtw
+from apps.signing.services.sign_comparer import SignComparer, landmarks_to_array
+from apps.signing.services.utils import load_landmarks_from_model
+
+
+class Command(BaseCommand):
+    help = "Benchmark the DTW engine against the previous fastdtw comparison"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sign",
+            type=str,
+            help="Use the stored landmarks of this sign as the template",
+        )
+        parser.add_argument(
+            "--template-frames",
+            type=int,
+            default=300,
+            help="Number of frames in a random template (without --sign)",
+        )
+        parser.add_argument(
+            "--learner-frames",
+            type=int,
+            default=120,
+            help="Number of frames in the learner attempt",
+        )
+        parser.add_argument(
+            "--window",
+            type=int,
+            default=None,
+            help="Sakoe-Chiba band radius in frames",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Number of timed runs per engine",
+        )
+
+    def handle(self, *args, **options):
+        template_seq = self._template_sequence(options)
+        if template_seq is None:
+            return
+
+        # A learner attempt is a noisy, resampled version of the template
+        rng = np.random.default_rng(0)
+        indices = np.linspace(0, len(template_seq) - 1, options["learner_frames"])
+        learner_seq = template_seq[indices.round().astype(int)]
+        learner_seq = learner_seq + rng.normal(0, 0.05, learner_seq.shape)
+        learner_seq = learner_seq.astype(np.float32)
+
+        self.stdout.write(
+            self.style.NOTICE(
+                f"Comparing {len(template_seq)} template frames with "
+                f"{len(learner_seq)} learner frames, {options['repeat']} runs each"
+            )
+        )
+
+        def run_fastdtw():
+            distance, path = fastdtw(template_seq, learner_seq, dist=euclidean)
+            # The previous comparison recomputed distances along the path
+            for template_idx, learner_idx in path:
+                euclidean(template_seq[template_idx], learner_seq[learner_idx])
+            return distance, len(path)
+
+        def run_dtw():
+            alignment = dtw(template_seq, learner_seq, window=options["window"])
+            return alignment["distance"], len(alignment["path"])
+
+        results = {}
+        for name, engine in (("fastdtw", run_fastdtw), ("dtw", run_dtw)):
+            timings = []
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                distance, path_length = engine()
+                timings.append(time.perf_counter() - start)
+
+            results[name] = np.median(timings)
+            score = max(0, 100 - (distance / path_length * 10))
+            self.stdout.write(
+                f"{name}: median {results[name] * 1000:.1f} ms, "
+                f"distance {distance:.3f}, path {path_length}, score {score:.1f}"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Speedup: {results['fastdtw'] / results['dtw']:.1f}x over fastdtw"
+            )
+        )
+
+    def _template_sequence(self, options):
+        """Build the template comparison sequence from a sign or random data."""
+        if not options.get("sign"):
+            rng = np.random.default_rng(1)
+            # Smooth random motion, like a hand moving through a sign
+            steps = rng.normal(0, 0.02, (options["template_frames"], 21 * 3))
+            return np.cumsum(steps, axis=0).astype(np.float32)
+
+        try:
+            sign = SignReference.objects.get(name=options["sign"])
+        except SignReference.DoesNotExist:
+            self.stdout.write(self.style.ERROR(f"Sign not found: {options['sign']}"))
+            return None
+
+        landmarks = load_landmarks_from_model(sign)
+        if landmarks is None:
+            self.stdout.write(self.style.ERROR(f"No landmarks for {sign.name}"))
+            return None
+
+        comparer = SignComparer(static_image_mode=True)
+        try:
+            points, mask = landmarks_to_array(landmarks)
+            normalized = comparer.normalize_landmarks(points, mask)
+            return comparer.create_sequence_for_comparison(normalized, mask)
+        finally:
+            comparer.close()
@@ -39,12 +39,18 @@ class Command(BaseCommand):
             type=str,
             help="Base URL for downloading videos (used with --source=url)",
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Concurrent S3 requests (default: SIGN_VIDEO_SYNC_WORKERS)",
+        )
 
     def handle(self, *args, **options):
         force = options["force"]
         specific_sign = options.get("sign")
         source = options["source"]
         base_url = options.get("url")
+        workers = options.get("workers")
 
         self.stdout.write(self.style.NOTICE("Starting sign language video download..."))
 
@@ -58,7 +64,7 @@ class Command(BaseCommand):
         # Process downloads based on source
         if source == "s3":
             downloaded, skipped, errors = self._process_s3_downloads(
-                video_manager, specific_sign, force
+                video_manager, specific_sign, force, workers
             )
         else:  # url source
             downloaded, skipped, errors = self._process_url_downloads(
@@ -95,65 +101,48 @@ class Command(BaseCommand):
 
         return True
 
-    def _process_s3_downloads(self, video_manager, specific_sign, force):
-        """Process downloads from S3 source."""
-        # List available videos in S3
-        video_map = video_manager.list_available_videos()
-        if not video_map:
-            self.stdout.write(self.style.ERROR("No videos found in S3."))
-            return 0, 0, 0
-
-        self.stdout.write(self.style.SUCCESS(f"Found {len(video_map)} videos in S3."))
-
-        # Filter for specific sign if requested
+    def _process_s3_downloads(self, video_manager, specific_sign, force, workers):
+        """Sync missing and changed videos from S3."""
+        sign_names = [specific_sign] if specific_sign else None
         if specific_sign:
-            if specific_sign in video_map:
-                video_map = {specific_sign: video_map[specific_sign]}
-                self.stdout.write(
-                    self.style.SUCCESS(f"Downloading only sign: {specific_sign}")
-                )
-            else:
-                self.stdout.write(
-                    self.style.ERROR(f"Sign '{specific_sign}' not found in S3.")
-                )
-                return 0, 0, 0
-
-        # Download each video
-        return self._download_from_s3(video_manager, video_map, force)
-
-    def _download_from_s3(self, video_manager, video_map, force):
-        """Download videos from S3 and track progress."""
-        downloaded_count = 0
-        skipped_count = 0
-        error_count = 0
+            self.stdout.write(
+                self.style.SUCCESS(f"Downloading only sign: {specific_sign}")
+            )
 
-        for sign_name, _video_path in video_map.items():
-            try:
-                # Check if already exists
-                if self._should_skip_existing(video_manager, sign_name, force):
-                    skipped_count += 1
-                    continue
+        try:
+            result = video_manager.sync_from_s3(
+                sign_names, force=force, workers=workers, progress=self._report
+            )
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"Could not list videos in S3: {e}"))
+            logger.exception("Error listing videos in S3")
+            return 0, 0, 1
 
-                # Download from S3
-                self.stdout.write(f"Downloading {sign_name} from S3...")
-                result = video_manager.download_from_s3(sign_name, force=force)
+        for sign_name in result["missing"]:
+            self.stdout.write(self.style.ERROR(f"Sign '{sign_name}' not found in S3."))
 
-                if result:
-                    self.stdout.write(
-                        self.style.SUCCESS(f"Downloaded {sign_name} to {result}")
-                    )
-                    downloaded_count += 1
-                else:
-                    self.stdout.write(
-                        self.style.ERROR(f"Failed to download {sign_name}")
-                    )
-                    error_count += 1
+        found = sum(
+            len(result[status]) for status in ("downloaded", "skipped", "failed")
+        )
+        if not found and not result["missing"]:
+            self.stdout.write(self.style.ERROR("No videos found in S3."))
 
-            except Exception as e:
-                self._handle_download_error(sign_name, e)
-                error_count += 1
+        return (
+            len(result["downloaded"]),
+            len(result["skipped"]),
+            len(result["failed"]) + len(result["missing"]),
+        )
 
-        return downloaded_count, skipped_count, error_count
+    def _report(self, sign_name, status):
+        """Show the outcome of syncing one video."""
+        if status == "downloaded":
+            self.stdout.write(self.style.SUCCESS(f"Downloaded {sign_name}"))
+        elif status == "skipped":
+            self.stdout.write(
+                self.style.WARNING(f"Skipping {sign_name} - already up to date")
+            )
+        else:
+            self.stdout.write(self.style.ERROR(f"Failed to download {sign_name}"))
 
     def _process_url_downloads(self, video_manager, specific_sign, base_url, force):
         """Process downloads from URL source."""
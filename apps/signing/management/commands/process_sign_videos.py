@@ -2,23 +2,64 @@
 Django management command to process sign language videos and extract landmarks.
 """
 
+import json
 import logging
+import multiprocessing
 import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from django.core.management.base import BaseCommand
 
 from apps.signing.models import SignReference
-from apps.signing.services.sign_comparer import SignComparer
-from apps.signing.services.sign_visualizer import SignVisualizer
+from apps.signing.services.batch import extract_video_landmarks, init_worker
+from apps.signing.services.sign_comparer import acquire_sign_comparer
 from apps.signing.services.utils import (
     create_thumbnail_for_sign,
-    process_video_to_landmarks,
     save_landmarks_to_model,
+    save_reference_clip_to_model,
 )
 from apps.signing.services.video_manager import VideoManager
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_CHECKPOINT = os.path.join(
+    tempfile.gettempdir(), "process_sign_videos.checkpoint.json"
+)
+
+
+class Checkpoint:
+    """Names of the signs finished by a run, saved after every sign."""
+
+    def __init__(self, path, resume=False):
+        """
+        Load or start a checkpoint.
+
+        Args:
+            path: JSON file the checkpoint is kept in
+            resume: Continue from an earlier run instead of starting afresh
+        """
+        self.path = path
+        self.completed = set()
+
+        if resume and os.path.exists(path):
+            with open(path) as f:
+                self.completed = set(json.load(f).get("completed", []))
+
+    def add(self, sign_name):
+        """Record a finished sign, replacing the file atomically."""
+        self.completed.add(sign_name)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"completed": sorted(self.completed)}, f)
+        os.replace(tmp_path, self.path)
+
+    def remove(self):
+        """Delete the checkpoint once a run has finished cleanly."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
 
 class Command(BaseCommand):
     help = "Process sign language videos and extract landmarks"
@@ -39,6 +80,23 @@ class Command(BaseCommand):
             type=str,
             help="Process only the specified sign",
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker processes extracting landmarks",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Skip signs finished by an interrupted earlier run",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            type=str,
+            default=DEFAULT_CHECKPOINT,
+            help="File recording the signs finished so far",
+        )
 
     def handle(self, *args, **options):
         force = options["force"]
@@ -50,8 +108,6 @@ class Command(BaseCommand):
         )
 
         # Initialize services
-        sign_comparer = SignComparer()
-        sign_visualizer = SignVisualizer()
         video_manager = VideoManager()
 
         # Get available videos
@@ -79,27 +135,85 @@ class Command(BaseCommand):
                 )
                 return
 
+        checkpoint = Checkpoint(options["checkpoint"], resume=options["resume"])
+        if checkpoint.completed:
+            self.stdout.write(
+                f"Resuming: {len(checkpoint.completed)} signs already finished"
+            )
+
         # Process videos and get counts
         results = self._process_videos(
-            video_map, force, download, sign_comparer, sign_visualizer, video_manager
+            video_map,
+            force,
+            download,
+            options["workers"],
+            checkpoint,
+            video_manager,
         )
 
         # Display summary of processing
         self._display_summary(results)
 
+        if not results["errors"]:
+            checkpoint.remove()
+
     def _process_videos(
-        self, video_map, force, download, sign_comparer, sign_visualizer, video_manager
+        self,
+        video_map,
+        force,
+        download,
+        workers,
+        checkpoint,
+        video_manager,
     ):
-        """Process each video and extract landmarks."""
+        """Extract landmarks from every video that needs it, in parallel."""
         results = {
             "processed": 0,
             "skipped": 0,
             "missing": 0,
             "errors": 0,
+            "frames": 0,
+            "seconds": 0.0,
         }
 
+        jobs = self._prepare_jobs(
+            video_map, force, download, checkpoint, video_manager, results
+        )
+        if not jobs:
+            return results
+
+        self.stdout.write(f"Extracting landmarks from {len(jobs)} videos...")
+        start = time.monotonic()
+
+        for done, (sign, result) in enumerate(self._run_jobs(jobs, workers), 1):
+            if isinstance(result, Exception):
+                self._log_processing_error(sign.name, result)
+                results["errors"] += 1
+                continue
+
+            if self._save_result(sign, result):
+                checkpoint.add(sign.name)
+                results["processed"] += 1
+                results["frames"] += result["frame_count"]
+                self._report_progress(done, len(jobs), result)
+            else:
+                results["errors"] += 1
+
+        results["seconds"] = time.monotonic() - start
+        return results
+
+    def _prepare_jobs(
+        self, video_map, force, download, checkpoint, video_manager, results
+    ):
+        """Get the sign and local video path of every video to process."""
+        jobs = []
+
         for sign_name, video_path in video_map.items():
             try:
+                if sign_name in checkpoint.completed:
+                    results["skipped"] += 1
+                    continue
+
                 # Get or create sign reference
                 sign, created = self._get_or_create_sign(sign_name)
 
@@ -116,24 +230,82 @@ class Command(BaseCommand):
                     results["missing"] += 1
                     continue
 
-                # Process and save landmarks
-                success, frames = self._process_and_save_landmarks(
-                    sign_name, video_path, sign, sign_comparer
-                )
-                if not success:
-                    results["errors"] += 1
-                    continue
-
-                # Create thumbnail if needed
-                self._create_thumbnail_if_needed(sign, frames, sign_visualizer)
-
-                results["processed"] += 1
+                jobs.append((sign, video_path))
 
             except Exception as e:
                 self._log_processing_error(sign_name, e)
                 results["errors"] += 1
 
-        return results
+        return jobs
+
+    def _run_jobs(self, jobs, workers):
+        """
+        Extract landmarks for each job, yielding (sign, result) as they finish.
+
+        A job that raised yields the exception as its result.
+        """
+        if workers <= 1:
+            with acquire_sign_comparer() as sign_comparer:
+                for sign, video_path in jobs:
+                    try:
+                        yield (
+                            sign,
+                            extract_video_landmarks(
+                                sign.name, video_path, sign_comparer
+                            ),
+                        )
+                    except Exception as e:
+                        yield sign, e
+            return
+
+        # Workers are spawned rather than forked: MediaPipe's threads do not
+        # survive a fork. They never touch the database, all writes happen here
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(jobs)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+        ) as pool:
+            futures = {
+                pool.submit(extract_video_landmarks, sign.name, video_path): sign
+                for sign, video_path in jobs
+            }
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except Exception as e:
+                    yield futures[future], e
+
+    def _save_result(self, sign, result):
+        """Save extracted landmarks, the annotated clip and a thumbnail if needed."""
+        if result["landmarks"] is None or result["first_frame"] is None:
+            self.stdout.write(
+                self.style.ERROR(f"No landmarks or frames found for {sign.name}")
+            )
+            return False
+
+        if not save_landmarks_to_model(sign, result["landmarks"], fps=result["fps"]):
+            self.stdout.write(
+                self.style.ERROR(f"Failed to save landmarks for {sign.name}")
+            )
+            return False
+
+        self.stdout.write(self.style.SUCCESS(f"Saved landmarks for {sign.name}"))
+
+        # Frames were annotated in the worker, nothing is tracked again here
+        if result["clip"] and not save_reference_clip_to_model(sign, *result["clip"]):
+            self.stdout.write(
+                self.style.WARNING(f"Failed to save annotated clip for {sign.name}")
+            )
+        self._create_thumbnail_if_needed(sign, result["first_frame"])
+        return True
+
+    def _report_progress(self, done, total, result):
+        """Show how far the run is and how fast the last video went."""
+        fps = result["frame_count"] / result["seconds"] if result["seconds"] else 0
+        self.stdout.write(
+            f"[{done}/{total}] {result['sign_name']}: {result['frame_count']} "
+            f"frames in {result['seconds']:.1f}s ({fps:.1f} frames/s)"
+        )
 
     def _get_or_create_sign(self, sign_name):
         """Get or create a sign reference."""
@@ -154,7 +326,7 @@ class Command(BaseCommand):
 
     def _should_skip_processing(self, sign, force):
         """Determine if processing should be skipped."""
-        if sign.landmarks and not force:
+        if sign.has_landmarks and not sign.landmarks_outdated and not force:
             self.stdout.write(
                 self.style.WARNING(f"Skipping {sign.name} - landmarks already exist")
             )
@@ -181,30 +353,10 @@ class Command(BaseCommand):
                 return None
         return video_path
 
-    def _process_and_save_landmarks(self, sign_name, video_path, sign, sign_comparer):
-        """Process video and save extracted landmarks."""
-        self.stdout.write(f"Processing video: {video_path}")
-        landmarks, frames = process_video_to_landmarks(video_path, sign_comparer)
-
-        if not landmarks or not frames:
-            self.stdout.write(
-                self.style.ERROR(f"No landmarks or frames found for {sign_name}")
-            )
-            return False, None
-
-        if save_landmarks_to_model(sign, landmarks):
-            self.stdout.write(self.style.SUCCESS(f"Saved landmarks for {sign_name}"))
-            return True, frames
-        else:
-            self.stdout.write(
-                self.style.ERROR(f"Failed to save landmarks for {sign_name}")
-            )
-            return False, None
-
-    def _create_thumbnail_if_needed(self, sign, frames, sign_visualizer):
+    def _create_thumbnail_if_needed(self, sign, frame):
         """Create a thumbnail for the sign if one doesn't exist."""
-        if not sign.thumbnail and frames:
-            if create_thumbnail_for_sign(sign, frames[0], sign_visualizer):
+        if not sign.thumbnail:
+            if create_thumbnail_for_sign(sign, frame):
                 self.stdout.write(
                     self.style.SUCCESS(f"Created thumbnail for {sign.name}")
                 )
@@ -216,7 +368,7 @@ class Command(BaseCommand):
     def _log_processing_error(self, sign_name, error):
         """Log an error that occurred during processing."""
         self.stdout.write(self.style.ERROR(f"Error processing {sign_name}: {error}"))
-        logger.exception(f"Error processing sign {sign_name}")
+        logger.exception(f"Error processing sign {sign_name}", exc_info=error)
 
     def _display_summary(self, results):
         """Display a summary of processing results."""
@@ -234,3 +386,9 @@ class Command(BaseCommand):
             )
         if results["errors"] > 0:
             self.stdout.write(self.style.ERROR(f"Errors: {results['errors']}"))
+        if results["seconds"] > 0:
+            self.stdout.write(
+                f"Throughput: {results['processed'] / results['seconds'] * 60:.1f} "
+                f"videos/min, {results['frames'] / results['seconds']:.1f} frames/s "
+                f"over {results['seconds']:.1f}s"
+            )
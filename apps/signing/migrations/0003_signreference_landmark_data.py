@@ -0,0 +1,81 @@
+import json
+
+import numpy as np
+from django.db import migrations, models
+
+NUM_HANDS = 2
+NUM_LANDMARKS = 21
+
+
+def pack_json_landmarks(apps, schema_editor):
+    """Convert JSON landmark lists to float32 points plus a hand presence mask."""
+    SignReference = apps.get_model("signing", "SignReference")
+
+    for sign in SignReference.objects.exclude(landmarks=None).iterator():
+        landmarks = sign.landmarks
+        # Landmarks used to be saved as a JSON string inside the JSON field
+        if isinstance(landmarks, str):
+            landmarks = json.loads(landmarks)
+        if not landmarks:
+            continue
+
+        points = np.zeros(
+            (len(landmarks), NUM_HANDS, NUM_LANDMARKS, 3), dtype=np.float32
+        )
+        mask = np.zeros((len(landmarks), NUM_HANDS), dtype=bool)
+        for i, frame_landmarks in enumerate(landmarks):
+            hands = frame_landmarks[:NUM_HANDS]
+            if hands:
+                points[i, : len(hands)] = hands
+                mask[i, : len(hands)] = True
+
+        sign.landmark_data = points.tobytes() + mask.tobytes()
+        sign.landmark_shape = list(points.shape)
+        sign.save(update_fields=["landmark_data", "landmark_shape"])
+
+
+def unpack_json_landmarks(apps, schema_editor):
+    """Convert binary landmarks back to JSON landmark lists."""
+    SignReference = apps.get_model("signing", "SignReference")
+
+    for sign in SignReference.objects.exclude(landmark_shape=None).iterator():
+        shape = tuple(sign.landmark_shape)
+        point_count = int(np.prod(shape))
+        data = bytes(sign.landmark_data)
+        points = np.frombuffer(data, dtype=np.float32, count=point_count)
+        mask = np.frombuffer(
+            data, dtype=bool, count=shape[0] * shape[1], offset=point_count * 4
+        )
+        points = points.reshape(shape)
+        mask = mask.reshape(shape[:2])
+
+        landmarks = [
+            frame_points[frame_mask].tolist()
+            for frame_points, frame_mask in zip(points, mask, strict=True)
+        ]
+        sign.landmarks = json.dumps(landmarks)
+        sign.save(update_fields=["landmarks"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("signing", "0002_signingprogress"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="signreference",
+            name="landmark_data",
+            field=models.BinaryField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="signreference",
+            name="landmark_shape",
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(pack_json_landmarks, unpack_json_landmarks),
+        migrations.RemoveField(
+            model_name="signreference",
+            name="landmarks",
+        ),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("signing", "0003_signreference_landmark_data"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="signreference",
+            name="landmark_fps",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+    ]
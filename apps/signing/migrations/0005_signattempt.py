@@ -0,0 +1,77 @@
+# Generated by Django 4.2.20 on 2026-10-17 01:11
+
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("signing", "0004_signreference_landmark_fps"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SignAttempt",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("similarity_score", models.FloatField()),
+                ("is_successful", models.BooleanField(default=False)),
+                ("landmark_data", models.BinaryField(blank=True, null=True)),
+                (
+                    "landmark_shape",
+                    models.JSONField(blank=True, editable=False, null=True),
+                ),
+                (
+                    "landmark_fps",
+                    models.FloatField(blank=True, editable=False, null=True),
+                ),
+                (
+                    "keyframes",
+                    models.JSONField(blank=True, default=list, editable=False),
+                ),
+                (
+                    "alignment",
+                    models.JSONField(blank=True, default=list, editable=False),
+                ),
+                (
+                    "visualization",
+                    models.FileField(
+                        blank=True,
+                        editable=False,
+                        null=True,
+                        upload_to="signs/attempts/",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "sign",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="signing.signreference",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
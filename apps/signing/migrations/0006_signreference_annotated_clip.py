@@ -0,0 +1,24 @@
+# Generated by Django 4.2.20 on 2026-10-17 01:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("signing", "0005_signattempt"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="signreference",
+            name="annotated_clip",
+            field=models.ImageField(
+                blank=True, editable=False, null=True, upload_to="signs/annotated/"
+            ),
+        ),
+        migrations.AddField(
+            model_name="signreference",
+            name="annotated_clip_layout",
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
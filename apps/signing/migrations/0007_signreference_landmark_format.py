@@ -0,0 +1,19 @@
+# Generated by Django 4.2.20 on 2026-10-17 01:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("signing", "0006_signreference_annotated_clip"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="signreference",
+            name="landmark_format",
+            field=models.PositiveSmallIntegerField(
+                blank=True, editable=False, null=True
+            ),
+        ),
+    ]
@@ -1,8 +1,14 @@
+import uuid
+
 from django.contrib.auth.models import User
 from django.db import models
 
 
 class SignReference(models.Model):
+    # Version of the stored landmark layout; 2 puts hands in fixed slots by
+    # handedness. Signs saved in an older format must be processed again
+    LANDMARK_FORMAT = 2
+
     class DifficultyLevel(models.TextChoices):
         BEGINNER = "beginner", "Beginner"
         INTERMEDIATE = "intermediate", "Intermediate"
@@ -14,7 +20,22 @@ class SignReference(models.Model):
     thumbnail = models.ImageField(upload_to="signs/thumbnails/", null=True, blank=True)
     description = models.TextField(blank=True)
     example_sentence = models.CharField(max_length=200, blank=True)
-    landmarks = models.JSONField(null=True, blank=True)  # Store MediaPipe landmarks
+    # MediaPipe landmarks as raw float32 points followed by the hand presence
+    # mask, see apps.signing.services.utils.save_landmarks_to_model
+    landmark_data = models.BinaryField(null=True, blank=True, editable=False)
+    landmark_shape = models.JSONField(null=True, blank=True, editable=False)
+    # Frame rate of the video the landmarks were extracted from
+    landmark_fps = models.FloatField(null=True, blank=True, editable=False)
+    # LANDMARK_FORMAT the landmarks were saved in, None before it was recorded
+    landmark_format = models.PositiveSmallIntegerField(
+        null=True, blank=True, editable=False
+    )
+    # Sampled video frames with their landmarks drawn, tiled in one JPEG, see
+    # apps.signing.services.reference_clip
+    annotated_clip = models.ImageField(
+        upload_to="signs/annotated/", null=True, blank=True, editable=False
+    )
+    annotated_clip_layout = models.JSONField(null=True, blank=True, editable=False)
     difficulty = models.CharField(
         max_length=20, choices=DifficultyLevel.choices, default=DifficultyLevel.BEGINNER
     )
@@ -24,6 +45,16 @@ class SignReference(models.Model):
     def __str__(self):
         return self.name
 
+    @property
+    def has_landmarks(self):
+        """Whether reference landmarks have been extracted for this sign."""
+        return bool(self.landmark_shape and self.landmark_shape[0])
+
+    @property
+    def landmarks_outdated(self):
+        """Whether the landmarks were saved in an older format than is compared."""
+        return self.has_landmarks and self.landmark_format != self.LANDMARK_FORMAT
+
 
 class SigningProgress(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -46,3 +77,36 @@ class SigningProgress(models.Model):
         if self.attempts == 0:
             return 0
         return int((self.successful_attempts / self.attempts) * 100)
+
+
+class SignAttempt(models.Model):
+    # Generated up front, so a queued attempt can be referred to before scoring
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    sign = models.ForeignKey(SignReference, on_delete=models.CASCADE)
+    similarity_score = models.FloatField()
+    is_successful = models.BooleanField(default=False)
+    # Learner landmarks, stored like SignReference.landmark_data
+    landmark_data = models.BinaryField(null=True, blank=True, editable=False)
+    landmark_shape = models.JSONField(null=True, blank=True, editable=False)
+    landmark_fps = models.FloatField(null=True, blank=True, editable=False)
+    # A few downscaled JPEG frames of the attempt, with their learner frame index
+    keyframes = models.JSONField(default=list, blank=True, editable=False)
+    # Reference frame and score the DTW path matched to each learner frame
+    alignment = models.JSONField(default=list, blank=True, editable=False)
+    # Comparison frames, rendered the first time the comparison is opened
+    visualization = models.FileField(
+        upload_to="signs/attempts/", null=True, blank=True, editable=False
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.user.username}'s attempt at '{self.sign.name}'"
+
+    @property
+    def has_landmarks(self):
+        """Whether learner landmarks were stored for this attempt."""
+        return bool(self.landmark_shape and self.landmark_shape[0])
@@ -0,0 +1,8 @@
+from django.urls import path
+
+from . import consumers
+
+websocket_urlpatterns = [
+    path("ws/signing/track-hands/", consumers.HandTrackingConsumer.as_asgi()),
+    path("ws/signing/attempts/", consumers.SignAttemptConsumer.as_asgi()),
+]
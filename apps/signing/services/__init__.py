@@ -2,7 +2,13 @@
 Services for the signing app.
 """
 
-from .sign_comparer import SignComparer
+from .reference_cache import reference_sequences
+from .sign_comparer import (
+    SignComparer,
+    acquire_sign_comparer,
+    array_to_landmarks,
+    landmarks_to_array,
+)
 from .sign_visualizer import SignVisualizer
 from .utils import (
     convert_base64_to_image,
@@ -19,8 +25,12 @@ from .video_manager import VideoManager
 # Expose classes and functions
 __all__ = [
     "SignComparer",
+    "acquire_sign_comparer",
+    "landmarks_to_array",
+    "array_to_landmarks",
     "SignVisualizer",
     "VideoManager",
+    "reference_sequences",
     "process_video_to_landmarks",
     "save_landmarks_to_model",
     "load_landmarks_from_model",
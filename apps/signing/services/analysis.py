@@ -0,0 +1,465 @@
+"""
+Scoring of a learner's sign attempt against the reference sign.
+"""
+
+import base64
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from ..models import SignAttempt, SigningProgress
+from .dtw import OnlineDTW
+from .frame_source import iter_base64_frames
+from .reference_cache import reference_sequences, resampled_fps
+from .sign_comparer import (
+    NUM_HANDS,
+    NUM_LANDMARKS,
+    SCORE_PER_DISTANCE,
+    acquire_sign_comparer,
+    landmarks_to_array,
+    per_hand_distances,
+)
+from .sign_index import sign_index
+from .utils import convert_frames_to_base64, pack_landmarks
+
+logger = logging.getLogger(__name__)
+
+# Similarity score an attempt needs to count as successful
+SUCCESS_SCORE = 80
+
+
+class AnalysisError(Exception):
+    """An attempt that cannot be scored, with a message for the learner."""
+
+
+def record_attempt(user, sign, is_successful: bool) -> SigningProgress:
+    """
+    Count a sign attempt towards the user's progress on that sign.
+
+    The progress record is locked while it is updated, as attempts are
+    recorded concurrently by web requests, the attempts socket and workers.
+
+    Args:
+        user: User who made the attempt
+        sign: SignReference that was attempted
+        is_successful: Whether the attempt scored high enough
+
+    Returns:
+        SigningProgress: Updated progress record
+    """
+    with transaction.atomic():
+        progress, created = SigningProgress.objects.select_for_update().get_or_create(
+            user=user, sign=sign
+        )
+
+        progress.attempts += 1
+        if is_successful:
+            progress.successful_attempts += 1
+
+            # Mark as mastered if they've succeeded at least 3 times with >70% accuracy
+            if progress.successful_attempts >= 3 and progress.accuracy >= 70:
+                progress.mastered = True
+
+        progress.save()
+    return progress
+
+
+def encode_keyframes(base64_frames: list, count: int, max_size: int) -> List[Dict]:
+    """
+    Keep a few evenly spaced frames of an attempt, downscaled.
+
+    Args:
+        base64_frames: Base64 encoded frames of the attempt
+        count: Number of keyframes to keep
+        max_size: Longest side in pixels of the kept frames
+
+    Returns:
+        List[Dict]: ``frame`` index and JPEG data URL ``image`` per keyframe
+    """
+    if not base64_frames or count <= 0:
+        return []
+
+    indices = np.linspace(0, len(base64_frames) - 1, count).round().astype(int)
+    keyframes = []
+    for index in sorted(set(indices.tolist())):
+        frames = list(iter_base64_frames([base64_frames[index]], max_size=max_size))
+        images = convert_frames_to_base64(frames)
+        if images:
+            keyframes.append({"frame": index, "image": images[0]})
+
+    return keyframes
+
+
+def align_frames(
+    comparison_results: Dict, learner_length: int, reference_scale: float, sign
+) -> List:
+    """
+    Match every learner frame to a reference frame along the DTW path.
+
+    Args:
+        comparison_results: Results of SignComparer.compare_sequences
+        learner_length: Number of learner frames
+        reference_scale: Reference frames per compared reference step
+        sign: SignReference that was compared against
+
+    Returns:
+        List: [reference frame index, score] per learner frame, or an empty
+            list if the comparison was abandoned
+    """
+    path = comparison_results["dtw_path"]
+    if not path:
+        return []
+
+    last_reference_frame = sign.landmark_shape[0] - 1
+    alignment = [None] * learner_length
+    for (template_idx, learner_idx), score in zip(
+        path, comparison_results["frame_scores"], strict=True
+    ):
+        # Keep the first match of each learner frame
+        if alignment[learner_idx] is None:
+            reference_frame = min(
+                round(template_idx * reference_scale), last_reference_frame
+            )
+            alignment[learner_idx] = [reference_frame, round(score, 1)]
+
+    return alignment
+
+
+def _track_attempt(sign_comparer, base64_frames: list) -> list:
+    """Extract the learner's landmarks, failing if no hands were seen."""
+    learner_landmarks = sign_comparer.extract_landmarks_from_base64_frames(
+        base64_frames, max_size=settings.SIGNING["ANALYSIS_MAX_FRAME_SIZE"]
+    )
+    if not learner_landmarks or all(not frame for frame in learner_landmarks):
+        raise AnalysisError("Could not detect hand landmarks in your sign")
+    return learner_landmarks
+
+
+def _reference_sequence(sign, sign_comparer, fps):
+    """Get the reference sequence at the attempt's frame rate, or fail."""
+    if sign.landmarks_outdated:
+        raise AnalysisError("The reference for this sign needs to be processed again")
+    reference_seq = reference_sequences.get(
+        sign, sign_comparer.prepare_sequence, fps=fps
+    )
+    if reference_seq is None:
+        raise AnalysisError("No reference landmarks available for this sign")
+    return reference_seq
+
+
+def _reference_scale(sign, fps) -> float:
+    """Reference frames per step of the reference sequence an attempt uses."""
+    reference_fps = resampled_fps(sign, fps)
+    return sign.landmark_fps / reference_fps if reference_fps else 1
+
+
+def save_scored_attempt(
+    user,
+    sign,
+    learner_landmarks: list,
+    fps: Optional[float],
+    comparison_results: Dict,
+    feedback: Dict,
+    keyframes: List[Dict],
+    attempt_id=None,
+) -> Dict[str, Any]:
+    """
+    Save a compared attempt as a SignAttempt and update the user's progress.
+
+    The learner landmarks, keyframes and the frame alignment are kept, so the
+    comparison can be shown without tracking again.
+
+    Returns:
+        Dict[str, Any]: Attempt id, score, feedback and the user's updated
+            progress
+    """
+    # Determine if attempt was successful
+    similarity_score = comparison_results["similarity_score"]
+    is_successful = similarity_score >= SUCCESS_SCORE
+
+    # Keep what the comparison visualization needs
+    landmark_data, landmark_shape = pack_landmarks(learner_landmarks)
+    attempt = SignAttempt(
+        user=user,
+        sign=sign,
+        similarity_score=similarity_score,
+        is_successful=is_successful,
+        landmark_data=landmark_data,
+        landmark_shape=landmark_shape,
+        landmark_fps=fps,
+        keyframes=keyframes,
+        alignment=align_frames(
+            comparison_results,
+            len(learner_landmarks),
+            _reference_scale(sign, fps),
+            sign,
+        ),
+    )
+    if attempt_id:
+        attempt.id = attempt_id
+    attempt.save()
+
+    # Update user progress
+    progress = record_attempt(user, sign, is_successful)
+
+    return {
+        "attempt_id": str(attempt.id),
+        "similarity_score": similarity_score,
+        "feedback": feedback["overall_score"],
+        "rating": feedback["rating"],
+        "is_successful": is_successful,
+        "areas_for_improvement": feedback["weak_points"],
+        "attempts": progress.attempts,
+        "successful_attempts": progress.successful_attempts,
+        "accuracy": progress.accuracy,
+        "mastered": progress.mastered,
+    }
+
+
+def analyze_attempt(
+    user,
+    sign,
+    base64_frames: list,
+    fps: Optional[float] = None,
+    attempt_id=None,
+) -> Dict[str, Any]:
+    """
+    Track hands in an attempt, compare it with the reference and record it.
+
+    Args:
+        user: User who made the attempt
+        sign: SignReference that was attempted (landmark data may be deferred)
+        base64_frames: Base64 encoded frames, already selected for analysis
+        fps: Frame rate of the selected frames, if known
+        attempt_id: Id to save the SignAttempt under, generated if not given
+
+    Returns:
+        Dict[str, Any]: Attempt id, score, feedback and the user's updated
+            progress
+
+    Raises:
+        AnalysisError: If the sign has no reference or no hands were found
+        PoolTimeoutError: If no hand tracker became free in time
+    """
+    with acquire_sign_comparer() as sign_comparer:
+        # Get the normalized reference sequence at the attempt's frame rate
+        reference_seq = _reference_sequence(sign, sign_comparer, fps)
+
+        # Extract landmarks from user's attempt
+        learner_landmarks = _track_attempt(sign_comparer, base64_frames)
+
+        # Compare signs
+        comparison_results = sign_comparer.compare_sequences(
+            reference_seq, sign_comparer.prepare_sequence(learner_landmarks)
+        )
+        feedback = sign_comparer.generate_feedback(comparison_results)
+
+    return save_scored_attempt(
+        user,
+        sign,
+        learner_landmarks,
+        fps,
+        comparison_results,
+        feedback,
+        encode_keyframes(
+            base64_frames,
+            settings.SIGNING["ATTEMPT_KEYFRAMES"],
+            settings.SIGNING["ATTEMPT_KEYFRAME_SIZE"],
+        ),
+        attempt_id=attempt_id,
+    )
+
+
+class StreamingAttempt:
+    """
+    A sign attempt scored frame by frame while the learner is still signing.
+
+    Every tracked frame extends an online DTW alignment with the reference,
+    giving a partial score and the learner's position in the reference right
+    away. When recording stops, only the exact comparison of the already
+    tracked landmarks is left to do.
+    """
+
+    def __init__(self, sign, sign_comparer, fps: Optional[float] = None):
+        """
+        Start an attempt at a sign.
+
+        Args:
+            sign: SignReference being attempted (landmark data may be deferred)
+            sign_comparer: SignComparer the frames are tracked with; only its
+                comparison methods are used here
+            fps: Rate the client sends frames at, if known
+
+        Raises:
+            AnalysisError: If the sign has no reference landmarks
+        """
+        self.sign = sign
+        self.sign_comparer = sign_comparer
+        self.fps = fps
+        self.reference_seq = _reference_sequence(sign, sign_comparer, fps)
+        self.reference_scale = _reference_scale(sign, fps)
+        self.online = OnlineDTW(self.reference_seq)
+        self.landmarks = []
+        self.frames = []
+        # Hands seen so far, held while they are briefly lost
+        self._points = np.zeros((1, NUM_HANDS, NUM_LANDMARKS, 3), dtype=np.float32)
+        self._mask = np.zeros((1, NUM_HANDS), dtype=bool)
+
+    @property
+    def full(self) -> bool:
+        """Whether the attempt has as many frames as are analyzed."""
+        return len(self.landmarks) >= settings.SIGNING["ANALYSIS_MAX_FRAMES"]
+
+    def add_frame(self, landmarks: list, frame_data: bytes) -> Optional[Dict]:
+        """
+        Add the next tracked frame and advance the alignment.
+
+        Args:
+            landmarks: Hand landmarks of the frame, as track_frame returns them
+            frame_data: Encoded image of the frame, kept for keyframes
+
+        Returns:
+            Optional[Dict]: Learner ``frame`` index, reference ``position``
+                (a reference video frame), ``progress`` through the reference
+                from 0 to 1 and the partial ``score``; None if no hand has
+                been seen yet
+        """
+        self.landmarks.append(landmarks)
+        self.frames.append(frame_data)
+
+        # Hold hands that were lost, as nothing is known about later frames
+        points, mask = landmarks_to_array([landmarks])
+        self._points[mask] = points[mask]
+        self._mask |= mask
+        if not self._mask.any():
+            return None
+
+        normalized = self.sign_comparer.normalize_landmarks(self._points, self._mask)
+        features = self.sign_comparer.create_sequence_for_comparison(
+            normalized, self._mask
+        )
+        position, step_cost = self.online.update(features[0])
+        step_cost = per_hand_distances(
+            self.reference_seq, features, [(position, 0)], [step_cost]
+        )[0]
+
+        last_reference_frame = self.sign.landmark_shape[0] - 1
+        return {
+            "frame": len(self.landmarks) - 1,
+            "position": min(
+                round(position * self.reference_scale), last_reference_frame
+            ),
+            "progress": position / max(len(self.reference_seq) - 1, 1),
+            "score": max(0, 100 - float(step_cost) * SCORE_PER_DISTANCE),
+        }
+
+    def finish(self, user, attempt_id=None) -> Dict[str, Any]:
+        """
+        Compare the whole attempt exactly and record it.
+
+        Returns:
+            Dict[str, Any]: The same result analyze_attempt returns
+
+        Raises:
+            AnalysisError: If no hands were found in the attempt
+        """
+        if not self.landmarks or all(not frame for frame in self.landmarks):
+            raise AnalysisError("Could not detect hand landmarks in your sign")
+
+        comparison_results = self.sign_comparer.compare_sequences(
+            self.reference_seq, self.sign_comparer.prepare_sequence(self.landmarks)
+        )
+        feedback = self.sign_comparer.generate_feedback(comparison_results)
+
+        return save_scored_attempt(
+            user,
+            self.sign,
+            self.landmarks,
+            self.fps,
+            comparison_results,
+            feedback,
+            encode_keyframes(
+                [base64.b64encode(frame).decode("ascii") for frame in self.frames],
+                settings.SIGNING["ATTEMPT_KEYFRAMES"],
+                settings.SIGNING["ATTEMPT_KEYFRAME_SIZE"],
+            ),
+            attempt_id=attempt_id,
+        )
+
+
+def recognize_attempt(base64_frames: list, fps: Optional[float] = None) -> Dict:
+    """
+    Rank the reference signs an attempt most likely shows.
+
+    Every processed sign is bounded at once with LB_Keogh, and exact DTW only
+    runs against the closest candidates. Each comparison is abandoned as soon
+    as it cannot beat the best score found so far, and abandoned signs are
+    left out of the matches. Nothing is recorded.
+
+    Args:
+        base64_frames: Base64 encoded frames, already selected for analysis
+        fps: Frame rate of the selected frames, if known
+
+    Returns:
+        Dict: ``matches`` with sign id, name, meaning and score, best first,
+            and how many ``candidates`` of the ``indexed`` signs were compared
+
+    Raises:
+        AnalysisError: If no signs are processed yet or no hands were found
+        PoolTimeoutError: If no hand tracker became free in time
+    """
+    with acquire_sign_comparer() as sign_comparer:
+        learner_seq = sign_comparer.prepare_sequence(
+            _track_attempt(sign_comparer, base64_frames)
+        )
+        candidates = sign_index.nearest(learner_seq, sign_comparer.prepare_sequence)
+        if not candidates:
+            raise AnalysisError("No reference signs have been processed yet")
+
+        matches = []
+        best_score = 0
+        for sign, _ in candidates:
+            reference_seq = reference_sequences.get(
+                sign, sign_comparer.prepare_sequence, fps=fps
+            )
+            if reference_seq is None:
+                # Landmarks were cleared since the index was built
+                continue
+            # A path has at most n + m - 1 steps, and per hand a step costs at
+            # least its raw distance over sqrt(NUM_HANDS), so beyond this
+            # distance the score is below the best one for certain
+            max_distance = None
+            if best_score > 0:
+                path_steps = len(reference_seq) + len(learner_seq) - 1
+                max_distance = (
+                    (100 - best_score)
+                    / SCORE_PER_DISTANCE
+                    * path_steps
+                    * np.sqrt(NUM_HANDS)
+                )
+            comparison = sign_comparer.compare_sequences(
+                reference_seq, learner_seq, max_distance=max_distance
+            )
+            if not comparison["dtw_path"]:
+                # Abandoned, so it scores below the best match
+                continue
+            score = comparison["similarity_score"]
+            best_score = max(best_score, score)
+            matches.append(
+                {
+                    "sign_id": sign.id,
+                    "name": sign.name,
+                    "meaning": sign.meaning,
+                    "similarity_score": score,
+                }
+            )
+
+    matches.sort(key=lambda match: match["similarity_score"], reverse=True)
+    return {
+        "matches": matches,
+        "candidates": len(candidates),
+        "indexed": sign_index.size(),
+    }
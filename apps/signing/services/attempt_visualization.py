@@ -0,0 +1,201 @@
+"""
+Comparison visualizations of learner attempts, drawn from stored landmarks.
+
+Nothing is tracked here: reference frames come from the sign's annotated clip
+(or, for signs processed before clips existed, from the decoded reference
+video with its stored landmarks drawn on) and learner landmarks are drawn on
+the attempt's keyframes. The result is saved with the attempt, so it is only
+rendered once.
+"""
+
+import json
+import logging
+import os
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from django.core.files.base import ContentFile
+
+from .frame_source import iter_base64_frames, iter_video_frames
+from .reference_clip import nearest_clip_frame, split_reference_clip
+from .sign_visualizer import compose_comparison_frame, draw_hand_landmarks
+from .utils import convert_frames_to_base64, load_landmarks_from_model
+from .video_manager import VideoManager
+
+logger = logging.getLogger(__name__)
+
+# (width, height) of each side of a comparison frame
+COMPARISON_SIZE = (320, 240)
+
+
+def reference_video_path(sign) -> Optional[str]:
+    """Get a local path of the sign's reference video, if there is one."""
+    if sign.video:
+        try:
+            if os.path.exists(sign.video.path):
+                return sign.video.path
+        except NotImplementedError:
+            # Remote storage has no local path
+            pass
+    return VideoManager().get_video_path(sign.name)
+
+
+def decode_reference_frames(
+    video_path: Optional[str], indices
+) -> Dict[int, np.ndarray]:
+    """
+    Decode only the given frames of a reference video, downscaled.
+
+    Returns:
+        Dict[int, np.ndarray]: RGB frame per index; missing if not decoded
+    """
+    wanted = set(indices)
+    if not video_path or not wanted:
+        return {}
+
+    frames = {}
+    last = max(wanted)
+    for index, frame in enumerate(
+        iter_video_frames(video_path, max_size=max(COMPARISON_SIZE))
+    ):
+        if index in wanted:
+            frames[index] = frame
+        if index >= last:
+            break
+    return frames
+
+
+def load_reference_clip(sign) -> Optional[Callable[[int], np.ndarray]]:
+    """
+    Load the sign's annotated clip from storage.
+
+    Returns:
+        Optional[Callable[[int], np.ndarray]]: Annotated RGB frame closest to
+            a reference video frame, or None if the sign has no usable clip
+    """
+    if not sign.annotated_clip or not sign.annotated_clip_layout:
+        return None
+
+    layout = sign.annotated_clip_layout
+    try:
+        with sign.annotated_clip.open("rb") as f:
+            frames = split_reference_clip(f.read(), layout)
+    except Exception as e:
+        logger.warning(f"Could not load annotated clip of {sign.name}: {e}")
+        return None
+    if not frames:
+        return None
+
+    return lambda source_frame: frames[nearest_clip_frame(layout, source_frame)]
+
+
+def _reference_frame_source(sign, reference_points, reference_mask, indices):
+    """Get annotated reference frames by video frame index."""
+    clip_frame = load_reference_clip(sign)
+    if clip_frame is not None:
+        return clip_frame
+
+    # No clip yet, so draw the stored landmarks on decoded video frames
+    frames = decode_reference_frames(reference_video_path(sign), indices)
+    blank = np.zeros((COMPARISON_SIZE[1], COMPARISON_SIZE[0], 3), dtype=np.uint8)
+    return lambda index: draw_hand_landmarks(
+        frames.get(index, blank), reference_points[index], reference_mask[index]
+    )
+
+
+def _alignment(attempt, reference_length: int, learner_length: int) -> List:
+    """Get [reference frame, score] per learner frame, spread evenly if unknown."""
+    if len(attempt.alignment) == learner_length:
+        return attempt.alignment
+
+    # The comparison was abandoned, so just play both from start to end
+    indices = np.linspace(0, reference_length - 1, learner_length).round()
+    return [[int(index), None] for index in indices]
+
+
+def _keyframe_lookup(attempt) -> List[tuple]:
+    """Decode the attempt's keyframes as (learner frame index, RGB frame)."""
+    keyframes = []
+    for keyframe in attempt.keyframes:
+        frames = list(iter_base64_frames([keyframe["image"]]))
+        if frames:
+            keyframes.append((keyframe["frame"], frames[0]))
+    return keyframes
+
+
+def render_comparison_frames(attempt) -> List[np.ndarray]:
+    """
+    Render side-by-side frames of an attempt and the reference it matched.
+
+    Args:
+        attempt: SignAttempt with stored landmarks
+
+    Returns:
+        List[np.ndarray]: One RGB comparison frame per learner frame
+    """
+    reference = load_landmarks_from_model(attempt.sign)
+    learner = load_landmarks_from_model(attempt)
+    if reference is None or learner is None:
+        return []
+
+    reference_points, reference_mask = reference
+    learner_points, learner_mask = learner
+    alignment = _alignment(attempt, len(reference_points), len(learner_points))
+
+    reference_frame = _reference_frame_source(
+        attempt.sign,
+        reference_points,
+        reference_mask,
+        [reference_index for reference_index, _ in alignment],
+    )
+    keyframes = _keyframe_lookup(attempt)
+    blank = np.zeros((COMPARISON_SIZE[1], COMPARISON_SIZE[0], 3), dtype=np.uint8)
+
+    comparison_frames = []
+    for learner_index, (reference_index, score) in enumerate(alignment):
+        template_frame = reference_frame(reference_index)
+
+        # Show the learner's hands over the closest keyframe
+        backdrop = blank
+        if keyframes:
+            _, backdrop = min(keyframes, key=lambda k: abs(k[0] - learner_index))
+        learner_frame = draw_hand_landmarks(
+            backdrop, learner_points[learner_index], learner_mask[learner_index]
+        )
+
+        caption = f"Frame: {learner_index + 1}/{len(alignment)}"
+        if score is not None:
+            caption += f"  Match: {score:.0f}%"
+        comparison_frames.append(
+            compose_comparison_frame(
+                template_frame, learner_frame, caption, size=COMPARISON_SIZE
+            )
+        )
+
+    return comparison_frames
+
+
+def get_comparison_frames(attempt) -> List[str]:
+    """
+    Get the comparison frames of an attempt, rendering them the first time.
+
+    Args:
+        attempt: SignAttempt model instance
+
+    Returns:
+        List[str]: JPEG data URLs of the comparison frames
+    """
+    if attempt.visualization:
+        try:
+            with attempt.visualization.open("rb") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Rendering visualization of {attempt.id} again: {e}")
+
+    frames = convert_frames_to_base64(render_comparison_frames(attempt))
+    if frames:
+        attempt.visualization.save(
+            f"{attempt.id}.json", ContentFile(json.dumps(frames)), save=False
+        )
+        attempt.save(update_fields=["visualization"])
+    return frames
@@ -0,0 +1,79 @@
+"""
+Landmark extraction for batch processing of sign videos in worker processes.
+
+This module must stay importable without Django's app registry being ready:
+worker processes are spawned fresh and import it before doing anything else.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+
+from .frame_source import video_fps
+from .reference_clip import build_reference_clip
+from .sign_comparer import SignComparer, landmarks_to_array
+from .sign_visualizer import draw_hand_landmarks
+from .utils import process_video_to_landmarks
+
+logger = logging.getLogger(__name__)
+
+# MediaPipe graph of the current worker process, built once per worker
+_worker_comparer = None
+
+
+def init_worker():
+    """Set up Django and create the SignComparer used by this worker process."""
+    import django
+
+    global _worker_comparer
+    django.setup()
+    _worker_comparer = SignComparer()
+
+
+def extract_video_landmarks(sign_name, video_path, sign_comparer=None):
+    """
+    Extract landmarks from one video, by default in a worker process.
+
+    The annotated reference clip and first frame are drawn from the tracked
+    landmarks right away, so only compact results are sent back to the main
+    process and nothing needs tracking again.
+
+    Args:
+        sign_name: Name of the sign shown in the video
+        video_path: Path to the local video file
+        sign_comparer: SignComparer to use instead of the worker's own
+
+    Returns:
+        dict: Landmarks as a (points, mask) pair, annotated first frame,
+            reference clip as a (JPEG sprite, layout) pair, video frame rate,
+            frame count and processing time; landmarks are None if the video
+            had no frames
+    """
+    start = time.monotonic()
+    fps = video_fps(video_path)
+    clip_fps = settings.SIGNING["REFERENCE_CLIP_FPS"]
+    landmarks, first_frame, clip_frames = process_video_to_landmarks(
+        video_path,
+        sign_comparer or _worker_comparer,
+        clip_fps=clip_fps,
+        clip_size=settings.SIGNING["REFERENCE_CLIP_SIZE"],
+    )
+
+    points, mask = landmarks_to_array(landmarks) if landmarks else (None, None)
+    clip = None
+    if points is not None:
+        first_frame = draw_hand_landmarks(first_frame, points[0], mask[0])
+        clip = build_reference_clip(
+            clip_frames, points, mask, fps=min(fps, clip_fps) if fps else None
+        )
+
+    return {
+        "sign_name": sign_name,
+        "landmarks": (points, mask) if points is not None else None,
+        "first_frame": first_frame,
+        "clip": clip,
+        "fps": fps,
+        "frame_count": len(landmarks),
+        "seconds": time.monotonic() - start,
+    }
@@ -0,0 +1,279 @@
+"""
+Dynamic Time Warping over whole landmark sequences with numpy.
+"""
+
+import math
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from scipy.ndimage import maximum_filter1d, minimum_filter1d
+from scipy.spatial.distance import cdist
+
+
+def pairwise_distances(template_seq: np.ndarray, learner_seq: np.ndarray) -> np.ndarray:
+    """
+    Compute Euclidean distances between every template and learner frame.
+
+    Args:
+        template_seq: Template feature vectors, shape (n, features)
+        learner_seq: Learner feature vectors, shape (m, features)
+
+    Returns:
+        np.ndarray: float64 distance matrix of shape (n, m)
+    """
+    return cdist(
+        np.asarray(template_seq, dtype=np.float64),
+        np.asarray(learner_seq, dtype=np.float64),
+    )
+
+
+def band_limits(n: int, m: int, window: Optional[int]) -> Tuple[np.ndarray, ...]:
+    """
+    Get the first and last column of a Sakoe-Chiba band for every row.
+
+    The band follows the diagonal from (0, 0) to (n - 1, m - 1), so sequences
+    of different lengths are still aligned end to end. It is widened to the
+    slope of that diagonal so neighbouring rows always overlap.
+
+    Args:
+        n: Number of rows (template frames)
+        m: Number of columns (learner frames)
+        window: Band radius in frames, or None for no band
+
+    Returns:
+        tuple: Arrays of first and last (inclusive) column per row
+    """
+    if window is None or n == 1:
+        return np.zeros(n, dtype=np.int64), np.full(n, m - 1, dtype=np.int64)
+
+    slope = (m - 1) / (n - 1)
+    radius = max(window, math.ceil(slope))
+    centers = np.arange(n) * slope
+    lo = np.clip(np.floor(centers - radius), 0, m - 1).astype(np.int64)
+    hi = np.clip(np.ceil(centers + radius), 0, m - 1).astype(np.int64)
+    return lo, hi
+
+
+def accumulate_costs(
+    costs: np.ndarray,
+    window: Optional[int] = None,
+    max_distance: Optional[float] = None,
+) -> Optional[np.ndarray]:
+    """
+    Fill the DTW cumulative cost matrix one row at a time.
+
+    Within a row, D[i, j] = c[i, j] + min(D[i-1, j-1], D[i-1, j], D[i, j-1]).
+    The horizontal dependency is resolved without a Python loop: with C the
+    running sum of the row's costs and t[j] = c[i, j] + min(D[i-1, j-1],
+    D[i-1, j]), D[i, j] = C[j] + min(t[k] - C[k] for k <= j).
+
+    Args:
+        costs: Pairwise distance matrix of shape (n, m)
+        window: Sakoe-Chiba band radius in frames, or None for no band
+        max_distance: Give up once every alignment costs more than this
+
+    Returns:
+        Optional[np.ndarray]: Cumulative costs (inf outside the band), or None
+            if the alignment was abandoned
+    """
+    n, m = costs.shape
+    lo, hi = band_limits(n, m, window)
+    cumulative = np.full((n, m), np.inf)
+
+    for i in range(n):
+        start, stop = lo[i], hi[i] + 1
+        row_costs = costs[i, start:stop]
+
+        if i == 0:
+            cumulative[0, start:stop] = np.cumsum(row_costs)
+        else:
+            previous = cumulative[i - 1]
+            diagonal = np.full(stop - start, np.inf)
+            if start > 0:
+                diagonal[:] = previous[start - 1 : stop - 1]
+            else:
+                diagonal[1:] = previous[: stop - 1]
+            best_above = np.minimum(diagonal, previous[start:stop])
+
+            running = np.cumsum(row_costs)
+            cumulative[i, start:stop] = running + np.minimum.accumulate(
+                row_costs + best_above - running
+            )
+
+        # Every path crosses each row, so none can end below the row minimum
+        if max_distance is not None and cumulative[i, start:stop].min() > max_distance:
+            return None
+
+    return cumulative
+
+
+def warping_path(cumulative: np.ndarray) -> list:
+    """
+    Trace the cheapest warping path back from the end of both sequences.
+
+    Returns:
+        list: (template_idx, learner_idx) pairs from (0, 0) to (n - 1, m - 1)
+    """
+    i, j = cumulative.shape[0] - 1, cumulative.shape[1] - 1
+    path = [(i, j)]
+
+    while i > 0 or j > 0:
+        if i == 0:
+            j -= 1
+        elif j == 0:
+            i -= 1
+        else:
+            # Prefer the diagonal step on ties
+            steps = (
+                (cumulative[i - 1, j - 1], i - 1, j - 1),
+                (cumulative[i - 1, j], i - 1, j),
+                (cumulative[i, j - 1], i, j - 1),
+            )
+            _, i, j = min(steps, key=lambda step: step[0])
+        path.append((i, j))
+
+    path.reverse()
+    return path
+
+
+def dtw(
+    template_seq: np.ndarray,
+    learner_seq: np.ndarray,
+    window: Optional[int] = None,
+    max_distance: Optional[float] = None,
+) -> Optional[Dict]:
+    """
+    Align two feature sequences with Dynamic Time Warping.
+
+    Distances between all frame pairs are computed in one call, and the
+    distances along the path are returned so callers need not recompute them.
+
+    Args:
+        template_seq: Template feature vectors, shape (n, features)
+        learner_seq: Learner feature vectors, shape (m, features)
+        window: Sakoe-Chiba band radius in frames, or None for exact DTW
+        max_distance: Abandon the alignment once it must cost more than this
+
+    Returns:
+        Optional[Dict]: Total ``distance``, the ``path`` as (template_idx,
+            learner_idx) pairs, and ``path_distances`` per step; None if the
+            alignment was abandoned
+    """
+    costs = pairwise_distances(template_seq, learner_seq)
+    cumulative = accumulate_costs(costs, window=window, max_distance=max_distance)
+    if cumulative is None:
+        return None
+
+    path = warping_path(cumulative)
+    template_idx, learner_idx = np.asarray(path).T
+
+    return {
+        "distance": float(cumulative[-1, -1]),
+        "path": path,
+        "path_distances": costs[template_idx, learner_idx],
+    }
+
+
+def keogh_envelope(
+    sequence: np.ndarray, radius: Optional[int]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Get the upper and lower LB_Keogh envelope of a sequence.
+
+    Args:
+        sequence: Feature vectors, shape (n, features)
+        radius: Warping band radius in frames, or None for no band
+
+    Returns:
+        tuple: Per-frame feature maxima and minima within the band, each of
+            shape (n, features)
+    """
+    sequence = np.asarray(sequence, dtype=np.float32)
+    if radius is None:
+        upper = np.broadcast_to(sequence.max(axis=0), sequence.shape)
+        lower = np.broadcast_to(sequence.min(axis=0), sequence.shape)
+        return upper.copy(), lower.copy()
+
+    size = 2 * radius + 1
+    return (
+        maximum_filter1d(sequence, size, axis=0, mode="nearest"),
+        minimum_filter1d(sequence, size, axis=0, mode="nearest"),
+    )
+
+
+def lb_keogh(query: np.ndarray, upper: np.ndarray, lower: np.ndarray) -> np.ndarray:
+    """
+    Lower-bound the DTW distance of a query to one or more enveloped sequences.
+
+    Every query frame is aligned with at least one frame within the band, so
+    its distance to the envelope of that band can only be smaller. The bound
+    holds for sequences of the query's length compared with that band radius.
+
+    Args:
+        query: Feature vectors, shape (n, features)
+        upper: Upper envelopes, shape (n, features) or (sequences, n, features)
+        lower: Lower envelopes of the same shape as ``upper``
+
+    Returns:
+        np.ndarray: Lower bound per enveloped sequence (a scalar array for a
+            single envelope)
+    """
+    query = np.asarray(query, dtype=np.float32)
+    excess = np.maximum(query - upper, 0) + np.maximum(lower - query, 0)
+    return np.sqrt((excess.astype(np.float64) ** 2).sum(axis=-1)).sum(axis=-1)
+
+
+class OnlineDTW:
+    """
+    Open-ended DTW of a template against a sequence that arrives frame by frame.
+
+    Each new frame adds one column of cumulative costs, computed from the
+    previous column alone with the same running-minimum trick as
+    accumulate_costs. The end of the alignment is left open, so the cheapest
+    template frame for the latest frame tells how far along the template the
+    sequence has got.
+    """
+
+    def __init__(self, template_seq: np.ndarray):
+        """
+        Start aligning against a template.
+
+        Args:
+            template_seq: Template feature vectors, shape (n, features)
+        """
+        self.template_seq = np.asarray(template_seq, dtype=np.float64)
+        self.column: Optional[np.ndarray] = None
+        self.length = 0
+
+    def update(self, frame: np.ndarray) -> Tuple[int, float]:
+        """
+        Extend the alignment by one frame of the sequence.
+
+        Args:
+            frame: Feature vector of the new frame, shape (features,)
+
+        Returns:
+            tuple: Template frame the sequence is most likely at, and the
+                average cost per step of the best path ending there
+        """
+        costs = pairwise_distances(self.template_seq, np.asarray(frame)[None])[:, 0]
+        running = np.cumsum(costs)
+
+        if self.column is None:
+            column = running
+        else:
+            # D[i, j] = c[i, j] + min(D[i-1, j-1], D[i, j-1], D[i-1, j])
+            diagonal = np.concatenate(([np.inf], self.column[:-1]))
+            best_left = np.minimum(diagonal, self.column)
+            column = running + np.minimum.accumulate(costs + best_left - running)
+
+        self.column = column
+        self.length += 1
+
+        # Paths to later template frames take more steps, so compare costs per
+        # step to not favour staying near the start. A path to template frame i
+        # takes at least max(i + 1, length) steps, the diagonal ones exactly
+        steps = np.maximum(np.arange(1, len(column) + 1), self.length)
+        per_step = column / steps
+        position = int(np.argmin(per_step))
+        return position, float(per_step[position])
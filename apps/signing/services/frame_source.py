@@ -0,0 +1,276 @@
+"""
+Frame sources that decode sign videos one frame at a time.
+
+Every source is a generator of RGB uint8 frames, so callers can track or
+annotate a clip of any length while holding only the current frame.
+"""
+
+import base64
+import io
+import logging
+from typing import Iterable, Iterator, Optional, Sequence, Tuple
+
+import cv2
+import imageio
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# GIFs are saved by this app at 0.1s per frame, see SignComparer.save_frames_as_gif
+GIF_FPS = 10
+
+# Decoder flags that shrink an image by a power of two while decoding it
+REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+def _decode_flag(image_bytes, max_size: Optional[int]) -> int:
+    """Pick the strongest decode-time reduction that keeps the image >= max_size."""
+    if not max_size:
+        return cv2.IMREAD_COLOR
+
+    try:
+        # Only the header is read to get the size
+        longest = max(Image.open(io.BytesIO(image_bytes)).size)
+    except Exception:
+        return cv2.IMREAD_COLOR
+
+    for factor, flag in REDUCED_DECODE_FLAGS:
+        if longest // factor >= max_size:
+            return flag
+    return cv2.IMREAD_COLOR
+
+
+def decode_image(image_bytes, max_size: Optional[int] = None) -> Optional[np.ndarray]:
+    """
+    Decode an encoded image (e.g. a JPEG webcam frame) to an RGB frame.
+
+    Large images are shrunk by the decoder itself where possible (JPEG can
+    skip detail while decoding), then downscaled the rest of the way.
+
+    Args:
+        image_bytes: Encoded image
+        max_size: Longest side in pixels of the decoded frame
+
+    Returns:
+        np.ndarray: RGB frame, or None if the data is not a valid image
+    """
+    frame = cv2.imdecode(
+        np.frombuffer(image_bytes, dtype=np.uint8), _decode_flag(image_bytes, max_size)
+    )
+    if frame is None:
+        return None
+
+    # Convert BGR to RGB
+    return downscale(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), max_size)
+
+
+def downscale(frame: np.ndarray, max_size: Optional[int]) -> np.ndarray:
+    """
+    Shrink a frame so its longest side is at most ``max_size`` pixels.
+
+    Frames that are already small enough are returned unchanged.
+    """
+    if not max_size:
+        return frame
+
+    height, width = frame.shape[:2]
+    longest = max(height, width)
+    if longest <= max_size:
+        return frame
+
+    scale = max_size / longest
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+
+def select_frames(
+    frames: Sequence,
+    source_fps: Optional[float],
+    target_fps: Optional[float],
+    max_frames: Optional[int] = None,
+) -> Tuple[list, Optional[float]]:
+    """
+    Pick the frames of a clip to analyze, before any of them is decoded.
+
+    The clip is subsampled to ``target_fps``; if it still has more than
+    ``max_frames`` frames, that many are picked evenly across it.
+
+    Args:
+        frames: Frames of the clip, in any (e.g. still encoded) form
+        source_fps: Capture rate of the clip
+        target_fps: Rate to subsample to
+        max_frames: Most frames to keep
+
+    Returns:
+        tuple: Selected frames and their effective frame rate (None if the
+            capture rate is unknown)
+    """
+    selected = list(subsample(frames, source_fps, target_fps))
+    if max_frames and len(selected) > max_frames:
+        indices = np.linspace(0, len(selected) - 1, max_frames).round().astype(int)
+        selected = [selected[i] for i in indices]
+
+    if not source_fps or not frames:
+        return selected, None
+    return selected, source_fps * len(selected) / len(frames)
+
+
+def video_fps(video_path: str) -> Optional[float]:
+    """Get the frame rate of a video file, or None if it is unknown."""
+    video = cv2.VideoCapture(video_path)
+    try:
+        fps = video.get(cv2.CAP_PROP_FPS) if video.isOpened() else 0
+    finally:
+        video.release()
+    return fps or None
+
+
+def subsample(
+    frames: Iterable[np.ndarray],
+    source_fps: Optional[float],
+    target_fps: Optional[float],
+) -> Iterator[np.ndarray]:
+    """
+    Drop frames so a clip plays at roughly ``target_fps``.
+
+    Frames are kept on an even time grid, always starting with the first one.
+    Nothing is dropped if either rate is unknown or the clip is not faster
+    than the target.
+    """
+    if not source_fps or not target_fps or target_fps >= source_fps:
+        yield from frames
+        return
+
+    step = source_fps / target_fps
+    next_index = 0.0
+    for index, frame in enumerate(frames):
+        if index >= next_index:
+            next_index += step
+            yield frame
+
+
+def _prepare(
+    frames: Iterable[np.ndarray],
+    source_fps: Optional[float],
+    target_fps: Optional[float],
+    max_size: Optional[int],
+) -> Iterator[np.ndarray]:
+    """Subsample, then downscale only the frames that are kept."""
+    for frame in subsample(frames, source_fps, target_fps):
+        yield downscale(frame, max_size)
+
+
+def iter_video_frames(
+    video_path: str,
+    target_fps: Optional[float] = None,
+    max_size: Optional[int] = None,
+) -> Iterator[np.ndarray]:
+    """
+    Decode a video file (e.g. mp4) frame by frame.
+
+    Args:
+        video_path: Path to the video file
+        target_fps: Drop frames to roughly this rate, if the video is faster
+        max_size: Downscale frames so their longest side fits this many pixels
+
+    Yields:
+        np.ndarray: RGB frames
+    """
+    video = cv2.VideoCapture(video_path)
+
+    if not video.isOpened():
+        logger.error(f"Error opening video file: {video_path}")
+        return
+
+    def read_frames():
+        while True:
+            success, frame = video.read()
+            if not success:
+                return
+            # Convert BGR to RGB
+            yield cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+    try:
+        source_fps = video.get(cv2.CAP_PROP_FPS)
+        yield from _prepare(read_frames(), source_fps, target_fps, max_size)
+    finally:
+        video.release()
+
+
+def iter_gif_frames(
+    gif_path: str,
+    target_fps: Optional[float] = None,
+    max_size: Optional[int] = None,
+    source_fps: float = GIF_FPS,
+) -> Iterator[np.ndarray]:
+    """
+    Decode a GIF frame by frame.
+
+    Args:
+        gif_path: Path to the GIF
+        target_fps: Drop frames to roughly this rate, if the GIF is faster
+        max_size: Downscale frames so their longest side fits this many pixels
+        source_fps: Frame rate of the GIF
+
+    Yields:
+        np.ndarray: RGB frames
+    """
+    try:
+        reader = imageio.get_reader(gif_path)
+    except Exception as e:
+        logger.error(f"Error processing GIF: {e}")
+        return
+
+    def read_frames():
+        for frame in reader:
+            # Convert RGBA to RGB if needed
+            if frame.shape[2] == 4:
+                frame = frame[:, :, :3]
+            yield np.asarray(frame)
+
+    try:
+        yield from _prepare(read_frames(), source_fps, target_fps, max_size)
+    finally:
+        reader.close()
+
+
+def iter_base64_frames(
+    base64_frames: Iterable[str],
+    target_fps: Optional[float] = None,
+    max_size: Optional[int] = None,
+    source_fps: Optional[float] = None,
+) -> Iterator[np.ndarray]:
+    """
+    Decode base64 encoded images (optionally data URLs) frame by frame.
+
+    Frames that cannot be decoded are logged and skipped. Frames dropped by
+    subsampling are never decoded.
+
+    Args:
+        base64_frames: Base64 encoded images
+        target_fps: Drop frames to roughly this rate, if the capture is faster
+        max_size: Downscale frames so their longest side fits this many pixels
+        source_fps: Capture rate of the frames
+
+    Yields:
+        np.ndarray: RGB frames
+    """
+    for base64_str in subsample(base64_frames, source_fps, target_fps):
+        try:
+            # Decode base64 string to image
+            image_data = base64.b64decode(
+                base64_str.split(",")[1] if "," in base64_str else base64_str
+            )
+            frame = decode_image(image_data, max_size=max_size)
+            if frame is None:
+                raise ValueError("not a valid image")
+        except Exception as e:
+            logger.error(f"Error decoding base64 frame: {e}")
+            continue
+
+        yield frame
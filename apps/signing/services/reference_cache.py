@@ -0,0 +1,181 @@
+"""
+Per-process cache of reference sign sequences, ready for comparison.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .sign_comparer import resample_sequence
+from .utils import load_landmarks_from_model
+
+logger = logging.getLogger(__name__)
+
+
+def resampled_fps(sign_reference, fps: Optional[float]) -> Optional[int]:
+    """
+    Get the frame rate a reference sequence is resampled to for an attempt.
+
+    The rate is rounded so attempts of similar length share a cache entry.
+
+    Returns:
+        Optional[int]: Whole frames per second, or None if the reference is
+            used as recorded (either rate unknown)
+    """
+    return round(fps) if fps and sign_reference.landmark_fps else None
+
+
+class ReferenceSequenceCache:
+    """
+    Bounded LRU cache of normalized reference sequences.
+
+    Entries are keyed by sign id, ``updated_at`` and the frame rate they were
+    resampled to. A sign saved by any process gets a new key everywhere; saves
+    in this process also drop the old entries right away. The cache is bounded
+    both by entry count and by the total size of the cached arrays.
+    """
+
+    def __init__(self, max_size: int = 128, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of cached signs (0 disables caching)
+            max_bytes: Maximum total size of the cached arrays
+        """
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        sign_reference,
+        prepare: Callable[[Any], np.ndarray],
+        fps: Optional[float] = None,
+    ) -> Optional[np.ndarray]:
+        """
+        Get the comparison sequence of a reference sign, preparing it on a miss.
+
+        Only ``pk``, ``updated_at``, ``landmark_fps`` and ``landmark_format``
+        are read on a hit, so callers can defer loading the landmark data until
+        it is needed.
+
+        Args:
+            sign_reference: SignReference model instance
+            prepare: Builds the sequence from loaded landmarks, e.g.
+                SignComparer.prepare_sequence
+            fps: Resample the sequence to this frame rate (whole frames per
+                second), if the sign's own rate is known
+
+        Returns:
+            Optional[np.ndarray]: Read-only sequence, or None if the sign has
+                no landmarks or they are in an outdated format
+        """
+        if sign_reference.landmarks_outdated:
+            logger.warning(
+                f"Landmarks of sign {sign_reference.pk} are in an outdated format, "
+                "process its video again"
+            )
+            return None
+
+        fps = resampled_fps(sign_reference, fps)
+        key = (sign_reference.pk, sign_reference.updated_at, fps)
+        with self._lock:
+            sequence = self._entries.get(key)
+            if sequence is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return sequence
+            self.misses += 1
+
+        landmarks = load_landmarks_from_model(sign_reference)
+        if landmarks is None:
+            return None
+
+        sequence = resample_sequence(
+            prepare(landmarks), sign_reference.landmark_fps, fps
+        )
+        sequence = np.ascontiguousarray(sequence)
+        # Shared between requests, so make sure nobody modifies it in place
+        sequence.flags.writeable = False
+        self._remember(key, sequence)
+        return sequence
+
+    def _remember(self, key, sequence: np.ndarray):
+        """Store an entry, evicting the least recently used ones over the limits."""
+        if self.max_size <= 0 or sequence.nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            # Entries of an older version of this sign are stale now
+            self._discard_older(key)
+            self._entries[key] = sequence
+            self._bytes += sequence.nbytes
+            while len(self._entries) > self.max_size or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def _discard_older(self, key):
+        """Drop entries of earlier versions of a sign; the lock must be held."""
+        sign_id, updated_at = key[:2]
+        for stale in [
+            k for k in self._entries if k[0] == sign_id and k[1] != updated_at
+        ]:
+            self._bytes -= self._entries.pop(stale).nbytes
+
+    def _discard(self, sign_id):
+        """Drop every entry of a sign; the lock must be held."""
+        for key in [key for key in self._entries if key[0] == sign_id]:
+            self._bytes -= self._entries.pop(key).nbytes
+
+    def invalidate(self, sign_id):
+        """Drop the cached sequence of a sign."""
+        with self._lock:
+            self._discard(sign_id)
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache usage counters.
+
+        Returns:
+            Dict[str, Any]: Size, capacity, memory use, hits and misses
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Create a singleton instance
+reference_sequences = ReferenceSequenceCache(
+    max_size=settings.SIGNING["REFERENCE_CACHE_SIZE"],
+    max_bytes=settings.SIGNING["REFERENCE_CACHE_BYTES"],
+)
+
+
+@receiver(post_save, sender="signing.SignReference")
+@receiver(post_delete, sender="signing.SignReference")
+def invalidate_reference_sequence(sender, instance, **kwargs):
+    """Drop the cached sequence of a sign when it is saved or deleted."""
+    reference_sequences.invalidate(instance.pk)
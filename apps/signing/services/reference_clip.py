@@ -0,0 +1,98 @@
+"""
+Annotated reference clips, stored as a JPEG sprite sheet per sign.
+
+The clip is drawn once from the landmarks tracked by process_sign_videos, so
+showing a reference with its hand landmarks never runs hand detection again.
+Like batch, this module must stay importable without the app registry.
+"""
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .sign_visualizer import draw_hand_landmarks
+
+# Frames per row of a sprite sheet
+SPRITE_COLUMNS = 8
+
+
+def build_reference_clip(
+    clip_frames: List[Tuple[int, np.ndarray]],
+    points: np.ndarray,
+    mask: np.ndarray,
+    fps: Optional[float] = None,
+) -> Optional[Tuple[bytes, Dict]]:
+    """
+    Draw landmarks on sampled reference frames and tile them into a sprite.
+
+    Args:
+        clip_frames: (video frame index, RGB frame) pairs of equal size
+        points: Landmarks of every video frame, shape (frames, hands, 21, 3)
+        mask: Hand presence of every video frame, shape (frames, hands)
+        fps: Frame rate of the sampled frames, if known
+
+    Returns:
+        Optional[Tuple[bytes, Dict]]: JPEG sprite sheet and its layout, or
+            None if there are no frames
+    """
+    if not clip_frames:
+        return None
+
+    indices = [index for index, _ in clip_frames]
+    frames = [
+        draw_hand_landmarks(frame, points[index], mask[index])
+        for index, frame in clip_frames
+    ]
+
+    height, width = frames[0].shape[:2]
+    columns = min(SPRITE_COLUMNS, len(frames))
+    rows = math.ceil(len(frames) / columns)
+    sheet = np.zeros((rows * height, columns * width, 3), dtype=np.uint8)
+    for position, frame in enumerate(frames):
+        row, column = divmod(position, columns)
+        sheet[
+            row * height : (row + 1) * height, column * width : (column + 1) * width
+        ] = frame
+
+    _, jpeg = cv2.imencode(".jpg", cv2.cvtColor(sheet, cv2.COLOR_RGB2BGR))
+    layout = {
+        "frame_width": width,
+        "frame_height": height,
+        "columns": columns,
+        "fps": fps,
+        # Video frame (and landmark) index shown in each sprite frame
+        "source_frames": indices,
+    }
+    return jpeg.tobytes(), layout
+
+
+def split_reference_clip(image_bytes: bytes, layout: Dict) -> List[np.ndarray]:
+    """
+    Cut a sprite sheet back into its RGB frames.
+
+    Returns:
+        List[np.ndarray]: Frames in clip order, empty if the sheet is invalid
+    """
+    sheet = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if sheet is None:
+        return []
+    sheet = cv2.cvtColor(sheet, cv2.COLOR_BGR2RGB)
+
+    width, height = layout["frame_width"], layout["frame_height"]
+    frames = []
+    for position in range(len(layout["source_frames"])):
+        row, column = divmod(position, layout["columns"])
+        frames.append(
+            sheet[
+                row * height : (row + 1) * height, column * width : (column + 1) * width
+            ]
+        )
+    return frames
+
+
+def nearest_clip_frame(layout: Dict, source_frame: int) -> int:
+    """Get the position in the clip of the frame closest to a video frame."""
+    source_frames = np.asarray(layout["source_frames"])
+    return int(np.abs(source_frames - source_frame).argmin())
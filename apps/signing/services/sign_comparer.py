@@ -3,200 +3,496 @@ Service for comparing sign language gestures using MediaPipe Hands.
 Adapted from the standalone implementation in signing-app/main.py.
 """
 
-import base64
 import logging
 import tempfile
+from contextlib import contextmanager
 
-import cv2
 import imageio
 import mediapipe as mp
 import numpy as np
-from fastdtw import fastdtw
-from scipy.spatial.distance import euclidean
+from django.conf import settings
+
+from apps.core.pool import InstancePool
+
+from .dtw import dtw
+from .frame_source import (
+    decode_image,
+    iter_base64_frames,
+    iter_gif_frames,
+    iter_video_frames,
+)
 
 logger = logging.getLogger(__name__)
 
+# Landmark arrays have shape (frames, NUM_HANDS, NUM_LANDMARKS, 3)
+NUM_HANDS = 2
+NUM_LANDMARKS = 21
+
+# Hand slot order, by MediaPipe's handedness label. References and attempts
+# are both unmirrored camera images, so the labels agree between them
+HAND_LABELS = ("Right", "Left")
+
+# Comparison sequences hold both hands' normalized landmarks and a presence
+# flag per hand
+NUM_FEATURES = NUM_HANDS * (NUM_LANDMARKS * 3 + 1)
+
+# Score points lost per unit of DTW step distance of one hand
+SCORE_PER_DISTANCE = 10
+
+
+def order_hands(hands):
+    """
+    Put the hands detected in a frame into fixed slots by handedness.
+
+    Args:
+        hands: (points, label, score) per detected hand, with MediaPipe's
+            handedness label and its confidence
+
+    Returns:
+        list: Points per slot in HAND_LABELS order, an empty list for a
+            missing hand before a present one; trailing missing hands are
+            left out, so a frame without hands is an empty list
+    """
+    slots = [None] * NUM_HANDS
+
+    # The most confident hands claim their slot first
+    for points, label, _ in sorted(hands, key=lambda hand: -hand[2])[:NUM_HANDS]:
+        slot = HAND_LABELS.index(label) if label in HAND_LABELS else 0
+        if slots[slot] is not None:
+            # Both hands got the same label, so this one is the other hand
+            slot = slots.index(None)
+        slots[slot] = points
+
+    while slots and slots[-1] is None:
+        slots.pop()
+    return [[] if points is None else points for points in slots]
+
+
+def landmarks_to_array(landmarks):
+    """
+    Convert per-frame landmark lists to a dense array and hand presence mask.
+
+    Args:
+        landmarks: Landmarks per frame, each a list of hand slots (see
+            order_hands) of [x, y, z] points, or an already converted
+            (points, mask) pair
+
+    Returns:
+        tuple: float32 points of shape (frames, NUM_HANDS, NUM_LANDMARKS, 3)
+            with zeros for absent hands, and a bool mask of shape
+            (frames, NUM_HANDS) that is True where a hand was detected
+    """
+    if isinstance(landmarks, tuple):
+        return landmarks
+
+    landmarks = landmarks or []
+    points = np.zeros((len(landmarks), NUM_HANDS, NUM_LANDMARKS, 3), dtype=np.float32)
+    mask = np.zeros((len(landmarks), NUM_HANDS), dtype=bool)
+
+    for i, frame_landmarks in enumerate(landmarks):
+        for slot, hand in enumerate(frame_landmarks[:NUM_HANDS]):
+            if hand:
+                points[i, slot] = hand
+                mask[i, slot] = True
+
+    return points, mask
+
+
+def array_to_landmarks(points, mask):
+    """
+    Convert a landmark array and presence mask back to per-frame lists.
+
+    Returns:
+        list: Landmarks per frame, each a list of hand slots of [x, y, z]
+            points as order_hands returns them
+    """
+    landmarks = []
+    for frame_points, frame_mask in zip(points, mask, strict=True):
+        hands = [
+            hand.tolist() if present else []
+            for hand, present in zip(frame_points, frame_mask, strict=True)
+        ]
+        while hands and not hands[-1]:
+            hands.pop()
+        landmarks.append(hands)
+    return landmarks
+
+
+def fill_hand_gaps(normalized, mask):
+    """
+    Fill in hands over the frames they were not detected in.
+
+    Each hand is linearly interpolated across gaps between two detections;
+    before its first and after its last detection it stays absent. Frames
+    that still have no hand at all repeat the nearest frame with one, so
+    frames before the hands enter the view are not compared as zeros.
+
+    Args:
+        normalized: Normalized landmarks of shape (frames, hands, 21, 3)
+        mask: Hand presence mask of shape (frames, hands)
+
+    Returns:
+        tuple: Filled landmarks and presence mask of the same shapes
+    """
+    filled = normalized.copy()
+    present = mask.copy()
+    frames = np.arange(len(mask))
+
+    for slot in range(mask.shape[1]):
+        detected = np.flatnonzero(mask[:, slot])
+        if len(detected) < 2:
+            continue
+        gaps = frames[detected[0] : detected[-1]][
+            ~mask[detected[0] : detected[-1], slot]
+        ]
+        if not len(gaps):
+            continue
+
+        after = detected[np.searchsorted(detected, gaps)]
+        before = detected[np.searchsorted(detected, gaps) - 1]
+        weight = ((gaps - before) / (after - before))[:, None, None]
+        filled[gaps, slot] = (
+            normalized[before, slot] * (1 - weight) + normalized[after, slot] * weight
+        )
+        present[gaps, slot] = True
+
+    with_hands = np.flatnonzero(present.any(axis=1))
+    if 0 < len(with_hands) < len(frames):
+        after = np.minimum(np.searchsorted(with_hands, frames), len(with_hands) - 1)
+        before = np.maximum(after - 1, 0)
+        nearest = np.where(
+            np.abs(with_hands[before] - frames) <= np.abs(with_hands[after] - frames),
+            with_hands[before],
+            with_hands[after],
+        )
+        filled, present = filled[nearest], present[nearest]
+
+    return filled, present
+
+
+def resample_sequence(sequence, source_fps, target_fps):
+    """
+    Resample a comparison sequence to another frame rate.
+
+    Frames are linearly interpolated on the target time grid, so a reference
+    recorded at 30 fps can be compared with an attempt analyzed at 10 fps.
+
+    Args:
+        sequence: Comparison sequence of shape (frames, features)
+        source_fps: Frame rate the sequence was recorded at
+        target_fps: Frame rate to resample to
+
+    Returns:
+        np.ndarray: Resampled float32 sequence, or the input if either rate is
+            unknown or they already match
+    """
+    if not source_fps or not target_fps or len(sequence) < 2:
+        return sequence
+    if abs(source_fps - target_fps) < 1e-6:
+        return sequence
+
+    duration = (len(sequence) - 1) / source_fps
+    return stretch_sequence(sequence, max(2, round(duration * target_fps) + 1))
+
+
+def stretch_sequence(sequence, length):
+    """
+    Linearly interpolate a comparison sequence to a number of frames.
+
+    Args:
+        sequence: Comparison sequence of shape (frames, features)
+        length: Number of frames to stretch or squeeze it to
+
+    Returns:
+        np.ndarray: float32 sequence of shape (length, features)
+    """
+    positions = np.linspace(0, len(sequence) - 1, length)
+
+    lower = np.floor(positions).astype(int)
+    upper = np.minimum(lower + 1, len(sequence) - 1)
+    weight = (positions - lower)[:, None]
+    resampled = sequence[lower] * (1 - weight) + sequence[upper] * weight
+    return resampled.astype(np.float32)
+
+
+def per_hand_distances(template_seq, learner_seq, path, distances):
+    """
+    Scale DTW step distances to the distance of a single hand.
+
+    Each step is divided by the square root of the hands present in either of
+    its frames, giving the root mean square distance per hand. Scores then
+    mean the same for one- and two-handed signs, and a hand that is missing
+    from one frame counts against the hands that were expected.
+
+    Args:
+        template_seq: Template comparison sequence
+        learner_seq: Learner comparison sequence
+        path: (template_idx, learner_idx) pairs of the steps
+        distances: Distance of each step
+
+    Returns:
+        np.ndarray: Distance per hand of each step
+    """
+    template_idx, learner_idx = np.asarray(path).reshape(-1, 2).T
+    hands = np.maximum(
+        template_seq[template_idx, -NUM_HANDS:].sum(axis=1),
+        learner_seq[learner_idx, -NUM_HANDS:].sum(axis=1),
+    )
+    return np.asarray(distances) / np.sqrt(np.maximum(hands, 1))
+
 
 class SignComparer:
     """
     Service for comparing sign language gestures using MediaPipe Hands.
     """
 
-    def __init__(self):
-        """Initialize MediaPipe Hands and other components."""
+    def __init__(self, static_image_mode=False):
+        """
+        Initialize MediaPipe Hands and other components.
+
+        Args:
+            static_image_mode: Detect hands in every frame independently instead
+                of tracking them across the frames of a clip
+        """
         # Initialize MediaPipe Hands
         self.mp_hands = mp.solutions.hands
         self.mp_drawing = mp.solutions.drawing_utils
         self.mp_drawing_styles = mp.solutions.drawing_styles
+        self.static_image_mode = static_image_mode
         self.hands = self.mp_hands.Hands(
-            static_image_mode=False,
+            static_image_mode=static_image_mode,
             max_num_hands=2,
             min_detection_confidence=0.5,
             min_tracking_confidence=0.5,
         )
+        # Whether frames were processed since tracking state was last reset
+        self._tracking = False
 
-    def extract_landmarks_from_frames(self, frames):
-        """Extract hand landmarks from a sequence of frames."""
-        all_frame_landmarks = []
-
-        for frame in frames:
-            # Process with MediaPipe
-            results = self.hands.process(frame)
+    def reset(self):
+        """
+        Reset hand tracking state before processing an independent clip.
 
-            # Extract landmarks (if hands detected)
-            frame_landmarks = []
-            if results.multi_hand_landmarks:
-                for hand_landmarks in results.multi_hand_landmarks:
-                    # Get all landmarks as (x, y, z) coordinates
-                    hand_points = []
-                    for landmark in hand_landmarks.landmark:
-                        hand_points.append([landmark.x, landmark.y, landmark.z])
-                    frame_landmarks.append(hand_points)
+        In video mode MediaPipe tracks hands from frame to frame, so a new clip
+        must not start from where the previous one left off.
+        """
+        if self._tracking and not self.static_image_mode:
+            self.hands.reset()
+        self._tracking = False
 
-            all_frame_landmarks.append(frame_landmarks)
+    def close(self):
+        """Release the MediaPipe Hands graph."""
+        self.hands.close()
 
-        return all_frame_landmarks
-
-    def extract_landmarks_from_video(self, video_path):
-        """Extract hand landmarks from a video file."""
-        # Open the video file
-        video = cv2.VideoCapture(video_path)
-
-        if not video.isOpened():
-            logger.error(f"Error opening video file: {video_path}")
-            return []
-
-        frames = []
-        # Read frames
-        while True:
-            success, frame = video.read()
-            if not success:
-                break
-
-            # Convert BGR to RGB
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frames.append(frame_rgb)
-
-        video.release()
-
-        # Extract landmarks from frames
-        return self.extract_landmarks_from_frames(frames)
+    def extract_landmarks_from_frames(self, frames):
+        """
+        Extract hand landmarks from a sequence of frames forming one clip.
+
+        Args:
+            frames: Iterable of RGB frames, e.g. a generator from frame_source
+        """
+        # Each call is an independent clip, tracked from a clean state
+        self.reset()
+
+        return [self.track_frame(frame) for frame in frames]
+
+    def track_frame(self, frame):
+        """
+        Extract hand landmarks from the next frame of a clip or live stream.
+
+        Unlike extract_landmarks_from_frames, this continues tracking from the
+        previous frame; call reset() before starting an unrelated clip.
+
+        Args:
+            frame: RGB frame as a numpy array
+
+        Returns:
+            list: Landmarks per hand slot (see order_hands), each a list of
+                [x, y, z] points
+        """
+        self._tracking = True
+
+        # Process with MediaPipe
+        results = self.hands.process(frame)
+
+        # Extract landmarks (if hands detected)
+        hands = []
+        if results.multi_hand_landmarks:
+            for hand_landmarks, handedness in zip(
+                results.multi_hand_landmarks, results.multi_handedness, strict=True
+            ):
+                # Get all landmarks as (x, y, z) coordinates
+                hand_points = []
+                for landmark in hand_landmarks.landmark:
+                    hand_points.append([landmark.x, landmark.y, landmark.z])
+                classification = handedness.classification[0]
+                hands.append((hand_points, classification.label, classification.score))
+
+        # Keep each hand in the same slot from frame to frame
+        return order_hands(hands)
+
+    def decode_frame(self, image_bytes):
+        """
+        Decode an encoded image (e.g. a JPEG webcam frame) to an RGB frame.
+
+        Returns:
+            np.ndarray: RGB frame, or None if the data is not a valid image
+        """
+        return decode_image(image_bytes)
+
+    def extract_landmarks_from_video(self, video_path, target_fps=None, max_size=None):
+        """
+        Extract hand landmarks from a video file, decoding one frame at a time.
+
+        Args:
+            video_path: Path to the video file
+            target_fps: Drop frames to roughly this rate, if the video is faster
+            max_size: Downscale frames so their longest side fits this many pixels
+        """
+        return self.extract_landmarks_from_frames(
+            iter_video_frames(video_path, target_fps=target_fps, max_size=max_size)
+        )
 
-    def extract_landmarks_from_gif(self, gif_path):
+    def extract_landmarks_from_gif(self, gif_path, target_fps=None, max_size=None):
         """Extract hand landmarks from each frame of a GIF."""
-        try:
-            # Read GIF
-            gif = imageio.mimread(gif_path)
-
-            # Process each frame
-            frames = []
-            for frame in gif:
-                # Convert RGBA to RGB if needed
-                if frame.shape[2] == 4:
-                    frame = frame[:, :, :3]
-                frames.append(frame)
-
-            # Extract landmarks from frames
-            return self.extract_landmarks_from_frames(frames)
-        except Exception as e:
-            logger.error(f"Error processing GIF: {e}")
-            return []
-
-    def extract_landmarks_from_base64_frames(self, base64_frames):
-        """Extract hand landmarks from base64 encoded frames."""
-        frames = []
-
-        for base64_str in base64_frames:
-            try:
-                # Decode base64 string to image
-                image_data = base64.b64decode(
-                    base64_str.split(",")[1] if "," in base64_str else base64_str
-                )
-                image = np.frombuffer(image_data, dtype=np.uint8)
-                frame = cv2.imdecode(image, cv2.IMREAD_COLOR)
-
-                # Convert BGR to RGB
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                frames.append(frame_rgb)
-            except Exception as e:
-                logger.error(f"Error decoding base64 frame: {e}")
-
-        # Extract landmarks from frames
-        return self.extract_landmarks_from_frames(frames)
+        return self.extract_landmarks_from_frames(
+            iter_gif_frames(gif_path, target_fps=target_fps, max_size=max_size)
+        )
 
-    def normalize_landmarks(self, landmarks):
-        """Normalize landmarks to make them invariant to hand size and position."""
-        if not landmarks:
-            return []
+    def extract_landmarks_from_base64_frames(
+        self, base64_frames, target_fps=None, max_size=None, source_fps=None
+    ):
+        """Extract hand landmarks from base64 encoded frames."""
+        return self.extract_landmarks_from_frames(
+            iter_base64_frames(
+                base64_frames,
+                target_fps=target_fps,
+                max_size=max_size,
+                source_fps=source_fps,
+            )
+        )
 
-        normalized = []
-        for frame_landmarks in landmarks:
-            if not frame_landmarks:
-                normalized.append([])
-                continue
+    def normalize_landmarks(self, points, mask=None):
+        """
+        Normalize landmarks to make them invariant to hand size and position.
 
-            frame_normalized = []
-            for hand in frame_landmarks:
-                # Use wrist as origin
-                wrist = np.array(hand[0])
+        Every hand is translated so its wrist is the origin and scaled by the
+        distance from the wrist to the middle finger MCP, for all frames at once.
 
-                # Find the scale factor (distance from wrist to middle finger MCP)
-                scale = np.linalg.norm(np.array(hand[9]) - wrist)
-                if scale == 0:  # Avoid division by zero
-                    scale = 1
+        Args:
+            points: Landmark array of shape (frames, hands, 21, 3), or nested
+                landmark lists as returned by extract_landmarks_from_frames
+            mask: Hand presence mask of shape (frames, hands); required with arrays
 
-                # Normalize each point
-                normalized_hand = [(np.array(point) - wrist) / scale for point in hand]
-                frame_normalized.append(normalized_hand)
+        Returns:
+            np.ndarray: Normalized float32 landmarks, zero where no hand is present
+        """
+        if mask is None:
+            points, mask = landmarks_to_array(points)
 
-            normalized.append(frame_normalized)
+        wrist = points[:, :, :1, :]
+        scale = np.linalg.norm(points[:, :, 9, :] - points[:, :, 0, :], axis=-1)
+        # Avoid division by zero
+        scale[scale == 0] = 1
 
+        normalized = (points - wrist) / scale[:, :, None, None]
+        normalized[~mask] = 0
         return normalized
 
-    def create_sequence_for_comparison(self, normalized_landmarks):
-        """Create a sequence for DTW comparison from normalized landmarks."""
-        sequence = []
+    def create_sequence_for_comparison(self, normalized, mask):
+        """
+        Create a sequence for DTW comparison from normalized landmarks.
+
+        Args:
+            normalized: Normalized landmarks of shape (frames, hands, 21, 3)
+            mask: Hand presence mask of shape (frames, hands)
+
+        Both hands are kept in their handedness slots, with gaps filled by
+        fill_hand_gaps, followed by a presence flag per hand.
+
+        Returns:
+            np.ndarray: float32 sequence of shape (frames, NUM_FEATURES), with
+                zeros for hands absent at the start or end of the sign
+        """
+        filled, present = fill_hand_gaps(normalized, mask)
+        return np.concatenate(
+            [
+                filled.reshape(len(filled), NUM_HANDS * NUM_LANDMARKS * 3),
+                present,
+            ],
+            axis=1,
+        ).astype(np.float32)
+
+    def compare_signs(self, template_landmarks, learner_landmarks, max_distance=None):
+        """
+        Compare template sign landmarks with learner's attempt.
+
+        Args:
+            template_landmarks: Nested landmark lists or a (points, mask) pair
+            learner_landmarks: Nested landmark lists or a (points, mask) pair
+            max_distance: Stop aligning once the raw DTW distance must exceed
+                this, scoring the attempt 0
+
+        Returns:
+            dict: Similarity score, per-step frame scores and the DTW path
+        """
+        return self.compare_sequences(
+            self.prepare_sequence(template_landmarks),
+            self.prepare_sequence(learner_landmarks),
+            max_distance=max_distance,
+        )
 
-        for frame in normalized_landmarks:
-            if frame:  # If hands detected
-                # Just use first hand for simplicity
-                sequence.append(np.array(frame[0]).flatten())
-            else:
-                # If no hands detected, use zeros
-                sequence.append(np.zeros(21 * 3))  # 21 landmarks, 3 coordinates each
+    def prepare_sequence(self, landmarks):
+        """
+        Normalize landmarks and build their DTW comparison sequence.
 
-        return sequence
+        Args:
+            landmarks: Nested landmark lists or a (points, mask) pair
 
-    def compare_signs(self, template_landmarks, learner_landmarks):
-        """Compare template sign landmarks with learner's attempt."""
-        # Normalize landmarks
-        template_norm = self.normalize_landmarks(template_landmarks)
-        learner_norm = self.normalize_landmarks(learner_landmarks)
+        Returns:
+            np.ndarray: Comparison sequence of shape (frames, NUM_FEATURES)
+        """
+        points, mask = landmarks_to_array(landmarks)
+        return self.create_sequence_for_comparison(
+            self.normalize_landmarks(points, mask), mask
+        )
+
+    def compare_sequences(self, template_seq, learner_seq, max_distance=None):
+        """
+        Compare prepared template and learner sequences.
 
-        # Create sequences for comparison
-        template_seq = self.create_sequence_for_comparison(template_norm)
-        learner_seq = self.create_sequence_for_comparison(learner_norm)
+        Args:
+            template_seq: Template sequence from prepare_sequence
+            learner_seq: Learner sequence from prepare_sequence
+            max_distance: Stop aligning once the raw DTW distance must exceed
+                this, scoring the attempt 0
 
+        Returns:
+            dict: Similarity score, per-step frame scores and the DTW path
+        """
         # Check if we have valid sequences
-        if not template_seq or not learner_seq:
+        if not len(template_seq) or not len(learner_seq):
             return {"similarity_score": 0, "frame_scores": [], "dtw_path": []}
 
         # Calculate similarity using Dynamic Time Warping
-        distance, path = fastdtw(template_seq, learner_seq, dist=euclidean)
+        alignment = dtw(
+            template_seq,
+            learner_seq,
+            window=self.dtw_window(len(template_seq), len(learner_seq)),
+            max_distance=max_distance,
+        )
+        if alignment is None:
+            return {"similarity_score": 0, "frame_scores": [], "dtw_path": []}
+        path = alignment["path"]
+
+        distances = per_hand_distances(
+            template_seq, learner_seq, path, alignment["path_distances"]
+        )
 
         # Calculate overall similarity score (0-100)
-        # Note: 21 landmarks with 3 coordinates each would be the maximum possible distance
-        # if all landmarks are completely off, but we use a simpler scaling approach here
-        similarity_score = max(0, 100 - (distance / len(path) * 10))
-
-        # Identify problematic frames
-        frame_scores = []
-        for template_idx, learner_idx in path:
-            if template_idx < len(template_seq) and learner_idx < len(learner_seq):
-                frame_dist = euclidean(
-                    template_seq[template_idx], learner_seq[learner_idx]
-                )
-                frame_scores.append(max(0, 100 - (frame_dist * 10)))
+        similarity_score = max(0, 100 - float(distances.mean()) * SCORE_PER_DISTANCE)
+
+        # Identify problematic frames from the distances along the path
+        frame_scores = np.maximum(0, 100 - distances * SCORE_PER_DISTANCE).tolist()
 
         return {
             "similarity_score": similarity_score,
@@ -204,6 +500,18 @@ class SignComparer:
             "dtw_path": path,
         }
 
+    def dtw_window(self, template_length, learner_length):
+        """
+        Get the Sakoe-Chiba band radius in frames for a comparison.
+
+        Returns:
+            Optional[int]: Band radius, or None to compare every frame pair
+        """
+        ratio = settings.SIGNING["DTW_WINDOW"]
+        if not ratio:
+            return None
+        return max(1, round(ratio * max(template_length, learner_length)))
+
     def generate_feedback(self, comparison_results):
         """Generate feedback based on comparison results."""
         score = comparison_results["similarity_score"]
@@ -294,3 +602,34 @@ class SignComparer:
         )
 
         return self.save_frames_as_gif(comparison_frames, output_path)
+
+
+# Pooled comparers, so MediaPipe graphs are built once per worker process.
+# Clips are tracked in video mode; single frames use static image mode, which
+# needs no tracking reset between unrelated requests.
+clip_comparers = InstancePool(
+    SignComparer,
+    size=settings.SIGNING["COMPARER_POOL_SIZE"],
+    name="sign-comparers",
+)
+frame_trackers = InstancePool(
+    lambda: SignComparer(static_image_mode=True),
+    size=settings.SIGNING["COMPARER_POOL_SIZE"],
+    name="hand-trackers",
+)
+
+
+@contextmanager
+def acquire_sign_comparer(single_frame=False):
+    """
+    Borrow a pooled SignComparer.
+
+    Args:
+        single_frame: Borrow a static image tracker for independent frames
+
+    Raises:
+        PoolTimeoutError: If no comparer became available in time
+    """
+    pool = frame_trackers if single_frame else clip_comparers
+    with pool.acquire(timeout=settings.SIGNING["COMPARER_POOL_TIMEOUT"]) as comparer:
+        yield comparer
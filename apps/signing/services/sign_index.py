@@ -0,0 +1,151 @@
+"""
+Per-process index of every processed reference sign, for recognizing which
+sign an attempt shows.
+
+Each sign is kept as an LB_Keogh envelope of its sequence stretched to a
+fixed length. Bounding an attempt against all envelopes takes one numpy
+expression, so exact DTW only runs against the few closest signs.
+"""
+
+import logging
+import math
+import threading
+from typing import Any, Callable, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Max
+
+from ..models import SignReference
+from .dtw import keogh_envelope, lb_keogh
+from .sign_comparer import stretch_sequence
+from .utils import load_landmarks_from_model
+
+logger = logging.getLogger(__name__)
+
+
+class SignIndex:
+    """
+    LB_Keogh envelopes of all reference signs with landmarks.
+
+    The index is rebuilt when a sign gains, loses or changes its landmarks in
+    any process, which is checked with one aggregate query per lookup.
+    """
+
+    def __init__(self, length: int = 32, candidates: int = 5):
+        """
+        Initialize an empty index.
+
+        Args:
+            length: Frames every sequence is stretched to for bounding
+            candidates: Number of closest signs returned for exact comparison
+        """
+        self.length = length
+        self.candidates = candidates
+        self._version = None
+        # Signs and their (signs, length, features) envelopes, swapped as one
+        self._entries: Tuple[List, Optional[np.ndarray], Optional[np.ndarray]] = (
+            [],
+            None,
+            None,
+        )
+        self._lock = threading.Lock()
+
+    def radius(self) -> Optional[int]:
+        """Get the envelope radius matching the DTW band of the comparer."""
+        ratio = settings.SIGNING["DTW_WINDOW"]
+        if not ratio:
+            return None
+        return max(1, math.ceil(ratio * self.length))
+
+    def _signs(self):
+        """Signs with current reference landmarks, the ones the index covers."""
+        return SignReference.objects.filter(
+            landmark_data__isnull=False,
+            landmark_format=SignReference.LANDMARK_FORMAT,
+        )
+
+    def _current_version(self):
+        """Get a key that changes whenever the indexed signs change."""
+        stats = self._signs().aggregate(count=Count("id"), updated=Max("updated_at"))
+        return stats["count"], stats["updated"]
+
+    def _build(self, prepare: Callable[[Any], np.ndarray]):
+        """Load every sign's landmarks once and envelope its sequence."""
+        radius = self.radius()
+        sign_ids, uppers, lowers = [], [], []
+
+        for sign in self._signs().order_by("id").iterator():
+            landmarks = load_landmarks_from_model(sign)
+            if landmarks is None:
+                continue
+            sequence = stretch_sequence(prepare(landmarks), self.length)
+            upper, lower = keogh_envelope(sequence, radius)
+            sign_ids.append(sign.id)
+            uppers.append(upper)
+            lowers.append(lower)
+
+        if not sign_ids:
+            return [], None, None
+
+        # Keep the signs without their landmark data, which the reference
+        # sequence cache only loads for candidates it has not prepared yet
+        signs = self._signs().defer("landmark_data").in_bulk(sign_ids)
+        return [signs[i] for i in sign_ids], np.stack(uppers), np.stack(lowers)
+
+    def _current_entries(self, prepare: Callable[[Any], np.ndarray]):
+        """Get the index entries, rebuilding them if any sign has changed."""
+        version = self._current_version()
+        with self._lock:
+            if version != self._version:
+                self._entries = self._build(prepare)
+                self._version = version
+                logger.info(f"Indexed {len(self._entries[0])} reference signs")
+            return self._entries
+
+    def nearest(
+        self,
+        sequence: np.ndarray,
+        prepare: Callable[[Any], np.ndarray],
+        limit: Optional[int] = None,
+    ) -> List[Tuple[Any, float]]:
+        """
+        Get the signs whose lower bound to a sequence is smallest.
+
+        Args:
+            sequence: Comparison sequence of the attempt, from prepare_sequence
+            prepare: Builds a sequence from loaded landmarks, e.g.
+                SignComparer.prepare_sequence; used when the index is rebuilt
+            limit: Number of signs to return, by default ``candidates``
+
+        Returns:
+            List[Tuple[Any, float]]: (SignReference, lower bound per frame)
+                pairs, closest first
+        """
+        signs, upper, lower = self._current_entries(prepare)
+        if not signs or not len(sequence):
+            return []
+
+        query = stretch_sequence(np.asarray(sequence), self.length)
+        bounds = lb_keogh(query, upper, lower) / self.length
+
+        limit = min(limit or self.candidates, len(signs))
+        closest = np.argsort(bounds, kind="stable")[:limit]
+        return [(signs[i], float(bounds[i])) for i in closest]
+
+    def size(self) -> int:
+        """Number of signs in the index as last built."""
+        return len(self._entries[0])
+
+    def clear(self):
+        """Drop the index, so the next lookup rebuilds it."""
+        with self._lock:
+            self._entries = ([], None, None)
+            self._version = None
+
+
+# Create a singleton instance
+sign_index = SignIndex(
+    length=settings.SIGNING["RECOGNITION_LENGTH"],
+    candidates=settings.SIGNING["RECOGNITION_CANDIDATES"],
+)
@@ -3,7 +3,6 @@ Service for visualizing sign language gestures and comparisons.
 Adapted from the standalone implementation in signing-app/sign_visualizer.py.
 """
 
-import base64
 import io
 import logging
 import tempfile
@@ -12,11 +11,126 @@ import cv2
 import imageio
 import mediapipe as mp
 import numpy as np
+from mediapipe.framework.formats import landmark_pb2
 from PIL import Image
 
+from .frame_source import iter_base64_frames, iter_gif_frames, iter_video_frames
+from .sign_comparer import landmarks_to_array
+
 logger = logging.getLogger(__name__)
 
 
+def draw_hand_landmarks(frame, points, mask):
+    """
+    Draw stored hand landmarks on a copy of a frame, without tracking.
+
+    Args:
+        frame: RGB frame the landmarks were detected in (or a blank canvas)
+        points: Landmarks of one frame, shape (hands, 21, 3), normalized to
+            the image size as MediaPipe returns them
+        mask: Which hands are present, shape (hands,)
+
+    Returns:
+        np.ndarray: Annotated copy of the frame
+    """
+    annotated_frame = frame.copy()
+
+    for hand_points, present in zip(points, mask, strict=True):
+        if not present:
+            continue
+        hand_landmarks = landmark_pb2.NormalizedLandmarkList(
+            landmark=[
+                landmark_pb2.NormalizedLandmark(x=x, y=y, z=z)
+                for x, y, z in hand_points.tolist()
+            ]
+        )
+        mp.solutions.drawing_utils.draw_landmarks(
+            annotated_frame,
+            hand_landmarks,
+            mp.solutions.hands.HAND_CONNECTIONS,
+            mp.solutions.drawing_styles.get_default_hand_landmarks_style(),
+            mp.solutions.drawing_styles.get_default_hand_connections_style(),
+        )
+
+    return annotated_frame
+
+
+def compose_comparison_frame(template_frame, learner_frame, caption, size=(600, 400)):
+    """
+    Place a template and a learner frame side by side with labels.
+
+    Args:
+        template_frame: RGB template frame, or None for a blank side
+        learner_frame: RGB learner frame, or None for a blank side
+        caption: Text shown at the bottom, e.g. the frame number
+        size: (width, height) of each side
+
+    Returns:
+        np.ndarray: RGB comparison frame of twice the width
+    """
+    target_width, target_height = size
+    comparison_frame = np.zeros((target_height, target_width * 2, 3), dtype=np.uint8)
+
+    for offset, frame in ((0, template_frame), (target_width, learner_frame)):
+        if frame is not None:
+            comparison_frame[:, offset : offset + target_width] = cv2.resize(
+                frame, (target_width, target_height), interpolation=cv2.INTER_AREA
+            )
+
+    # Add labels
+    cv2.putText(
+        comparison_frame,
+        "Template",
+        (10, 30),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        1,
+        (255, 255, 255),
+        2,
+    )
+    cv2.putText(
+        comparison_frame,
+        "Learner",
+        (target_width + 10, 30),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        1,
+        (255, 255, 255),
+        2,
+    )
+
+    # Add caption
+    cv2.putText(
+        comparison_frame,
+        caption,
+        (10, target_height - 20),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        0.7,
+        (255, 255, 255),
+        2,
+    )
+
+    return comparison_frame
+
+
+def encode_thumbnail(frame, size=(200, 200)):
+    """
+    Resize a frame to a thumbnail and encode it as PNG.
+
+    Returns:
+        io.BytesIO: PNG image, rewound to the start
+    """
+    thumbnail = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+    # Convert to PIL Image for Django compatibility
+    pil_image = Image.fromarray(thumbnail)
+
+    # Save to bytes buffer
+    buffer = io.BytesIO()
+    pil_image.save(buffer, format="PNG")
+    buffer.seek(0)
+
+    return buffer
+
+
 class SignVisualizer:
     """
     Service for visualizing sign language gestures and landmarks.
@@ -37,73 +151,26 @@ class SignVisualizer:
 
     def process_video_frames(self, video_path):
         """Extract frames from a video file."""
-        frames = []
-
-        # Open the video file
-        video = cv2.VideoCapture(video_path)
-
-        if not video.isOpened():
-            logger.error(f"Error opening video file: {video_path}")
-            return frames
-
-        # Read frames
-        while True:
-            success, frame = video.read()
-            if not success:
-                break
-
-            # Convert BGR to RGB
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frames.append(frame_rgb)
-
-        video.release()
-        return frames
+        return list(iter_video_frames(video_path))
 
     def process_gif_frames(self, gif_path):
         """Extract frames from a GIF file."""
-        try:
-            # Read GIF
-            gif = imageio.mimread(gif_path)
-
-            # Process each frame
-            frames = []
-            for frame in gif:
-                # Convert RGBA to RGB if needed
-                if frame.shape[2] == 4:
-                    frame = frame[:, :, :3]
-                frames.append(frame)
-
-            return frames
-        except Exception as e:
-            logger.error(f"Error processing GIF: {e}")
-            return []
+        return list(iter_gif_frames(gif_path))
 
     def process_base64_frames(self, base64_frames):
         """Convert base64 encoded frames to RGB frames."""
-        frames = []
-
-        for base64_str in base64_frames:
-            try:
-                # Decode base64 string to image
-                image_data = base64.b64decode(
-                    base64_str.split(",")[1] if "," in base64_str else base64_str
-                )
-                image = np.frombuffer(image_data, dtype=np.uint8)
-                frame = cv2.imdecode(image, cv2.IMREAD_COLOR)
+        return list(iter_base64_frames(base64_frames))
 
-                # Convert BGR to RGB
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                frames.append(frame_rgb)
-            except Exception as e:
-                logger.error(f"Error decoding base64 frame: {e}")
+    def annotate_frames(self, frames):
+        """
+        Draw hand landmarks on frames one at a time.
 
-        return frames
-
-    def extract_frames_with_landmarks(self, frames):
-        """Process frames and extract landmarks."""
-        processed_frames = []
-        landmarks_data = []
+        Args:
+            frames: Iterable of RGB frames, e.g. a generator from frame_source
 
+        Yields:
+            tuple: Annotated copy of the frame and its landmarks per hand
+        """
         for frame in frames:
             # Create a copy for drawing on
             annotated_frame = frame.copy()
@@ -130,94 +197,53 @@ class SignVisualizer:
                         self.mp_drawing_styles.get_default_hand_connections_style(),
                     )
 
+            yield annotated_frame, frame_landmarks
+
+    def extract_frames_with_landmarks(self, frames):
+        """Process frames and extract landmarks."""
+        processed_frames = []
+        landmarks_data = []
+
+        for annotated_frame, frame_landmarks in self.annotate_frames(frames):
             processed_frames.append(annotated_frame)
             landmarks_data.append(frame_landmarks)
 
         return processed_frames, landmarks_data
 
-    def create_comparison_frames(self, template_frames, learner_frames):
-        """Create side-by-side comparison frames of template and learner."""
+    def create_comparison_frames(
+        self, template_frames, learner_frames, template_annotated=False
+    ):
+        """
+        Create side-by-side comparison frames of template and learner.
+
+        Args:
+            template_frames: RGB frames of the reference sign
+            learner_frames: RGB frames of the learner's attempt
+            template_annotated: The template frames already show their
+                landmarks, e.g. frames of a sign's annotated clip, so hands
+                are not tracked in them again
+        """
         # Process frames to add landmarks
-        template_processed, _ = self.extract_frames_with_landmarks(template_frames)
+        if template_annotated:
+            template_processed = list(template_frames)
+        else:
+            template_processed, _ = self.extract_frames_with_landmarks(template_frames)
         learner_processed, _ = self.extract_frames_with_landmarks(learner_frames)
 
         # Create a side-by-side comparison
         max_frames = max(len(template_processed), len(learner_processed))
         comparison_frames = []
 
-        # Choose a common size for both frames
-        target_height = 400
-        target_width = 600
-
         for i in range(max_frames):
-            # Get template frame or create blank
-            if i < len(template_processed):
-                template_frame = template_processed[i]
-                # Resize template frame
-                template_frame = cv2.resize(
-                    template_frame,
-                    (target_width, target_height),
-                    interpolation=cv2.INTER_AREA,
-                )
-            else:
-                template_frame = np.zeros(
-                    (target_height, target_width, 3), dtype=np.uint8
+            # Use a blank side once either sequence has run out
+            comparison_frames.append(
+                compose_comparison_frame(
+                    template_processed[i] if i < len(template_processed) else None,
+                    learner_processed[i] if i < len(learner_processed) else None,
+                    f"Frame: {i + 1}/{max_frames}",
                 )
-
-            # Get learner frame or create blank
-            if i < len(learner_processed):
-                learner_frame = learner_processed[i]
-                # Resize learner frame
-                learner_frame = cv2.resize(
-                    learner_frame,
-                    (target_width, target_height),
-                    interpolation=cv2.INTER_AREA,
-                )
-            else:
-                learner_frame = np.zeros(
-                    (target_height, target_width, 3), dtype=np.uint8
-                )
-
-            # Create side-by-side frame
-            comparison_frame = np.zeros(
-                (target_height, target_width * 2, 3), dtype=np.uint8
-            )
-            comparison_frame[:, :target_width] = template_frame
-            comparison_frame[:, target_width:] = learner_frame
-
-            # Add labels
-            cv2.putText(
-                comparison_frame,
-                "Template",
-                (10, 30),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                1,
-                (255, 255, 255),
-                2,
-            )
-            cv2.putText(
-                comparison_frame,
-                "Learner",
-                (target_width + 10, 30),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                1,
-                (255, 255, 255),
-                2,
-            )
-
-            # Add frame number
-            cv2.putText(
-                comparison_frame,
-                f"Frame: {i + 1}/{max_frames}",
-                (10, target_height - 20),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.7,
-                (255, 255, 255),
-                2,
             )
 
-            comparison_frames.append(comparison_frame)
-
         return comparison_frames
 
     def save_comparison_gif(self, comparison_frames, output_path=None):
@@ -236,48 +262,33 @@ class SignVisualizer:
         """Generate a thumbnail image from a frame."""
         # Create a copy with landmarks
         annotated_frame, _ = self.extract_frames_with_landmarks([frame])
-        annotated_frame = annotated_frame[0]
-
-        # Resize to thumbnail
-        thumbnail = cv2.resize(annotated_frame, size, interpolation=cv2.INTER_AREA)
-
-        # Convert to PIL Image for Django compatibility
-        pil_image = Image.fromarray(thumbnail)
-
-        # Save to bytes buffer
-        buffer = io.BytesIO()
-        pil_image.save(buffer, format="PNG")
-        buffer.seek(0)
-
-        return buffer
+        return encode_thumbnail(annotated_frame[0], size)
 
     def create_landmark_heatmap(self, template_landmarks, learner_landmarks):
         """Create a heatmap image showing landmark differences."""
         from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
         from matplotlib.figure import Figure
 
+        template_points, template_mask = landmarks_to_array(template_landmarks)
+        learner_points, learner_mask = landmarks_to_array(learner_landmarks)
+
         # Ensure both sequences have the same length
-        min_frames = min(len(template_landmarks), len(learner_landmarks))
+        min_frames = min(len(template_points), len(learner_points))
 
         # Calculate differences for each frame
         differences = []
 
         for i in range(min_frames):
-            # Skip frames without detected hands
-            if not template_landmarks[i] or not learner_landmarks[i]:
+            # Compare the hands found in both frames, skip frames without any
+            shared = template_mask[i] & learner_mask[i]
+            if not shared.any():
                 continue
 
-            # Get first hand from each frame
-            template_hand = np.array(template_landmarks[i][0])
-            learner_hand = np.array(learner_landmarks[i][0])
-
-            # Calculate Euclidean distance for each landmark
-            frame_diffs = []
-            for j in range(21):  # 21 landmarks per hand
-                dist = np.linalg.norm(template_hand[j] - learner_hand[j])
-                frame_diffs.append(dist)
-
-            differences.append(frame_diffs)
+            # Euclidean distance for each landmark, averaged over the hands
+            distances = np.linalg.norm(
+                template_points[i, shared] - learner_points[i, shared], axis=-1
+            )
+            differences.append(distances.mean(axis=0))
 
         if not differences:
             logger.warning("Not enough data to create heatmap")
@@ -3,7 +3,7 @@ Utility functions for the signing app.
 """
 
 import base64
-import json
+import itertools
 import logging
 import os
 import tempfile
@@ -11,70 +11,121 @@ from io import BytesIO
 
 import cv2
 import imageio
+import numpy as np
 from django.conf import settings
 from django.core.files.base import ContentFile
 from django.utils.text import slugify
 from PIL import Image
 
+from .frame_source import downscale, iter_video_frames, subsample, video_fps
+from .sign_comparer import landmarks_to_array
+from .sign_visualizer import encode_thumbnail
+
 logger = logging.getLogger(__name__)
 
 
-def process_video_to_landmarks(video_path, sign_comparer):
+def process_video_to_landmarks(
+    video_path, sign_comparer, clip_fps=None, clip_size=None
+):
     """
     Process a video file to extract hand landmarks.
 
+    The video is decoded once and streamed through the tracker, keeping only
+    the first frame (for the thumbnail) and, if asked, a small sampled clip
+    in memory.
+
     Args:
         video_path: Path to the video file
         sign_comparer: An instance of SignComparer
+        clip_fps: Also keep frames at roughly this rate for a reference clip
+        clip_size: Longest side in pixels of the kept clip frames
 
     Returns:
-        A tuple of (landmarks, frames)
+        A tuple of (landmarks, first_frame, clip_frames); first_frame is None
+        if the video had no frames, clip_frames are (frame index, frame)
+        pairs and empty without clip_fps
     """
-    try:
-        # Extract landmarks from the video
-        landmarks = sign_comparer.extract_landmarks_from_video(video_path)
+    first_frame = None
+    clip_frames = []
+    # Indices of the frames to keep, on the same time grid as subsample
+    clip_indices = (
+        subsample(itertools.count(), video_fps(video_path), clip_fps)
+        if clip_fps
+        else iter(())
+    )
+    next_clip_index = next(clip_indices, None)
+
+    def keep_frames(frames):
+        nonlocal first_frame, next_clip_index
+        for index, frame in enumerate(frames):
+            if first_frame is None:
+                first_frame = frame
+            if index == next_clip_index:
+                clip_frames.append((index, downscale(frame, clip_size)))
+                next_clip_index = next(clip_indices, None)
+            yield frame
 
-        # Get frames from the video for visualization
-        video = cv2.VideoCapture(video_path)
-        frames = []
+    try:
+        landmarks = sign_comparer.extract_landmarks_from_frames(
+            keep_frames(iter_video_frames(video_path))
+        )
+        return landmarks, first_frame, clip_frames
 
-        if not video.isOpened():
-            logger.error(f"Error opening video file: {video_path}")
-            return [], []
+    except Exception as e:
+        logger.exception(f"Error processing video {video_path}: {e}")
+        return [], None, []
 
-        while True:
-            success, frame = video.read()
-            if not success:
-                break
 
-            # Convert BGR to RGB
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frames.append(frame_rgb)
+def pack_landmarks(landmarks):
+    """
+    Pack landmarks into a compact binary blob.
 
-        video.release()
+    The blob holds the float32 points followed by the bool hand presence mask,
+    both in C order.
 
-        return landmarks, frames
+    Args:
+        landmarks: Landmark lists per frame, or a (points, mask) pair
 
-    except Exception as e:
-        logger.exception(f"Error processing video {video_path}: {e}")
-        return [], []
+    Returns:
+        A (blob, shape) pair, shape being the points' shape as a list
+    """
+    points, mask = landmarks_to_array(landmarks)
+    points = np.ascontiguousarray(points, dtype=np.float32)
+    mask = np.ascontiguousarray(mask, dtype=bool)
+    return points.tobytes() + mask.tobytes(), list(points.shape)
 
 
-def save_landmarks_to_model(sign_reference, landmarks):
+def save_landmarks_to_model(sign_reference, landmarks, fps=None):
     """
-    Save landmarks to a SignReference model.
+    Save landmarks to a SignReference model as a compact binary blob.
+
+    The blob is built by pack_landmarks; the points' shape is stored alongside
+    in landmark_shape, and the layout version in landmark_format.
 
     Args:
         sign_reference: SignReference model instance
-        landmarks: List of landmarks
+        landmarks: Landmark lists per frame, or a (points, mask) pair
+        fps: Frame rate of the video the landmarks come from, if known
 
     Returns:
         True if successful, False otherwise
     """
     try:
-        # Convert landmarks to JSON
-        sign_reference.landmarks = json.dumps(landmarks)
-        sign_reference.save(update_fields=["landmarks"])
+        data, shape = pack_landmarks(landmarks)
+        sign_reference.landmark_data = data
+        sign_reference.landmark_shape = shape
+        sign_reference.landmark_fps = fps
+        sign_reference.landmark_format = sign_reference.LANDMARK_FORMAT
+        # Bump updated_at too, it versions cached reference sequences
+        sign_reference.save(
+            update_fields=[
+                "landmark_data",
+                "landmark_shape",
+                "landmark_fps",
+                "landmark_format",
+                "updated_at",
+            ]
+        )
         return True
     except Exception as e:
         logger.exception(f"Error saving landmarks: {e}")
@@ -83,38 +134,58 @@ def save_landmarks_to_model(sign_reference, landmarks):
 
 def load_landmarks_from_model(sign_reference):
     """
-    Load landmarks from a SignReference model.
+    Load landmarks from a SignReference (or SignAttempt) model.
+
+    The arrays are read-only views of the stored bytes, so no landmark data is
+    copied or parsed.
 
     Args:
-        sign_reference: SignReference model instance
+        sign_reference: SignReference or SignAttempt model instance
 
     Returns:
-        List of landmarks or None if not found
+        A (points, mask) pair of numpy arrays, or None if not found
     """
     try:
-        if sign_reference.landmarks:
-            return json.loads(sign_reference.landmarks)
-        return None
+        if not sign_reference.has_landmarks:
+            return None
+
+        shape = tuple(sign_reference.landmark_shape)
+        point_count = int(np.prod(shape))
+        data = sign_reference.landmark_data
+
+        points = np.frombuffer(data, dtype=np.float32, count=point_count)
+        mask = np.frombuffer(
+            data,
+            dtype=bool,
+            count=shape[0] * shape[1],
+            offset=point_count * np.dtype(np.float32).itemsize,
+        )
+        return points.reshape(shape), mask.reshape(shape[:2])
     except Exception as e:
         logger.exception(f"Error loading landmarks: {e}")
         return None
 
 
-def create_thumbnail_for_sign(sign_reference, frame, sign_visualizer):
+def create_thumbnail_for_sign(sign_reference, frame, sign_visualizer=None):
     """
     Create a thumbnail for a sign and save it to the model.
 
     Args:
         sign_reference: SignReference model instance
         frame: RGB frame to use for the thumbnail
-        sign_visualizer: An instance of SignVisualizer
+        sign_visualizer: An instance of SignVisualizer to detect and draw the
+            hands with; without one the frame is used as is, e.g. when it was
+            already annotated from stored landmarks
 
     Returns:
         True if successful, False otherwise
     """
     try:
         # Generate thumbnail
-        thumbnail_buffer = sign_visualizer.generate_thumbnail(frame)
+        if sign_visualizer is not None:
+            thumbnail_buffer = sign_visualizer.generate_thumbnail(frame)
+        else:
+            thumbnail_buffer = encode_thumbnail(frame)
 
         # Generate filename
         filename = f"{slugify(sign_reference.name)}_thumbnail.png"
@@ -129,6 +200,38 @@ def create_thumbnail_for_sign(sign_reference, frame, sign_visualizer):
         return False
 
 
+def save_reference_clip_to_model(sign_reference, image_bytes, layout):
+    """
+    Save an annotated reference clip (see reference_clip) to a SignReference.
+
+    Args:
+        sign_reference: SignReference model instance
+        image_bytes: JPEG sprite sheet of the clip
+        layout: Layout of the sprite sheet
+
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        # Replace rather than accumulate clips of reprocessed signs
+        if sign_reference.annotated_clip:
+            sign_reference.annotated_clip.delete(save=False)
+
+        sign_reference.annotated_clip.save(
+            f"{slugify(sign_reference.name)}_annotated.jpg",
+            ContentFile(image_bytes),
+            save=False,
+        )
+        sign_reference.annotated_clip_layout = layout
+        sign_reference.save(
+            update_fields=["annotated_clip", "annotated_clip_layout", "updated_at"]
+        )
+        return True
+    except Exception as e:
+        logger.exception(f"Error saving reference clip: {e}")
+        return False
+
+
 def create_gif_from_frames(frames, output_path=None):
     """
     Create a GIF from a list of frames.
@@ -3,18 +3,47 @@ Service for managing sign language videos across development and production envi
 This utility helps keep videos out of Git while ensuring they're available when needed.
 """
 
+import hashlib
+import json
 import logging
 import os
 import shutil
 import tempfile
+from typing import Callable, Dict, Iterable, Optional
 
-import boto3
 import requests
+from boto3.s3.transfer import create_transfer_manager
 from botocore.exceptions import ClientError
 from django.conf import settings
+from s3transfer.subscribers import BaseSubscriber
+
+from apps.core.s3 import get_s3_client, get_transfer_config
 
 logger = logging.getLogger(__name__)
 
+# ETag and size of every video synced from S3, kept next to the videos.
+# Dotfiles are ignored by collectstatic.
+MANIFEST_FILENAME = ".s3-manifest.json"
+
+
+class _KnownSize(BaseSubscriber):
+    """Give a download the size from the listing, so it sends no HeadObject."""
+
+    def __init__(self, size):
+        self.size = size
+
+    def on_queued(self, future, **kwargs):
+        future.meta.provide_transfer_size(self.size)
+
+
+def _file_md5(path):
+    """Get the hex MD5 of a file, which is the ETag of a single-part upload."""
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
 
 class VideoManager:
     """
@@ -34,6 +63,9 @@ class VideoManager:
 
         # Create directories if they don't exist
         os.makedirs(self.static_video_dir, exist_ok=True)
+        self.manifest_path = os.path.join(self.static_video_dir, MANIFEST_FILENAME)
+
+        self.sync_workers = settings.SIGNING["VIDEO_SYNC_WORKERS"]
 
         # S3 configuration
         if self.use_s3:
@@ -42,14 +74,8 @@ class VideoManager:
             self.s3_endpoint_url = getattr(settings, "AWS_S3_ENDPOINT_URL", None)
             self.s3_video_prefix = "videos/lukapona/mp4/"
 
-            # Initialize S3 client
-            self.s3_client = boto3.client(
-                "s3",
-                region_name=self.s3_region,
-                endpoint_url=self.s3_endpoint_url,
-                aws_access_key_id=getattr(settings, "AWS_ACCESS_KEY_ID", None),
-                aws_secret_access_key=getattr(settings, "AWS_SECRET_ACCESS_KEY", None),
-            )
+            # Shared client, whose connection pool should fit sync_workers
+            self.s3_client = get_s3_client()
 
     def get_local_video_path(self, sign_name):
         """
@@ -136,16 +162,29 @@ class VideoManager:
             s3_key = self.get_s3_video_key(sign_name)
             logger.info(f"Downloading {sign_name} video from S3: {s3_key}")
 
-            with tempfile.NamedTemporaryFile(delete=False) as tmp:
-                self.s3_client.download_fileobj(
-                    Bucket=self.s3_bucket, Key=s3_key, Fileobj=tmp
-                )
+            # A single GET, which also fails cleanly if the video is missing
+            response = self.s3_client.get_object(Bucket=self.s3_bucket, Key=s3_key)
+            with tempfile.NamedTemporaryFile(
+                dir=self.static_video_dir, suffix=".part", delete=False
+            ) as tmp:
+                shutil.copyfileobj(response["Body"], tmp)
                 tmp_path = tmp.name
 
             # Move to final destination
-            shutil.move(tmp_path, local_path)
+            os.replace(tmp_path, local_path)
+            self._record_downloads(
+                {
+                    sign_name: {
+                        "etag": response["ETag"].strip('"'),
+                        "size": response["ContentLength"],
+                    }
+                }
+            )
             logger.info(f"Downloaded {sign_name} video to {local_path}")
             return local_path
+        except ClientError as e:
+            logger.warning(f"Could not download {sign_name} video from S3: {e}")
+            return None
         except Exception as e:
             logger.exception(f"Error downloading {sign_name} video from S3: {e}")
             return None
@@ -175,7 +214,10 @@ class VideoManager:
             logger.info(f"Uploading {sign_name} video to S3: {s3_key}")
 
             self.s3_client.upload_file(
-                Filename=local_path, Bucket=self.s3_bucket, Key=s3_key
+                Filename=local_path,
+                Bucket=self.s3_bucket,
+                Key=s3_key,
+                Config=get_transfer_config(),
             )
 
             # Construct the S3 URL
@@ -239,8 +281,9 @@ class VideoManager:
         if os.path.exists(local_path):
             return local_path
 
-        # If not, try to download from S3
-        if self.use_s3 and self.video_exists_in_s3(sign_name):
+        # If not, try to download from S3; a missing video fails the GET, so
+        # there is no need to check for it first
+        if self.use_s3:
             downloaded_path = self.download_from_s3(sign_name)
             if downloaded_path:
                 return downloaded_path
@@ -270,6 +313,31 @@ class VideoManager:
 
         return videos
 
+    def list_s3_videos(self) -> Dict[str, Dict]:
+        """
+        List every video in S3, following pagination past 1000 keys.
+
+        Returns:
+            Dict[str, Dict]: Sign name to {"key", "etag", "size"} of its video
+
+        Raises:
+            ClientError: If the bucket cannot be listed
+        """
+        videos = {}
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        pages = paginator.paginate(Bucket=self.s3_bucket, Prefix=self.s3_video_prefix)
+        for page in pages:
+            for item in page.get("Contents", []):
+                key = item["Key"]
+                if key.endswith(".mp4"):
+                    sign_name = os.path.splitext(os.path.basename(key))[0]
+                    videos[sign_name] = {
+                        "key": key,
+                        "etag": item["ETag"].strip('"'),
+                        "size": item["Size"],
+                    }
+        return videos
+
     def _get_s3_videos(self):
         """
         Get dictionary of videos available in S3.
@@ -277,26 +345,15 @@ class VideoManager:
         Returns:
             Dictionary mapping sign names to S3 keys
         """
-        videos = {}
         if not self.use_s3:
-            return videos
+            return {}
 
         try:
-            response = self.s3_client.list_objects_v2(
-                Bucket=self.s3_bucket, Prefix=self.s3_video_prefix
-            )
-
-            if "Contents" in response:
-                for item in response["Contents"]:
-                    key = item["Key"]
-                    if key.endswith(".mp4"):
-                        filename = os.path.basename(key)
-                        sign_name = os.path.splitext(filename)[0]
-                        videos[sign_name] = key
+            videos = self.list_s3_videos()
         except Exception as e:
             logger.exception(f"Error listing videos in S3: {e}")
-
-        return videos
+            return {}
+        return {sign_name: video["key"] for sign_name, video in videos.items()}
 
     def list_available_videos(self):
         """
@@ -315,3 +372,150 @@ class VideoManager:
                 videos[sign_name] = key
 
         return videos
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        """Load the ETags and sizes of synced videos, empty if there are none."""
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable video manifest: {e}")
+            return {}
+
+    def _save_manifest(self, manifest: Dict[str, Dict]):
+        """Write the manifest atomically, so an interrupted sync cannot corrupt it."""
+        with tempfile.NamedTemporaryFile(
+            "w", dir=self.static_video_dir, suffix=".part", delete=False
+        ) as tmp:
+            json.dump(manifest, tmp, indent=2, sort_keys=True)
+        os.replace(tmp.name, self.manifest_path)
+
+    def _record_downloads(self, videos: Dict[str, Dict]):
+        """Add the ETags and sizes of downloaded videos to the manifest."""
+        manifest = self._load_manifest()
+        manifest.update(videos)
+        self._save_manifest(manifest)
+
+    def is_up_to_date(self, sign_name: str, video: Dict, manifest: Dict) -> bool:
+        """
+        Check if the local copy of a video matches the one in S3.
+
+        Args:
+            sign_name: Name of the sign
+            video: {"etag", "size"} of the video in S3
+            manifest: Synced videos, from the manifest
+
+        Returns:
+            True if the local file is the same version as the S3 object
+        """
+        try:
+            size = os.path.getsize(self.get_local_video_path(sign_name))
+        except OSError:
+            return False
+        if size != video["size"]:
+            return False
+
+        synced = manifest.get(sign_name)
+        if synced is not None:
+            return synced["etag"] == video["etag"] and synced["size"] == size
+
+        # Downloaded before the manifest existed; only the ETag of a
+        # single-part upload (no "-<parts>" suffix) is the file's MD5
+        if "-" in video["etag"]:
+            return False
+        return _file_md5(self.get_local_video_path(sign_name)) == video["etag"]
+
+    def sync_from_s3(
+        self,
+        sign_names: Optional[Iterable[str]] = None,
+        force: bool = False,
+        workers: Optional[int] = None,
+        progress: Optional[Callable[[str, str], None]] = None,
+    ) -> Dict[str, list]:
+        """
+        Download every video that is missing or changed locally.
+
+        The bucket is listed once; the ETags and sizes in the listing are
+        compared with the manifest, so unchanged videos cost no request at all.
+        The rest are downloaded concurrently, larger ones in ranged parts.
+
+        Args:
+            sign_names: Signs to sync, by default every video in S3
+            force: If True, download even if the local copy is up to date
+            workers: Concurrent GET requests, by default VIDEO_SYNC_WORKERS
+            progress: Called with (sign name, "downloaded"/"skipped"/"failed")
+
+        Returns:
+            Dict[str, list]: Sign names that were "downloaded", "skipped" as
+                up to date, "failed", or "missing" from S3
+
+        Raises:
+            ClientError: If the bucket cannot be listed
+        """
+        result = {"downloaded": [], "skipped": [], "failed": [], "missing": []}
+        if not self.use_s3:
+            logger.warning("S3 storage not configured, cannot sync")
+            return result
+
+        videos = self.list_s3_videos()
+        if sign_names is not None:
+            wanted = list(sign_names)
+            result["missing"] = [name for name in wanted if name not in videos]
+            videos = {name: videos[name] for name in wanted if name in videos}
+
+        manifest = self._load_manifest()
+        pending = {}
+        for sign_name, video in videos.items():
+            if not force and self.is_up_to_date(sign_name, video, manifest):
+                manifest[sign_name] = {"etag": video["etag"], "size": video["size"]}
+                self._report(result, progress, sign_name, "skipped")
+            else:
+                pending[sign_name] = video
+
+        try:
+            if pending:
+                self._download_videos(pending, manifest, result, progress, workers)
+        finally:
+            # Keep what was downloaded even if the sync is interrupted
+            self._save_manifest(manifest)
+
+        logger.info(
+            f"Synced videos from S3: {len(result['downloaded'])} downloaded, "
+            f"{len(result['skipped'])} up to date, {len(result['failed'])} failed"
+        )
+        return result
+
+    def _download_videos(self, videos, manifest, result, progress, workers):
+        """Download videos through one transfer manager with bounded threads."""
+        config = get_transfer_config(workers or self.sync_workers)
+        with create_transfer_manager(self.s3_client, config) as manager:
+            # The manager writes to a temporary name and renames when done,
+            # so a failed download never leaves a partial video behind
+            futures = {
+                sign_name: manager.download(
+                    self.s3_bucket,
+                    video["key"],
+                    self.get_local_video_path(sign_name),
+                    subscribers=[_KnownSize(video["size"])],
+                )
+                for sign_name, video in videos.items()
+            }
+            for sign_name, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Error downloading {sign_name} video from S3: {e}")
+                    self._report(result, progress, sign_name, "failed")
+                    continue
+                video = videos[sign_name]
+                manifest[sign_name] = {"etag": video["etag"], "size": video["size"]}
+                self._report(result, progress, sign_name, "downloaded")
+
+    @staticmethod
+    def _report(result, progress, sign_name, status):
+        """Record the outcome of syncing one video."""
+        result[status].append(sign_name)
+        if progress is not None:
+            progress(sign_name, status)
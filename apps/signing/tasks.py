@@ -0,0 +1,44 @@
+import logging
+
+from asgiref.sync import async_to_sync
+from celery import shared_task
+from channels.layers import get_channel_layer
+from django.contrib.auth.models import User
+
+from apps.core.pool import PoolTimeoutError
+
+from .models import SignReference
+from .services.analysis import AnalysisError, analyze_attempt
+
+logger = logging.getLogger(__name__)
+
+
+def attempts_group(user_id):
+    """Channels group receiving the analysis results of a user's attempts."""
+    return f"sign_attempts_{user_id}"
+
+
+@shared_task(ignore_result=True)
+def analyze_sign_attempt(attempt_id, user_id, sign_id, base64_frames, fps=None):
+    """Score a sign attempt in the background and push the result to the user."""
+    channel_layer = get_channel_layer()
+
+    try:
+        user = User.objects.get(id=user_id)
+        # Reference landmarks are only loaded if they are not cached yet
+        sign = SignReference.objects.defer("landmark_data").get(id=sign_id)
+        result = analyze_attempt(user, sign, base64_frames, fps, attempt_id=attempt_id)
+        message = {"type": "attempt_result", "attempt_id": attempt_id, **result}
+    except AnalysisError as e:
+        message = {"type": "attempt_error", "attempt_id": attempt_id, "error": str(e)}
+    except PoolTimeoutError:
+        message = {
+            "type": "attempt_error",
+            "attempt_id": attempt_id,
+            "error": "Hand tracking is busy, please try again",
+        }
+    except Exception as e:
+        logger.exception(f"Error analyzing sign attempt {attempt_id}: {e}")
+        message = {"type": "attempt_error", "attempt_id": attempt_id, "error": str(e)}
+
+    async_to_sync(channel_layer.group_send)(attempts_group(user_id), message)
@@ -1,8 +1,18 @@
+import json
+import os
+import shutil
+import tempfile
 from io import StringIO
+from unittest.mock import patch
 
+import cv2
+import numpy as np
 from django.core.management import call_command
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
+from apps.signing.management.commands.process_sign_videos import (
+    Command as ProcessSignVideosCommand,
+)
 from apps.signing.models import SignReference
 
 
@@ -51,3 +61,120 @@ class CommandsTestCase(TestCase):
         call_command("load_sample_signs", stdout=out)
         output = out.getvalue()
         self.assertIn("already exists, updating", output)
+
+    def test_benchmark_dtw(self):
+        """Test that the DTW benchmark reports timings for both engines"""
+        out = StringIO()
+
+        call_command(
+            "benchmark_dtw",
+            template_frames=40,
+            learner_frames=20,
+            repeat=1,
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertIn("fastdtw: median", output)
+        self.assertIn("dtw: median", output)
+        self.assertIn("Speedup", output)
+
+
+class ProcessSignVideosTests(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        self.checkpoint = os.path.join(self.tmp_dir, "checkpoint.json")
+
+        # Annotated clips are saved to storage alongside the landmarks
+        media = override_settings(MEDIA_ROOT=os.path.join(self.tmp_dir, "media"))
+        media.enable()
+        self.addCleanup(media.disable)
+
+        # Short blank clips stand in for the lukapona videos
+        self.video_map = {}
+        for name in ("toki", "pona"):
+            path = os.path.join(self.tmp_dir, f"{name}.mp4")
+            writer = cv2.VideoWriter(
+                path, cv2.VideoWriter_fourcc(*"mp4v"), 10, (64, 64)
+            )
+            for _ in range(3):
+                writer.write(np.zeros((64, 64, 3), dtype=np.uint8))
+            writer.release()
+            self.video_map[name] = path
+
+        patcher = patch(
+            "apps.signing.management.commands.process_sign_videos.VideoManager"
+        )
+        video_manager = patcher.start()
+        self.addCleanup(patcher.stop)
+        video_manager.return_value.list_available_videos.return_value = self.video_map
+
+        patcher = patch(
+            "apps.signing.management.commands.process_sign_videos"
+            ".create_thumbnail_for_sign",
+            return_value=True,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def process(self, **options):
+        out = StringIO()
+        call_command(
+            "process_sign_videos",
+            checkpoint=self.checkpoint,
+            workers=1,
+            stdout=out,
+            **options,
+        )
+        return out.getvalue()
+
+    def test_processes_each_video_once(self):
+        """Test that landmarks are extracted and saved for every video"""
+        output = self.process()
+
+        self.assertIn("[2/2]", output)
+        self.assertIn("Successfully processed: 2", output)
+        self.assertIn("Throughput:", output)
+        for name in self.video_map:
+            sign = SignReference.objects.get(name=name)
+            self.assertEqual(sign.landmark_shape, [3, 2, 21, 3])
+            # The annotated clip is drawn once, next to the landmarks
+            self.assertTrue(sign.annotated_clip.name.endswith("_annotated.jpg"))
+            self.assertEqual(sign.annotated_clip_layout["source_frames"], [0, 1, 2])
+
+        # A clean run leaves no checkpoint behind
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_resume_skips_finished_signs(self):
+        """Test that a resumed run only processes signs it had not finished"""
+        with open(self.checkpoint, "w") as f:
+            json.dump({"completed": ["toki"]}, f)
+
+        output = self.process(force=True, resume=True)
+
+        self.assertIn("Resuming: 1 signs already finished", output)
+        self.assertIn("Successfully processed: 1", output)
+        self.assertFalse(SignReference.objects.filter(name="toki").exists())
+        self.assertTrue(SignReference.objects.get(name="pona").has_landmarks)
+
+    def test_worker_processes_extract_landmarks(self):
+        """Test that landmarks can be extracted in parallel worker processes"""
+        command = ProcessSignVideosCommand()
+        jobs = [
+            (SignReference(name=name), path) for name, path in self.video_map.items()
+        ]
+
+        results = {
+            sign.name: result for sign, result in command._run_jobs(jobs, workers=2)
+        }
+
+        self.assertEqual(set(results), set(self.video_map))
+        for result in results.values():
+            self.assertEqual(result["frame_count"], 3)
+            points, mask = result["landmarks"]
+            self.assertEqual(points.shape, (3, 2, 21, 3))
+            self.assertFalse(mask.any())
+            image_bytes, layout = result["clip"]
+            self.assertTrue(image_bytes.startswith(b"\xff\xd8"))
+            self.assertEqual(layout["fps"], 10)
@@ -0,0 +1,298 @@
+import asyncio
+import json
+from collections import deque
+from unittest.mock import AsyncMock, patch
+
+import cv2
+import numpy as np
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.test import TransactionTestCase, override_settings
+
+from apps.signing import routing
+from apps.signing.consumers import HandTrackingConsumer
+from apps.signing.models import SignAttempt, SignReference
+from apps.signing.services.reference_cache import reference_sequences
+from apps.signing.services.utils import save_landmarks_to_model
+from apps.signing.tasks import analyze_sign_attempt
+
+IN_MEMORY_CHANNEL_LAYERS = {
+    "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"},
+}
+
+
+def idle_consumer():
+    """A consumer with the queue state connect() sets up."""
+    consumer = HandTrackingConsumer()
+    consumer.queue = deque()
+    consumer.set_recording(False)
+    consumer.frames_received = 0
+    consumer.frames_dropped = 0
+    consumer.frame_ready = asyncio.Event()
+    return consumer
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class HandTrackingConsumerTests(TransactionTestCase):
+    # Consumers close old database connections, which would end a test transaction
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpassword"
+        )
+        self.application = URLRouter(routing.websocket_urlpatterns)
+        _, jpeg = cv2.imencode(".jpg", np.zeros((64, 64, 3), dtype=np.uint8))
+        self.frame = jpeg.tobytes()
+
+    def communicator(self, user):
+        communicator = WebsocketCommunicator(
+            self.application, "/ws/signing/track-hands/"
+        )
+        communicator.scope["user"] = user
+        return communicator
+
+    def test_rejects_anonymous_users(self):
+        """Test that hand tracking requires authentication"""
+
+        async def run():
+            communicator = self.communicator(AnonymousUser())
+            connected, _ = await communicator.connect()
+            return connected
+
+        self.assertFalse(async_to_sync(run)())
+
+    def test_streams_landmarks_for_binary_frames(self):
+        """Test that each binary frame gets a landmarks message back"""
+
+        async def run():
+            communicator = self.communicator(self.user)
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+
+            await communicator.send_to(bytes_data=self.frame)
+            response = json.loads(await communicator.receive_from(timeout=10))
+
+            await communicator.send_to(bytes_data=b"not an image")
+            error = json.loads(await communicator.receive_from(timeout=10))
+
+            await communicator.disconnect()
+            return response, error
+
+        response, error = async_to_sync(run)()
+        self.assertEqual(response["type"], "landmarks")
+        self.assertEqual(response["frame"], 1)
+        self.assertEqual(response["landmarks"], [])
+        self.assertEqual(error["type"], "error")
+        self.assertEqual(HandTrackingConsumer.active_connections, 0)
+
+    def test_drops_frames_when_behind(self):
+        """Test that only the newest waiting frame is processed"""
+        consumer = idle_consumer()
+
+        async def run():
+            for frame in (b"1", b"2", b"3"):
+                await consumer.handle_frame(frame)
+
+        with override_settings(SIGNING={**settings.SIGNING, "MAX_FRAME_BYTES": 10}):
+            async_to_sync(run)()
+
+        self.assertEqual(list(consumer.queue), [("frame", (3, b"3"))])
+        self.assertEqual(consumer.frames_dropped, 2)
+
+    def test_keeps_every_frame_of_an_attempt(self):
+        """Test that no frame is dropped between attempt start and finish"""
+        consumer = idle_consumer()
+
+        async def run():
+            await consumer.receive(text_data=json.dumps({"type": "start_attempt"}))
+            for frame in (b"1", b"2"):
+                await consumer.handle_frame(frame)
+            await consumer.receive(text_data=json.dumps({"type": "finish_attempt"}))
+            await consumer.handle_frame(b"3")
+            await consumer.handle_frame(b"4")
+
+        with override_settings(SIGNING={**settings.SIGNING, "MAX_FRAME_BYTES": 10}):
+            async_to_sync(run)()
+
+        self.assertEqual(
+            [kind for kind, _ in consumer.queue],
+            ["start_attempt", "frame", "frame", "finish_attempt", "frame"],
+        )
+        self.assertEqual(consumer.queue[-1], ("frame", (4, b"4")))
+        self.assertEqual(consumer.frames_dropped, 1)
+
+    def test_unfinished_attempt_keeps_queue_bounded(self):
+        """Test that an attempt keeps at most the analyzed frames until it times out"""
+        consumer = idle_consumer()
+        signing = {
+            **settings.SIGNING,
+            "ANALYSIS_MAX_FRAMES": 5,
+            "ATTEMPT_RECORDING_TIMEOUT": 10,
+        }
+
+        async def run():
+            await consumer.receive(text_data=json.dumps({"type": "start_attempt"}))
+            for _ in range(50):
+                await consumer.handle_frame(self.frame)
+            queued = len(consumer.queue)
+
+            # The client never finishes the attempt
+            consumer.recording_started -= 11
+            await consumer.handle_frame(self.frame)
+            return queued
+
+        with override_settings(SIGNING=signing):
+            queued = async_to_sync(run)()
+
+        self.assertEqual(queued, 6)
+        self.assertFalse(consumer.recording)
+        # Waiting frames are stale again once recording has stopped
+        self.assertEqual(
+            [kind for kind, _ in consumer.queue], ["start_attempt", "frame"]
+        )
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class StreamedAttemptTests(TransactionTestCase):
+    # Consumers close old database connections, which would end a test transaction
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="test")
+        self.sign = SignReference.objects.create(name="pona", meaning="good")
+        # The index finger straightens as the sign goes on
+        rng = np.random.default_rng(0)
+        hand = rng.random((21, 3)) * 0.1
+        self.hands = []
+        for _ in range(8):
+            hand = hand.copy()
+            hand[8] += 0.05
+            self.hands.append([hand.tolist()])
+        save_landmarks_to_model(self.sign, self.hands, fps=10)
+        self.application = URLRouter(routing.websocket_urlpatterns)
+        _, jpeg = cv2.imencode(".jpg", np.zeros((64, 64, 3), dtype=np.uint8))
+        self.frame = jpeg.tobytes()
+
+    def tearDown(self):
+        reference_sequences.clear()
+
+    def test_attempt_is_scored_while_streaming(self):
+        """Test that streamed frames get progress messages and a final result"""
+
+        async def run():
+            communicator = WebsocketCommunicator(
+                self.application, "/ws/signing/track-hands/"
+            )
+            communicator.scope["user"] = self.user
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+
+            await communicator.send_json_to(
+                {"type": "start_attempt", "sign_id": self.sign.id, "fps": 10}
+            )
+            messages = []
+            for _ in range(4):
+                await communicator.send_to(bytes_data=self.frame)
+                messages.append(await communicator.receive_json_from(timeout=10))
+                messages.append(await communicator.receive_json_from(timeout=10))
+            await communicator.send_json_to({"type": "finish_attempt"})
+            messages.append(await communicator.receive_json_from(timeout=10))
+
+            await communicator.disconnect()
+            return messages
+
+        # The learner signs the first half of the reference
+        with patch.object(HandTrackingConsumer, "track", side_effect=self.hands[:4]):
+            messages = async_to_sync(run)()
+
+        self.assertEqual(
+            [message["type"] for message in messages],
+            ["landmarks", "progress"] * 4 + ["result"],
+        )
+        progress = messages[-2]
+        self.assertEqual(progress["frame"], 3)
+        self.assertEqual(progress["position"], 3)
+        self.assertAlmostEqual(progress["progress"], 3 / 7)
+        self.assertAlmostEqual(progress["score"], 100)
+
+        # Only now is the whole attempt compared, missing half the sign
+        result = messages[-1]
+        self.assertLess(result["similarity_score"], 100)
+        attempt = SignAttempt.objects.get(pk=result["attempt_id"])
+        self.assertEqual(attempt.landmark_shape[0], 4)
+        self.assertEqual(len(attempt.keyframes), 4)
+        self.assertEqual(attempt.user, self.user)
+
+    def test_failed_attempt_start_keeps_queue_bounded(self):
+        """Test that frames are dropped again when an attempt cannot start"""
+        consumer = idle_consumer()
+        consumer.send = AsyncMock()
+
+        async def run():
+            # The sign does not exist, so the client falls back to uploading
+            message = {"type": "start_attempt", "sign_id": self.sign.id + 1}
+            await consumer.receive(text_data=json.dumps(message))
+            await consumer.start_attempt(consumer.queue.popleft()[1])
+            for _ in range(200):
+                await consumer.handle_frame(self.frame)
+
+        async_to_sync(run)()
+
+        self.assertFalse(consumer.recording)
+        self.assertEqual(len(consumer.queue), 1)
+        self.assertEqual(consumer.frames_dropped, 199)
+        error = json.loads(consumer.send.call_args.kwargs["text_data"])
+        self.assertEqual(error["type"], "attempt_error")
+        self.assertEqual(error["error"], "Sign not found")
+
+
+@override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+class SignAttemptConsumerTests(TransactionTestCase):
+    # Consumers close old database connections, which would end a test transaction
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpassword"
+        )
+        self.sign = SignReference.objects.create(name="pona", meaning="good")
+        self.application = URLRouter(routing.websocket_urlpatterns)
+
+    def run_attempt(self):
+        """Analyze an attempt in the background and receive what is pushed."""
+
+        async def run():
+            communicator = WebsocketCommunicator(
+                self.application, "/ws/signing/attempts/"
+            )
+            communicator.scope["user"] = self.user
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+
+            await sync_to_async(analyze_sign_attempt)(
+                "attempt-1", self.user.id, self.sign.id, ["frame"], 10
+            )
+            message = json.loads(await communicator.receive_from(timeout=10))
+            await communicator.disconnect()
+            return message
+
+        return async_to_sync(run)()
+
+    def test_result_is_pushed_to_the_user(self):
+        """Test that a scored attempt is pushed to the user's attempts socket"""
+        with patch(
+            "apps.signing.tasks.analyze_attempt",
+            return_value={"similarity_score": 91.0, "is_successful": True},
+        ) as analyze:
+            message = self.run_attempt()
+
+        self.assertEqual(analyze.call_args.args[2:], (["frame"], 10))
+        self.assertEqual(message["type"], "result")
+        self.assertEqual(message["attempt_id"], "attempt-1")
+        self.assertEqual(message["similarity_score"], 91.0)
+
+    def test_analysis_errors_are_pushed(self):
+        """Test that attempts which cannot be scored push an error"""
+        message = self.run_attempt()
+
+        self.assertEqual(message["type"], "error")
+        self.assertEqual(message["attempt_id"], "attempt-1")
+        self.assertIn("No reference landmarks", message["error"])
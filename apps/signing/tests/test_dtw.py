@@ -0,0 +1,125 @@
+import numpy as np
+from django.test import TestCase
+
+from apps.signing.services.dtw import (
+    OnlineDTW,
+    accumulate_costs,
+    band_limits,
+    dtw,
+    keogh_envelope,
+    lb_keogh,
+    pairwise_distances,
+)
+
+
+def reference_dtw(template_seq, learner_seq, window=None):
+    """Straightforward DTW over every (or every in-band) cell."""
+    costs = pairwise_distances(template_seq, learner_seq)
+    n, m = costs.shape
+    lo, hi = band_limits(n, m, window)
+    cumulative = np.full((n + 1, m + 1), np.inf)
+    cumulative[0, 0] = 0
+    for i in range(n):
+        for j in range(lo[i], hi[i] + 1):
+            cumulative[i + 1, j + 1] = costs[i, j] + min(
+                cumulative[i, j], cumulative[i, j + 1], cumulative[i + 1, j]
+            )
+    return cumulative[n, m]
+
+
+class DTWTests(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.template_seq = rng.random((30, 63))
+        self.learner_seq = rng.random((18, 63))
+
+    def test_matches_reference_dtw(self):
+        """Test that the distance is the exact DTW distance, with or without a band"""
+        for window in (None, 0, 2, 5):
+            alignment = dtw(self.template_seq, self.learner_seq, window=window)
+            self.assertAlmostEqual(
+                alignment["distance"],
+                reference_dtw(self.template_seq, self.learner_seq, window),
+            )
+
+    def test_path_covers_both_sequences(self):
+        """Test that the path runs end to end and carries its step distances"""
+        alignment = dtw(self.template_seq, self.learner_seq, window=3)
+        path = alignment["path"]
+
+        self.assertEqual(path[0], (0, 0))
+        self.assertEqual(path[-1], (29, 17))
+        for (i, j), (next_i, next_j) in zip(path, path[1:], strict=False):
+            self.assertIn((next_i - i, next_j - j), [(1, 1), (1, 0), (0, 1)])
+
+        costs = pairwise_distances(self.template_seq, self.learner_seq)
+        expected = [costs[i, j] for i, j in path]
+        np.testing.assert_allclose(alignment["path_distances"], expected)
+        self.assertAlmostEqual(alignment["path_distances"].sum(), alignment["distance"])
+
+    def test_single_frame_sequences(self):
+        """Test that one-frame sequences align with every frame of the other"""
+        alignment = dtw(self.template_seq[:1], self.learner_seq, window=1)
+        self.assertEqual(len(alignment["path"]), len(self.learner_seq))
+
+    def test_early_abandon(self):
+        """Test that alignments above the distance limit are abandoned"""
+        distance = dtw(self.template_seq, self.learner_seq)["distance"]
+
+        self.assertIsNone(
+            dtw(self.template_seq, self.learner_seq, max_distance=distance / 10)
+        )
+        alignment = dtw(self.template_seq, self.learner_seq, max_distance=distance)
+        self.assertAlmostEqual(alignment["distance"], distance)
+
+    def test_lb_keogh_bounds_dtw(self):
+        """Test that LB_Keogh never exceeds the DTW distance it bounds"""
+        rng = np.random.default_rng(1)
+        references = rng.random((6, 18, 63))
+
+        for window in (None, 2, 5):
+            upper, lower = zip(
+                *(keogh_envelope(reference, window) for reference in references),
+                strict=True,
+            )
+            bounds = lb_keogh(self.learner_seq, np.stack(upper), np.stack(lower))
+
+            self.assertEqual(bounds.shape, (6,))
+            for reference, bound in zip(references, bounds, strict=True):
+                distance = reference_dtw(reference, self.learner_seq, window=window)
+                self.assertLessEqual(bound, distance + 1e-6)
+
+        # A sequence lies inside its own envelope
+        upper, lower = keogh_envelope(references[0], 2)
+        self.assertAlmostEqual(float(lb_keogh(references[0], upper, lower)), 0)
+
+    def test_online_dtw_matches_full_dtw(self):
+        """Test that frame-by-frame columns equal the full cost matrix"""
+        online = OnlineDTW(self.template_seq)
+        for frame in self.learner_seq:
+            online.update(frame)
+
+        cumulative = accumulate_costs(
+            pairwise_distances(self.template_seq, self.learner_seq)
+        )
+        np.testing.assert_allclose(online.column, cumulative[:, -1])
+
+    def test_online_dtw_follows_the_template(self):
+        """Test that a sequence replaying the template is tracked along it"""
+        online = OnlineDTW(self.template_seq)
+
+        positions = [online.update(frame) for frame in self.template_seq[:20]]
+
+        self.assertEqual([position for position, _ in positions], list(range(20)))
+        self.assertEqual([cost for _, cost in positions], [0.0] * 20)
+
+    def test_online_dtw_reports_the_cheapest_position(self):
+        """Test that the position chosen is the one with the reported cost"""
+        online = OnlineDTW(np.arange(4.0)[:, None])
+
+        # Held still nearer the first template frame than the second
+        for _ in range(3):
+            position, cost = online.update(np.array([0.4]))
+
+        self.assertEqual(position, 0)
+        self.assertAlmostEqual(cost, 0.4)
@@ -0,0 +1,94 @@
+import base64
+import os
+import shutil
+import tempfile
+import types
+
+import cv2
+import imageio
+import numpy as np
+from django.test import TestCase
+
+from apps.signing.services.frame_source import (
+    decode_image,
+    downscale,
+    iter_base64_frames,
+    iter_gif_frames,
+    iter_video_frames,
+    select_frames,
+    subsample,
+)
+
+
+class FrameSourceTests(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        self.frames = [np.full((120, 160, 3), i * 20, dtype=np.uint8) for i in range(6)]
+
+    def test_video_frames_are_streamed(self):
+        """Test that mp4 frames are decoded lazily, subsampled and downscaled"""
+        path = os.path.join(self.tmp_dir, "clip.mp4")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 30, (160, 120))
+        for frame in self.frames:
+            writer.write(frame)
+        writer.release()
+
+        frames = iter_video_frames(path, target_fps=15, max_size=80)
+        self.assertIsInstance(frames, types.GeneratorType)
+
+        frames = list(frames)
+        self.assertEqual(len(frames), 3)
+        self.assertEqual(frames[0].shape, (60, 80, 3))
+
+    def test_gif_frames_are_streamed(self):
+        """Test that GIF frames are decoded one at a time as RGB"""
+        path = os.path.join(self.tmp_dir, "clip.gif")
+        imageio.mimsave(path, self.frames, duration=0.1)
+
+        frames = list(iter_gif_frames(path))
+
+        self.assertEqual(len(frames), len(self.frames))
+        self.assertEqual(frames[1].shape, (120, 160, 3))
+        self.assertEqual(frames[1][0, 0].tolist(), [20, 20, 20])
+
+    def test_base64_frames_skip_invalid_images(self):
+        """Test that undecodable base64 frames are skipped"""
+        _, jpeg = cv2.imencode(".jpg", self.frames[0])
+        valid = "data:image/jpeg;base64," + base64.b64encode(jpeg).decode()
+
+        frames = list(iter_base64_frames([valid, "bm90IGFuIGltYWdl", valid]))
+
+        self.assertEqual(len(frames), 2)
+
+    def test_subsample_keeps_an_even_time_grid(self):
+        """Test that subsampling keeps frames evenly spaced from the first"""
+        self.assertEqual(list(subsample(range(10), 30, 10)), [0, 3, 6, 9])
+        self.assertEqual(list(subsample(range(5), 25, 10)), [0, 3])
+        self.assertEqual(list(subsample(range(4), 10, 30)), [0, 1, 2, 3])
+        self.assertEqual(list(subsample(range(4), None, 10)), [0, 1, 2, 3])
+
+    def test_downscale_only_shrinks_large_frames(self):
+        """Test that frames are shrunk to fit, never enlarged"""
+        self.assertEqual(downscale(self.frames[0], 40).shape, (30, 40, 3))
+        self.assertIs(downscale(self.frames[0], 400), self.frames[0])
+        self.assertIs(downscale(self.frames[0], None), self.frames[0])
+
+    def test_select_frames_caps_the_frame_count(self):
+        """Test that long clips are subsampled, then thinned out evenly"""
+        frames, fps = select_frames(list(range(90)), 30, 10, max_frames=10)
+
+        self.assertEqual(frames, [0, 9, 18, 30, 39, 48, 57, 69, 78, 87])
+        self.assertAlmostEqual(fps, 30 * 10 / 90)
+        self.assertEqual(select_frames(list(range(4)), None, 10), ([0, 1, 2, 3], None))
+
+    def test_decode_image_reduces_large_images(self):
+        """Test that large images are decoded at a reduced size"""
+        frame = np.zeros((960, 1280, 3), dtype=np.uint8)
+        _, jpeg = cv2.imencode(".jpg", frame)
+
+        self.assertEqual(
+            decode_image(jpeg.tobytes(), max_size=480).shape, (360, 480, 3)
+        )
+        self.assertEqual(decode_image(jpeg.tobytes()).shape, (960, 1280, 3))
+        self.assertIsNone(decode_image(b"not an image"))
@@ -0,0 +1,685 @@
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from apps.signing.models import SignAttempt, SigningProgress, SignReference
+from apps.signing.services.analysis import (
+    SUCCESS_SCORE,
+    AnalysisError,
+    align_frames,
+    analyze_attempt,
+    encode_keyframes,
+    recognize_attempt,
+    record_attempt,
+)
+from apps.signing.services.attempt_visualization import (
+    get_comparison_frames,
+    load_reference_clip,
+)
+from apps.signing.services.reference_cache import (
+    ReferenceSequenceCache,
+    reference_sequences,
+)
+from apps.signing.services.reference_clip import (
+    build_reference_clip,
+    nearest_clip_frame,
+    split_reference_clip,
+)
+from apps.signing.services.sign_comparer import (
+    NUM_FEATURES,
+    SignComparer,
+    acquire_sign_comparer,
+    array_to_landmarks,
+    clip_comparers,
+    fill_hand_gaps,
+    landmarks_to_array,
+    order_hands,
+    resample_sequence,
+)
+from apps.signing.services.sign_index import SignIndex, sign_index
+from apps.signing.services.utils import (
+    convert_frames_to_base64,
+    load_landmarks_from_model,
+    pack_landmarks,
+    save_landmarks_to_model,
+    save_reference_clip_to_model,
+)
+from apps.signing.services.video_manager import MANIFEST_FILENAME, VideoManager
+
+
+class SignComparerLifecycleTests(TestCase):
+    def test_pooled_comparer_is_reused(self):
+        """Test that requests share pooled comparers instead of building new ones"""
+        with acquire_sign_comparer() as first:
+            pass
+        with acquire_sign_comparer() as second:
+            pass
+
+        self.assertIs(first, second)
+        self.assertLessEqual(clip_comparers.stats()["created"], clip_comparers.size)
+
+    def test_single_frame_trackers_use_static_mode(self):
+        """Test that single frames are tracked without temporal state"""
+        with acquire_sign_comparer(single_frame=True) as tracker:
+            self.assertTrue(tracker.static_image_mode)
+
+    def test_each_clip_starts_with_fresh_tracking(self):
+        """Test that tracking state is reset between independent clips"""
+        comparer = SignComparer()
+        blank = np.zeros((64, 64, 3), dtype=np.uint8)
+        try:
+            resets = []
+            original_reset = comparer.hands.reset
+            comparer.hands.reset = lambda: resets.append(1) or original_reset()
+
+            comparer.extract_landmarks_from_frames([blank, blank])
+            self.assertEqual(resets, [])
+
+            comparer.extract_landmarks_from_frames([blank])
+            self.assertEqual(resets, [1])
+        finally:
+            comparer.close()
+
+
+class LandmarkArrayTests(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.landmarks = [
+            rng.random((1, 21, 3)).tolist(),
+            [],
+            rng.random((2, 21, 3)).tolist(),
+        ]
+        self.comparer = SignComparer(static_image_mode=True)
+
+    def tearDown(self):
+        self.comparer.close()
+
+    def test_landmarks_round_trip_through_array(self):
+        """Test that landmark lists convert to a masked array and back"""
+        points, mask = landmarks_to_array(self.landmarks)
+
+        self.assertEqual(points.shape, (3, 2, 21, 3))
+        self.assertEqual(points.dtype, np.float32)
+        self.assertEqual(mask.tolist(), [[True, False], [False, False], [True, True]])
+
+        restored = array_to_landmarks(points, mask)
+        self.assertEqual([len(frame) for frame in restored], [1, 0, 2])
+        np.testing.assert_allclose(restored[2], self.landmarks[2], rtol=1e-6)
+
+    def test_hands_keep_their_handedness_slot(self):
+        """Test that hands are placed by handedness, not detection order"""
+        right, left = self.landmarks[2]
+
+        self.assertEqual(
+            order_hands([(left, "Left", 0.9), (right, "Right", 0.8)]), [right, left]
+        )
+        # A lone left hand keeps its slot, the right slot stays empty
+        landmarks = [order_hands([(left, "Left", 0.9)]), []]
+        self.assertEqual(landmarks[0], [[], left])
+        points, mask = landmarks_to_array(landmarks)
+        self.assertEqual(mask.tolist(), [[False, True], [False, False]])
+        self.assertEqual(array_to_landmarks(points, mask)[0][0], [])
+
+        # Two hands with the same label still fill both slots
+        self.assertEqual(
+            order_hands([(left, "Right", 0.6), (right, "Right", 0.9)]), [right, left]
+        )
+
+    def test_sequence_features_fill_missing_hands(self):
+        """Test that lost hands are interpolated and empty edges repeated"""
+        points = np.zeros((6, 2, 21, 3), dtype=np.float32)
+        points[:, 0] = np.arange(6)[:, None, None]
+        mask = np.zeros((6, 2), dtype=bool)
+        mask[[1, 4], 0] = True
+        mask[4, 1] = True
+
+        filled, present = fill_hand_gaps(points, mask)
+
+        # Right hand interpolated between frames 1 and 4, held at the edges
+        np.testing.assert_allclose(filled[:, 0, 0, 0], [1, 1, 2, 3, 4, 4])
+        self.assertEqual(present[:, 0].tolist(), [True] * 6)
+        # The left hand was only seen once, so it appears with frame 4 only
+        self.assertEqual(present[:, 1].tolist(), [False] * 4 + [True] * 2)
+
+        sequence = self.comparer.create_sequence_for_comparison(points, mask)
+        self.assertEqual(sequence.shape, (6, NUM_FEATURES))
+        self.assertEqual(sequence[0, -2:].tolist(), [1, 0])
+
+    def test_normalize_matches_per_point_normalization(self):
+        """Test that broadcast normalization matches normalizing each point"""
+        normalized = self.comparer.normalize_landmarks(self.landmarks)
+
+        for frame, frame_landmarks in enumerate(self.landmarks):
+            for hand_index, hand in enumerate(frame_landmarks):
+                hand = np.array(hand)
+                expected = (hand - hand[0]) / np.linalg.norm(hand[9] - hand[0])
+                np.testing.assert_allclose(
+                    normalized[frame, hand_index], expected, rtol=1e-4, atol=1e-5
+                )
+        self.assertFalse(normalized[1].any())
+        self.assertFalse(normalized[0, 1].any())
+
+    def test_compare_accepts_arrays_and_lists(self):
+        """Test that comparisons give the same result for lists and arrays"""
+        from_lists = self.comparer.compare_signs(self.landmarks, self.landmarks)
+        from_arrays = self.comparer.compare_signs(
+            landmarks_to_array(self.landmarks), landmarks_to_array(self.landmarks)
+        )
+
+        self.assertAlmostEqual(from_lists["similarity_score"], 100)
+        self.assertEqual(from_lists["frame_scores"], from_arrays["frame_scores"])
+        self.assertEqual(len(from_lists["frame_scores"]), len(from_lists["dtw_path"]))
+
+    def test_scores_are_per_present_hand(self):
+        """Test that two hands with the same error score like one hand"""
+        rng = np.random.default_rng(1)
+        points = rng.random((8, 2, 21, 3)).astype(np.float32)
+        points[:, 1] = points[:, 0]
+        attempt = points + rng.normal(0, 0.01, (8, 1, 21, 3)).astype(np.float32)
+        one_hand = np.array([[True, False]] * 8)
+        two_hands = np.ones((8, 2), dtype=bool)
+
+        one = self.comparer.compare_signs((points, one_hand), (attempt, one_hand))
+        two = self.comparer.compare_signs((points, two_hands), (attempt, two_hands))
+
+        self.assertGreaterEqual(one["similarity_score"], SUCCESS_SCORE)
+        self.assertAlmostEqual(two["similarity_score"], one["similarity_score"], 3)
+        np.testing.assert_allclose(two["frame_scores"], one["frame_scores"], 1e-4)
+
+        # Leaving out a hand of a two-handed sign costs score
+        missing = self.comparer.compare_signs((points, two_hands), (attempt, one_hand))
+        self.assertLess(missing["similarity_score"], SUCCESS_SCORE)
+
+
+class ResampleSequenceTests(TestCase):
+    def test_sequence_is_interpolated_to_the_target_rate(self):
+        """Test that a 30 fps sequence is resampled to 10 fps"""
+        sequence = np.arange(31, dtype=np.float32)[:, None].repeat(63, axis=1)
+
+        resampled = resample_sequence(sequence, 30, 10)
+
+        self.assertEqual(resampled.shape, (11, 63))
+        self.assertEqual(resampled.dtype, np.float32)
+        np.testing.assert_allclose(resampled[:, 0], np.arange(0, 31, 3))
+
+    def test_unknown_rates_leave_the_sequence_alone(self):
+        """Test that nothing is resampled without both frame rates"""
+        sequence = np.zeros((5, 63), dtype=np.float32)
+
+        self.assertIs(resample_sequence(sequence, None, 10), sequence)
+        self.assertIs(resample_sequence(sequence, 10, 10), sequence)
+
+
+class LandmarkStorageTests(TestCase):
+    def setUp(self):
+        self.sign = SignReference.objects.create(name="toki", meaning="talk")
+        rng = np.random.default_rng(0)
+        self.landmarks = [rng.random((2, 21, 3)).tolist(), []]
+
+    def test_landmarks_round_trip_through_model(self):
+        """Test that saved landmarks load back as arrays viewing the stored bytes"""
+        self.assertIsNone(load_landmarks_from_model(self.sign))
+
+        self.assertTrue(save_landmarks_to_model(self.sign, self.landmarks))
+        sign = SignReference.objects.get(pk=self.sign.pk)
+        points, mask = load_landmarks_from_model(sign)
+
+        self.assertTrue(sign.has_landmarks)
+        self.assertEqual(sign.landmark_shape, [2, 2, 21, 3])
+        self.assertEqual(mask.tolist(), [[True, True], [False, False]])
+        np.testing.assert_allclose(points[0], self.landmarks[0], rtol=1e-6)
+        self.assertFalse(points.flags.owndata)
+        self.assertFalse(points.flags.writeable)
+
+
+class ReferenceSequenceCacheTests(TestCase):
+    def setUp(self):
+        self.sign = SignReference.objects.create(name="pona", meaning="good")
+        rng = np.random.default_rng(0)
+        save_landmarks_to_model(self.sign, [rng.random((1, 21, 3)).tolist()] * 4)
+        self.cache = ReferenceSequenceCache(max_size=2)
+        self.comparer = SignComparer(static_image_mode=True)
+
+    def tearDown(self):
+        self.comparer.close()
+        reference_sequences.clear()
+
+    def test_cached_sequence_skips_loading(self):
+        """Test that a cached reference is neither reloaded nor renormalized"""
+        sign = SignReference.objects.defer("landmark_data").get(pk=self.sign.pk)
+        first = self.cache.get(sign, self.comparer.prepare_sequence)
+
+        with patch(
+            "apps.signing.services.reference_cache.load_landmarks_from_model"
+        ) as load:
+            with self.assertNumQueries(0):
+                second = self.cache.get(sign, self.comparer.prepare_sequence)
+
+        load.assert_not_called()
+        self.assertIs(first, second)
+        self.assertEqual(first.shape, (4, NUM_FEATURES))
+        self.assertFalse(first.flags.writeable)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_saving_a_sign_invalidates_its_sequence(self):
+        """Test that saved landmarks replace the cached reference"""
+        reference_sequences.get(self.sign, self.comparer.prepare_sequence)
+        self.assertEqual(reference_sequences.stats()["size"], 1)
+
+        save_landmarks_to_model(self.sign, [[]] * 6)
+        self.assertEqual(reference_sequences.stats()["size"], 0)
+
+        sequence = reference_sequences.get(
+            SignReference.objects.get(pk=self.sign.pk), self.comparer.prepare_sequence
+        )
+        self.assertEqual(len(sequence), 6)
+
+    def test_cache_is_bounded(self):
+        """Test that the least recently used references are evicted"""
+        signs = [self.sign]
+        for name in ("mi", "sina"):
+            sign = SignReference.objects.create(name=name, meaning=name)
+            save_landmarks_to_model(sign, [[]] * 3)
+            signs.append(sign)
+
+        for sign in signs:
+            self.cache.get(sign, self.comparer.prepare_sequence)
+
+        stats = self.cache.stats()
+        self.assertEqual(stats["size"], 2)
+        self.assertEqual(stats["bytes"], 2 * 3 * NUM_FEATURES * 4)
+
+    def test_reference_is_resampled_to_the_attempt_rate(self):
+        """Test that references with a known rate are cached per attempt rate"""
+        save_landmarks_to_model(self.sign, [[]] * 31, fps=30)
+        sign = SignReference.objects.get(pk=self.sign.pk)
+
+        self.assertEqual(len(self.cache.get(sign, self.comparer.prepare_sequence)), 31)
+        resampled = self.cache.get(sign, self.comparer.prepare_sequence, fps=10.2)
+
+        self.assertEqual(len(resampled), 11)
+        self.assertEqual(self.cache.stats()["size"], 2)
+
+    def test_outdated_landmarks_are_not_compared(self):
+        """Test that references saved in an older format must be reprocessed"""
+        SignReference.objects.filter(pk=self.sign.pk).update(landmark_format=None)
+        sign = SignReference.objects.get(pk=self.sign.pk)
+
+        self.assertTrue(sign.landmarks_outdated)
+        self.assertIsNone(self.cache.get(sign, self.comparer.prepare_sequence))
+        with self.assertRaisesMessage(AnalysisError, "processed again"):
+            analyze_attempt(None, sign, ["frame"])
+
+        save_landmarks_to_model(sign, [[]] * 4)
+        self.assertFalse(sign.landmarks_outdated)
+
+
+class SignAttemptTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="test")
+        self.sign = SignReference.objects.create(name="pona", meaning="good")
+        rng = np.random.default_rng(0)
+        save_landmarks_to_model(self.sign, [rng.random((1, 21, 3)).tolist()] * 6)
+
+        landmark_data, landmark_shape = pack_landmarks(
+            [rng.random((1, 21, 3)).tolist()] * 3
+        )
+        frame = np.full((120, 160, 3), 128, dtype=np.uint8)
+        self.attempt = SignAttempt.objects.create(
+            user=self.user,
+            sign=self.sign,
+            similarity_score=75.0,
+            landmark_data=landmark_data,
+            landmark_shape=landmark_shape,
+            keyframes=[{"frame": 0, "image": convert_frames_to_base64([frame])[0]}],
+            alignment=[[0, 90.0], [2, 60.0], [5, 80.0]],
+        )
+
+    def test_alignment_maps_learner_frames_to_reference_frames(self):
+        """Test that each learner frame keeps its first match on the DTW path"""
+        self.sign.landmark_shape = [30, 2, 21, 3]
+        results = {
+            "dtw_path": [(0, 0), (1, 0), (2, 1), (3, 2), (3, 3)],
+            "frame_scores": [90.0, 80.0, 70.0, 60.0, 50.0],
+        }
+
+        alignment = align_frames(results, 4, 3.0, self.sign)
+
+        self.assertEqual(alignment, [[0, 90.0], [6, 70.0], [9, 60.0], [9, 50.0]])
+        self.assertEqual(align_frames({"dtw_path": []}, 4, 1, self.sign), [])
+
+    def test_keyframes_are_spread_and_downscaled(self):
+        """Test that a few evenly spaced keyframes are kept at a small size"""
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        base64_frames = convert_frames_to_base64([frame]) * 10
+
+        keyframes = encode_keyframes(base64_frames, 4, 160)
+
+        self.assertEqual([k["frame"] for k in keyframes], [0, 3, 6, 9])
+        self.assertTrue(keyframes[0]["image"].startswith("data:image/jpeg;base64,"))
+
+    @patch(
+        "apps.signing.services.attempt_visualization.reference_video_path",
+        return_value=None,
+    )
+    def test_comparison_is_rendered_once(self, video_path):
+        """Test that comparison frames are drawn from storage and then reused"""
+        frames = get_comparison_frames(self.attempt)
+
+        self.assertEqual(len(frames), 3)
+        self.assertTrue(self.attempt.visualization.name.endswith(".json"))
+        self.addCleanup(self.attempt.visualization.delete, save=False)
+
+        attempt = SignAttempt.objects.get(pk=self.attempt.pk)
+        with patch(
+            "apps.signing.services.attempt_visualization.render_comparison_frames"
+        ) as render:
+            self.assertEqual(get_comparison_frames(attempt), frames)
+        render.assert_not_called()
+
+
+class RecordAttemptTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="test")
+        self.sign = SignReference.objects.create(name="pona", meaning="good")
+        SigningProgress.objects.create(user=self.user, sign=self.sign, attempts=5)
+
+    def test_concurrent_attempts_are_all_counted(self):
+        """Test that attempts recorded at the same time do not overwrite each other"""
+        save = SigningProgress.save
+
+        def slow_save(progress, *args, **kwargs):
+            # Give the other attempt time to read the same count
+            time.sleep(0.2)
+            save(progress, *args, **kwargs)
+
+        def record():
+            try:
+                record_attempt(self.user, self.sign, is_successful=True)
+            finally:
+                connection.close()
+
+        with patch.object(SigningProgress, "save", slow_save):
+            threads = [threading.Thread(target=record) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        progress = SigningProgress.objects.get(user=self.user, sign=self.sign)
+        self.assertEqual(progress.attempts, 7)
+        self.assertEqual(progress.successful_attempts, 2)
+
+
+class ReferenceClipTests(TestCase):
+    def setUp(self):
+        self.sign = SignReference.objects.create(name="pona", meaning="good")
+        self.points = np.full((10, 2, 21, 3), 0.5, dtype=np.float32)
+        self.mask = np.zeros((10, 2), dtype=bool)
+        self.mask[:, 0] = True
+        # Every other frame, each a different shade
+        self.clip_frames = [
+            (index, np.full((48, 64, 3), index * 20, dtype=np.uint8))
+            for index in range(0, 10, 2)
+        ]
+
+    def test_sprite_round_trip(self):
+        """Test that annotated frames are tiled and cut back out in order"""
+        image_bytes, layout = build_reference_clip(
+            self.clip_frames, self.points, self.mask, fps=5
+        )
+
+        self.assertEqual(layout["source_frames"], [0, 2, 4, 6, 8])
+        self.assertEqual((layout["frame_width"], layout["frame_height"]), (64, 48))
+        frames = split_reference_clip(image_bytes, layout)
+        self.assertEqual(len(frames), 5)
+        self.assertEqual(frames[0].shape, (48, 64, 3))
+        # Landmarks were drawn, the corners keep the frame's shade
+        self.assertAlmostEqual(int(frames[3][0, 0, 0]), 120, delta=8)
+        self.assertGreater(np.abs(frames[3].astype(int) - 120).max(), 50)
+
+        self.assertEqual(nearest_clip_frame(layout, 5), 2)
+        self.assertEqual(nearest_clip_frame(layout, 100), 4)
+        self.assertIsNone(build_reference_clip([], self.points, self.mask))
+
+    def test_stored_clip_is_used_for_comparisons(self):
+        """Test that comparison frames come from the stored clip, not the video"""
+        self.assertIsNone(load_reference_clip(self.sign))
+
+        self.assertTrue(
+            save_reference_clip_to_model(
+                self.sign,
+                *build_reference_clip(self.clip_frames, self.points, self.mask),
+            )
+        )
+        self.addCleanup(self.sign.annotated_clip.delete, save=False)
+
+        sign = SignReference.objects.get(pk=self.sign.pk)
+        with patch(
+            "apps.signing.services.attempt_visualization.decode_reference_frames"
+        ) as decode:
+            clip_frame = load_reference_clip(sign)
+        decode.assert_not_called()
+        self.assertEqual(clip_frame(7).shape, (48, 64, 3))
+
+
+def moving_hand(rng, frames, direction):
+    """Landmarks of one hand sliding across the frame in a direction."""
+    hand = rng.random((21, 3)) * 0.1
+    return [
+        [(hand + np.asarray(direction) * t / frames).tolist()] for t in range(frames)
+    ]
+
+
+class SignIndexTests(TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.comparer = SignComparer(static_image_mode=True)
+        self.addCleanup(self.comparer.close)
+        self.addCleanup(sign_index.clear)
+        self.addCleanup(reference_sequences.clear)
+
+        # Hand shapes differ by sign, so their normalized sequences do too
+        self.landmarks = {}
+        for name in ("mi", "sina", "ona", "pona"):
+            sign = SignReference.objects.create(name=name, meaning=name)
+            self.landmarks[name] = moving_hand(self.rng, 20, (0.5, 0.2, 0))
+            save_landmarks_to_model(sign, self.landmarks[name], fps=30)
+        SignReference.objects.create(name="unprocessed", meaning="unprocessed")
+
+    def test_nearest_signs_are_ranked_by_lower_bound(self):
+        """Test that the attempt's own sign has the smallest lower bound"""
+        index = SignIndex(length=16, candidates=2)
+        # The same sign, performed faster
+        attempt = self.comparer.prepare_sequence(self.landmarks["ona"][::2])
+
+        nearest = index.nearest(attempt, self.comparer.prepare_sequence)
+
+        self.assertEqual(len(nearest), 2)
+        self.assertEqual(nearest[0][0].name, "ona")
+        self.assertLessEqual(nearest[0][1], nearest[1][1])
+        self.assertEqual(index.size(), 4)
+
+        # Signs are loaded once, until one of them changes
+        with self.assertNumQueries(1):
+            index.nearest(attempt, self.comparer.prepare_sequence)
+        sign = SignReference.objects.get(name="unprocessed")
+        save_landmarks_to_model(sign, moving_hand(self.rng, 10, (0, 0.5, 0)))
+        index.nearest(attempt, self.comparer.prepare_sequence)
+        self.assertEqual(index.size(), 5)
+
+        # Signs in an outdated landmark format are left out
+        SignReference.objects.filter(name="ona").update(landmark_format=1)
+        nearest = index.nearest(attempt, self.comparer.prepare_sequence)
+        self.assertEqual(index.size(), 4)
+        self.assertNotIn("ona", [sign.name for sign, _ in nearest])
+
+    @patch.object(sign_index, "candidates", 2)
+    @patch("apps.signing.services.analysis._track_attempt")
+    def test_recognition_compares_only_candidates(self, track):
+        """Test that exact DTW only runs on the prefiltered candidates"""
+        track.return_value = self.landmarks["sina"][::3]
+
+        with patch.object(
+            SignComparer,
+            "compare_sequences",
+            autospec=True,
+            side_effect=SignComparer.compare_sequences,
+        ) as compare:
+            result = recognize_attempt(["frame"], fps=10)
+
+        self.assertEqual(compare.call_count, 2)
+        self.assertEqual(result["candidates"], 2)
+        self.assertEqual(result["indexed"], 4)
+        self.assertEqual(result["matches"][0]["name"], "sina")
+        scores = [match["similarity_score"] for match in result["matches"]]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    @patch.object(sign_index, "candidates", 4)
+    @patch("apps.signing.services.analysis._track_attempt")
+    def test_recognition_leaves_out_abandoned_and_cleared_signs(self, track):
+        """Test that only fully compared candidates are returned as matches"""
+        track.return_value = self.landmarks["sina"][::3]
+        get_reference = reference_sequences.get
+
+        def cleared_ona(sign, *args, **kwargs):
+            if sign.name == "ona":
+                return None
+            return get_reference(sign, *args, **kwargs)
+
+        with patch.object(reference_sequences, "get", side_effect=cleared_ona):
+            result = recognize_attempt(["frame"], fps=10)
+
+        names = [match["name"] for match in result["matches"]]
+        self.assertEqual(names[0], "sina")
+        self.assertNotIn("ona", names)
+        self.assertLess(len(names), 3)
+        self.assertTrue(
+            all(match["similarity_score"] > 0 for match in result["matches"])
+        )
+
+
+def fake_s3_client(objects, page_size=2):
+    """Mock S3 client serving objects from memory, honouring ranged GETs."""
+    client = MagicMock()
+    keys = sorted(objects)
+    client.get_paginator.return_value.paginate.return_value = [
+        {
+            "Contents": [
+                {
+                    "Key": key,
+                    "ETag": f'"{hashlib.md5(objects[key]).hexdigest()}"',
+                    "Size": len(objects[key]),
+                }
+                for key in keys[start : start + page_size]
+            ]
+        }
+        for start in range(0, len(keys), page_size)
+    ]
+
+    def get_object(Bucket, Key, Range=None, **kwargs):
+        data = objects[Key]
+        if Range:
+            first, last = re.match(r"bytes=(\d+)-(\d*)", Range).groups()
+            data = data[int(first) : int(last) + 1 if last else None]
+        return {"Body": io.BytesIO(data)}
+
+    client.get_object.side_effect = get_object
+    return client
+
+
+class VideoSyncTests(TestCase):
+    def setUp(self):
+        self.static_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static_dir, ignore_errors=True)
+        self.objects = {
+            f"videos/lukapona/mp4/{name}.mp4": name.encode() * 100
+            for name in ("mi", "pona", "sina", "toki", "olin")
+        }
+        with (
+            override_settings(
+                USE_S3_STORAGE=True,
+                STATICFILES_DIRS=[self.static_dir],
+                AWS_STORAGE_BUCKET_NAME="videos",
+            ),
+            patch(
+                "apps.signing.services.video_manager.get_s3_client",
+                return_value=fake_s3_client(self.objects),
+            ),
+        ):
+            self.manager = VideoManager()
+
+    def read_video(self, name):
+        with open(self.manager.get_local_video_path(name), "rb") as f:
+            return f.read()
+
+    def test_sync_lists_every_page_and_downloads_without_head(self):
+        """Test that every listed page is synced with GETs only"""
+        result = self.manager.sync_from_s3(workers=3)
+
+        self.assertCountEqual(
+            result["downloaded"], ["mi", "pona", "sina", "toki", "olin"]
+        )
+        self.assertEqual(self.read_video("toki"), b"toki" * 100)
+        self.manager.s3_client.head_object.assert_not_called()
+
+        with open(
+            os.path.join(
+                self.static_dir, "videos", "lukapona", "mp4", MANIFEST_FILENAME
+            )
+        ) as f:
+            manifest = json.load(f)
+        self.assertEqual(manifest["toki"]["size"], 400)
+
+    def test_unchanged_videos_are_skipped(self):
+        """Test that a second sync only downloads videos whose ETag changed"""
+        self.manager.sync_from_s3()
+        self.objects["videos/lukapona/mp4/toki.mp4"] = b"new toki" * 50
+        self.manager.s3_client = fake_s3_client(self.objects)
+
+        result = self.manager.sync_from_s3()
+
+        self.assertEqual(result["downloaded"], ["toki"])
+        self.assertEqual(len(result["skipped"]), 4)
+        self.assertEqual(self.read_video("toki"), b"new toki" * 50)
+
+    def test_existing_videos_without_manifest_are_checked_by_md5(self):
+        """Test that videos downloaded before the manifest are not fetched again"""
+        with open(self.manager.get_local_video_path("mi"), "wb") as f:
+            f.write(b"mi" * 100)
+
+        result = self.manager.sync_from_s3(["mi", "ike"])
+
+        self.assertEqual(result["skipped"], ["mi"])
+        self.assertEqual(result["missing"], ["ike"])
+        self.manager.s3_client.get_object.assert_not_called()
+
+    def test_large_videos_are_downloaded_in_ranges(self):
+        """Test that videos over the chunk size are fetched with ranged GETs"""
+        data = os.urandom(11 * 1024 * 1024)
+        self.manager.s3_client = fake_s3_client({"videos/lukapona/mp4/ale.mp4": data})
+        chunks = {**settings.S3_CLIENT, "TRANSFER_CHUNK_BYTES": 5 * 1024 * 1024}
+
+        with override_settings(S3_CLIENT=chunks):
+            self.manager.sync_from_s3()
+
+        self.assertEqual(self.read_video("ale"), data)
+        ranges = [
+            call.kwargs.get("Range")
+            for call in self.manager.s3_client.get_object.call_args_list
+        ]
+        self.assertEqual(len(ranges), 3)
+        self.assertTrue(all(ranges))
@@ -1,10 +1,12 @@
 import json
+from unittest.mock import patch
 
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from apps.signing.models import SigningProgress, SignReference
+from apps.signing.models import SignAttempt, SigningProgress, SignReference
 
 
 class SigningViewsTests(TestCase):
@@ -102,3 +104,140 @@ class SigningViewsTests(TestCase):
 
         self.assertEqual(analyze_response.status_code, 302)
         self.assertIn("/accounts/login/", analyze_response.url)
+
+    @override_settings(
+        SIGNING={
+            "ANALYSIS_MAX_PAYLOAD_BYTES": 1024,
+            "ANALYSIS_FPS": 10,
+            "ANALYSIS_MAX_FRAMES": 60,
+            "MAX_FRAME_BYTES": 30,
+        }
+    )
+    def test_analyze_sign_rejects_oversized_uploads(self):
+        """Test that oversized recordings and frames are refused before decoding"""
+        url = reverse("signing:analyze_sign")
+
+        response = self.client.post(
+            url,
+            json.dumps({"sign_id": self.beginner_sign.id, "frames": ["a" * 2048]}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 413)
+
+        response = self.client.post(
+            url,
+            json.dumps({"sign_id": self.beginner_sign.id, "frames": ["a" * 100]}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response.json()["error"], "Frame is too large")
+        self.assertEqual(SigningProgress.objects.get(pk=self.progress.pk).attempts, 5)
+
+    def test_analyze_sign_reads_bodies_up_to_the_payload_limit(self):
+        """Test that Django does not refuse recordings below the analysis limit"""
+        response = self.client.post(
+            reverse("signing:analyze_sign"),
+            json.dumps({"sign_id": self.beginner_sign.id, "frames": ["a" * 3_000_000]}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response.json()["error"], "Frame is too large")
+
+    def test_analyze_sign_rejects_non_string_frames(self):
+        """Test that frames other than base64 strings are a client error"""
+        for url in (reverse("signing:analyze_sign"), reverse("signing:recognize_sign")):
+            response = self.client.post(
+                url,
+                json.dumps({"sign_id": self.beginner_sign.id, "frames": ["a", 1]}),
+                content_type="application/json",
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()["error"], "Invalid frame data")
+
+    @override_settings(SIGNING={**settings.SIGNING, "ANALYSIS_ASYNC": True})
+    def test_analyze_sign_queues_attempt(self):
+        """Test that in task mode attempts are queued and answered right away"""
+        with patch("apps.signing.views.analyze_sign_attempt.apply_async") as queue:
+            response = self.client.post(
+                reverse("signing:analyze_sign"),
+                json.dumps(
+                    {"sign_id": self.beginner_sign.id, "frames": ["a"] * 30, "fps": 30}
+                ),
+                content_type="application/json",
+            )
+
+        self.assertEqual(response.status_code, 202)
+        attempt_id = response.json()["attempt_id"]
+        args = queue.call_args.kwargs["args"]
+        self.assertEqual(queue.call_args.kwargs["task_id"], attempt_id)
+        self.assertEqual(args[:3], (attempt_id, self.user.id, self.beginner_sign.id))
+        # Frames are selected before queueing, so workers get bounded work
+        self.assertEqual(len(args[3]), 10)
+        self.assertEqual(SigningProgress.objects.get(pk=self.progress.pk).attempts, 5)
+
+    def test_comparison_visualization_serves_stored_attempt(self):
+        """Test that comparisons are served for the user's own attempts only"""
+        attempt = SignAttempt.objects.create(
+            user=self.user, sign=self.beginner_sign, similarity_score=50.0
+        )
+        url = reverse("signing:comparison_visualization", args=[self.beginner_sign.id])
+
+        with patch(
+            "apps.signing.views.get_comparison_frames", return_value=["frame"]
+        ) as frames:
+            response = self.client.get(url, {"attempt_id": str(attempt.id)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"frames": ["frame"], "total_frames": 1})
+        self.assertEqual(frames.call_args.args[0], attempt)
+
+        other = User.objects.create_user(username="other", password="testpassword")
+        self.client.force_login(other)
+        response = self.client.get(url, {"attempt_id": str(attempt.id)})
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client.get(url, {"attempt_id": "not-a-uuid"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_annotated_reference_points_at_storage(self):
+        """Test that the annotated clip is served by its storage URL"""
+        url = reverse("signing:annotated_reference", args=[self.beginner_sign.id])
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+
+        layout = {"frame_width": 64, "frame_height": 48, "columns": 8}
+        self.beginner_sign.annotated_clip.name = "signs/annotated/beginner.jpg"
+        self.beginner_sign.annotated_clip_layout = layout
+        self.beginner_sign.save()
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {"url": self.beginner_sign.annotated_clip.url, "layout": layout},
+        )
+
+    def test_recognize_sign_ranks_selected_frames(self):
+        """Test that free practice attempts are bounded and recognized"""
+        url = reverse("signing:recognize_sign")
+
+        response = self.client.post(url, "{}", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+        matches = {"matches": [], "candidates": 0, "indexed": 0}
+        with patch(
+            "apps.signing.views.recognize_attempt", return_value=matches
+        ) as recognize:
+            response = self.client.post(
+                url,
+                json.dumps({"frames": ["frame"] * 300, "fps": 30}),
+                content_type="application/json",
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), matches)
+        frames, fps = recognize.call_args.args
+        # Ten seconds are spread over the frame limit
+        self.assertEqual(len(frames), settings.SIGNING["ANALYSIS_MAX_FRAMES"])
+        self.assertEqual(fps, 6)
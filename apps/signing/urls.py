@@ -8,7 +8,13 @@ urlpatterns = [
     path("", views.index, name="index"),
     path("practice/<int:pk>/", views.practice, name="practice"),
     path("analyze-sign/", views.analyze_sign, name="analyze_sign"),
+    path("recognize-sign/", views.recognize_sign, name="recognize_sign"),
     path("track-hands/", views.track_hands, name="track_hands"),
+    path(
+        "annotated-reference/<int:pk>/",
+        views.annotated_reference,
+        name="annotated_reference",
+    ),
     path(
         "comparison-visualization/<int:pk>/",
         views.comparison_visualization,
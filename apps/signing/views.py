@@ -1,22 +1,75 @@
 import json
 import logging
+import uuid
 
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import RequestDataTooBig
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, render
 from django.views.decorators.http import require_POST
 
-from .models import SigningProgress, SignReference
-from .services import (
-    SignComparer,
-    SignVisualizer,
-    convert_frames_to_base64,
-    load_landmarks_from_model,
-)
+from apps.core.pool import PoolTimeoutError
+
+from .models import SignAttempt, SigningProgress, SignReference
+from .services import acquire_sign_comparer
+from .services.analysis import AnalysisError, analyze_attempt, recognize_attempt
+from .services.attempt_visualization import get_comparison_frames
+from .services.frame_source import select_frames
+from .tasks import analyze_sign_attempt
 
 logger = logging.getLogger(__name__)
 
 
+def _payload_too_large(request):
+    """Whether a request declares a body above the sign analysis limit."""
+    try:
+        length = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        return False
+    return length > settings.SIGNING["ANALYSIS_MAX_PAYLOAD_BYTES"]
+
+
+def _invalid_frames(base64_frames):
+    """Whether any frame sent by the client is not a base64 string."""
+    return not all(isinstance(frame, str) for frame in base64_frames)
+
+
+def _select_attempt_frames(base64_frames, fps):
+    """
+    Pick the attempt frames to analyze, before decoding any of them.
+
+    Args:
+        base64_frames: Base64 encoded frames sent by the client
+        fps: Capture rate reported by the client, if any
+
+    Returns:
+        tuple: Selected frames and their frame rate
+
+    Raises:
+        ValueError: If a selected frame is larger than allowed
+    """
+    limits = settings.SIGNING
+    try:
+        fps = float(fps) if fps else None
+    except (TypeError, ValueError):
+        fps = None
+
+    frames, fps = select_frames(
+        base64_frames,
+        # Clients that do not report a rate capture at the analysis rate
+        source_fps=fps or limits["ANALYSIS_FPS"],
+        target_fps=limits["ANALYSIS_FPS"],
+        max_frames=limits["ANALYSIS_MAX_FRAMES"],
+    )
+
+    # Base64 takes 4 characters for every 3 bytes
+    if any(len(frame) * 3 // 4 > limits["MAX_FRAME_BYTES"] for frame in frames):
+        raise ValueError("Frame is too large")
+
+    return frames, fps
+
+
 @login_required
 def index(request):
     """Display a list of signs organized by difficulty."""
@@ -65,6 +118,7 @@ def practice(request, pk):
     context = {
         "sign": sign,
         "progress": progress,
+        "analysis_async": settings.SIGNING["ANALYSIS_ASYNC"],
     }
 
     return render(request, "signing/practice.html", context)
@@ -74,77 +128,89 @@ def practice(request, pk):
 @require_POST
 def analyze_sign(request):
     """Process and evaluate a user's sign attempt."""
+    if _payload_too_large(request):
+        return JsonResponse({"error": "Recording is too large"}, status=413)
+
     try:
         data = json.loads(request.body)
         sign_id = data.get("sign_id")
         base64_frames = data.get("frames", [])
 
-        if not sign_id or not base64_frames:
+        if not sign_id or not base64_frames or not isinstance(base64_frames, list):
             return JsonResponse({"error": "Missing required data"}, status=400)
+        if _invalid_frames(base64_frames):
+            return JsonResponse({"error": "Invalid frame data"}, status=400)
+
+        # Bound decoding and hand tracking work regardless of what was sent
+        try:
+            base64_frames, fps = _select_attempt_frames(base64_frames, data.get("fps"))
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=413)
+
+        # Reference landmarks are only loaded if they are not cached yet
+        sign = get_object_or_404(
+            SignReference.objects.defer("landmark_data"), pk=sign_id
+        )
 
-        sign = get_object_or_404(SignReference, pk=sign_id)
-
-        # Initialize services
-        sign_comparer = SignComparer()
-
-        # Get reference landmarks
-        reference_landmarks = load_landmarks_from_model(sign)
-        if not reference_landmarks:
-            return JsonResponse(
-                {"error": "No reference landmarks available for this sign"}, status=400
+        if settings.SIGNING["ANALYSIS_ASYNC"]:
+            # Score on a worker, the result is pushed over the attempts socket
+            attempt_id = str(uuid.uuid4())
+            analyze_sign_attempt.apply_async(
+                args=(attempt_id, request.user.id, sign.id, base64_frames, fps),
+                task_id=attempt_id,
             )
-
-        # Extract landmarks from user's attempt
-        learner_landmarks = sign_comparer.extract_landmarks_from_base64_frames(
-            base64_frames
-        )
-        if not learner_landmarks or all(not frame for frame in learner_landmarks):
             return JsonResponse(
-                {"error": "Could not detect hand landmarks in your sign"}, status=400
+                {"attempt_id": attempt_id, "status": "queued"}, status=202
             )
 
-        # Compare signs
-        comparison_results = sign_comparer.compare_signs(
-            reference_landmarks, learner_landmarks
+        return JsonResponse(analyze_attempt(request.user, sign, base64_frames, fps))
+
+    except AnalysisError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    except PoolTimeoutError:
+        return JsonResponse(
+            {"error": "Hand tracking is busy, please try again"}, status=503
         )
-        feedback = sign_comparer.generate_feedback(comparison_results)
+    except RequestDataTooBig:
+        return JsonResponse({"error": "Recording is too large"}, status=413)
+    except Exception as e:
+        logger.exception(f"Error analyzing sign: {e}")
+        return JsonResponse({"error": str(e)}, status=500)
 
-        # Determine if attempt was successful
-        similarity_score = comparison_results["similarity_score"]
-        is_successful = similarity_score >= 80
 
-        # Update user progress
-        progress, created = SigningProgress.objects.get_or_create(
-            user=request.user, sign=sign
-        )
+@login_required
+@require_POST
+def recognize_sign(request):
+    """Find which sign a free practice attempt shows."""
+    if _payload_too_large(request):
+        return JsonResponse({"error": "Recording is too large"}, status=413)
+
+    try:
+        data = json.loads(request.body)
+        base64_frames = data.get("frames", [])
 
-        progress.attempts += 1
-        if is_successful:
-            progress.successful_attempts += 1
+        if not base64_frames or not isinstance(base64_frames, list):
+            return JsonResponse({"error": "Missing required data"}, status=400)
+        if _invalid_frames(base64_frames):
+            return JsonResponse({"error": "Invalid frame data"}, status=400)
 
-            # Mark as mastered if they've succeeded at least 3 times with >70% accuracy
-            if progress.successful_attempts >= 3 and progress.accuracy >= 70:
-                progress.mastered = True
+        try:
+            base64_frames, fps = _select_attempt_frames(base64_frames, data.get("fps"))
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=413)
 
-        progress.save()
+        return JsonResponse(recognize_attempt(base64_frames, fps))
 
-        # Return results
+    except AnalysisError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    except PoolTimeoutError:
         return JsonResponse(
-            {
-                "similarity_score": similarity_score,
-                "feedback": feedback["overall_score"],
-                "rating": feedback["rating"],
-                "is_successful": is_successful,
-                "areas_for_improvement": feedback["weak_points"],
-                "attempts": progress.attempts,
-                "successful_attempts": progress.successful_attempts,
-                "accuracy": progress.accuracy,
-                "mastered": progress.mastered,
-            }
+            {"error": "Hand tracking is busy, please try again"}, status=503
         )
-
+    except RequestDataTooBig:
+        return JsonResponse({"error": "Recording is too large"}, status=413)
     except Exception as e:
-        logger.exception(f"Error analyzing sign: {e}")
+        logger.exception(f"Error recognizing sign: {e}")
         return JsonResponse({"error": str(e)}, status=500)
 
 
@@ -159,15 +225,19 @@ def track_hands(request):
         if not base64_frame:
             return JsonResponse({"error": "No frame provided"}, status=400)
 
-        # Initialize services
-        sign_comparer = SignComparer()
-
-        # Process single frame
-        landmarks = sign_comparer.extract_landmarks_from_base64_frames([base64_frame])
+        # Process single frame with a pooled static image tracker
+        with acquire_sign_comparer(single_frame=True) as sign_comparer:
+            landmarks = sign_comparer.extract_landmarks_from_base64_frames(
+                [base64_frame]
+            )
 
         # Return the landmarks for the frontend to visualize
         return JsonResponse({"landmarks": landmarks[0] if landmarks else []})
 
+    except PoolTimeoutError:
+        return JsonResponse(
+            {"error": "Hand tracking is busy, please try again"}, status=503
+        )
     except Exception as e:
         logger.exception(f"Error tracking hands: {e}")
         return JsonResponse({"error": str(e)}, status=500)
@@ -175,38 +245,52 @@ def track_hands(request):
 
 @login_required
 def comparison_visualization(request, pk):
-    """Generate a comparison visualization between the reference sign and the user's attempt."""
-    try:
-        sign = get_object_or_404(SignReference, pk=pk)
-        attempt_id = request.GET.get("attempt_id")
+    """Show the user's stored attempt side by side with the reference sign."""
+    attempt_id = request.GET.get("attempt_id")
 
-        if not attempt_id:
-            return JsonResponse({"error": "No attempt ID provided"}, status=400)
-
-        # In a real implementation, we would retrieve the user's recorded attempt
-        # For now, we'll just compare with the reference
-
-        # Initialize services
-        sign_visualizer = SignVisualizer()
-
-        # Mock visualization (in a real app, we'd use stored attempt frames)
-        # Just returning the reference visualization for now
-        if sign.video:
-            # Get frames from the video
-            reference_frames = sign_visualizer.process_video_frames(sign.video.path)
-            processed_frames, _ = sign_visualizer.extract_frames_with_landmarks(
-                reference_frames
-            )
+    if not attempt_id:
+        return JsonResponse({"error": "No attempt ID provided"}, status=400)
 
-            # Convert frames to base64 for the frontend
-            base64_frames = convert_frames_to_base64(processed_frames)
+    try:
+        attempt_id = uuid.UUID(attempt_id)
+    except ValueError:
+        return JsonResponse({"error": "Invalid attempt ID"}, status=400)
+
+    attempt = get_object_or_404(
+        SignAttempt.objects.select_related("sign"),
+        pk=attempt_id,
+        sign_id=pk,
+        user=request.user,
+    )
 
+    try:
+        # Drawn from stored landmarks once, then served from storage
+        base64_frames = get_comparison_frames(attempt)
+        if not base64_frames:
             return JsonResponse(
-                {"frames": base64_frames, "total_frames": len(base64_frames)}
+                {"error": "No landmarks available for this attempt"}, status=404
             )
-        else:
-            return JsonResponse({"error": "No reference video available"}, status=404)
+
+        return JsonResponse(
+            {"frames": base64_frames, "total_frames": len(base64_frames)}
+        )
 
     except Exception as e:
         logger.exception(f"Error generating comparison visualization: {e}")
         return JsonResponse({"error": str(e)}, status=500)
+
+
+@login_required
+def annotated_reference(request, pk):
+    """Get the storage URL and layout of a sign's annotated reference clip."""
+    sign = get_object_or_404(SignReference, pk=pk)
+
+    if not sign.annotated_clip or not sign.annotated_clip_layout:
+        return JsonResponse(
+            {"error": "No annotated clip available for this sign"}, status=404
+        )
+
+    # Served by storage (or its CDN), the clip was drawn when the sign was processed
+    return JsonResponse(
+        {"url": sign.annotated_clip.url, "layout": sign.annotated_clip_layout}
+    )
@@ -13,10 +13,11 @@ class WritingConfig(AppConfig):
         We use it to initialize our services.
         """
         try:
-            # Import services and initialize them if needed
+            # Character recognition is loaded on demand, or by the warm-up the
+            # ASGI server runs at startup when WARMUP["ENABLED"] is set
+            from apps.core.warmup import warmup
 
-            # Only initialize character recognition on demand to avoid
-            # loading the ML model unnecessarily on startup
+            warmup.register("writing.recognition", _warm_up_recognition)
 
             # Log that services are initialized
             import logging
@@ -28,3 +29,10 @@ class WritingConfig(AppConfig):
 
             logger = logging.getLogger(__name__)
             logger.error(f"Error initializing Writing app services: {e}")
+
+
+def _warm_up_recognition():
+    """Load the recognition model, template embeddings and embedders."""
+    from apps.writing.services import character_recognition
+
+    character_recognition.warm_up()
@@ -38,6 +38,9 @@ class Command(BaseCommand):
         # Process the SVG files
         self._process_svg_files(svg_files)
 
+        # Precompute template embeddings so workers don't embed them on startup
+        self._build_template_embeddings()
+
     def _cleanup_legacy_directories(self):
         """Clean up old incorrect model directory if it exists."""
         root_ml_models = Path(settings.BASE_DIR) / "ml_models"
@@ -1001,6 +1004,21 @@ class Command(BaseCommand):
             )
         )
 
+    def _build_template_embeddings(self):
+        """Build the stored template embeddings used by character recognition."""
+        from apps.writing.services.recognition import character_recognition
+
+        self.stdout.write(self.style.NOTICE("Building template embeddings..."))
+        try:
+            count = character_recognition.build_template_embeddings()
+            self.stdout.write(
+                self.style.SUCCESS(f"Stored embeddings for {count} templates")
+            )
+        except Exception as e:
+            self.stderr.write(
+                self.style.WARNING(f"Could not build template embeddings: {e}")
+            )
+
     def _process_single_svg(
         self,
         svg_file,
@@ -3,20 +3,43 @@ Service for managing ML model storage and retrieval.
 """
 
 import hashlib
+import json
 import logging
 import os
 import tempfile
 import time
 import urllib.request
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
 
-import boto3
+import numpy as np
 from botocore.exceptions import ClientError
 from django.conf import settings
 from django.core.cache import cache
 
+from apps.core.s3 import get_s3_client, get_transfer_config
+
 logger = logging.getLogger(__name__)
 
 
+@contextmanager
+def _replacing(path):
+    """
+    Get a unique temporary path next to a file, moved over the file on success.
+
+    Concurrent writers each get their own temporary file, and readers never
+    see a partial file.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
 class ModelStorageService:
     """
     Service for managing ML model storage and retrieval.
@@ -28,6 +51,9 @@ class ModelStorageService:
     # Cache keys for models
     MOBILENET_CACHE_KEY = "mobilenet_model_path"
 
+    # File name prefix for precomputed template embeddings
+    TEMPLATE_EMBEDDINGS_PREFIX = "template_embeddings"
+
     def __init__(self):
         """Initialize the model storage service."""
         self.use_s3 = settings.ML_MODELS_STORAGE["USE_S3"]
@@ -101,14 +127,13 @@ class ModelStorageService:
             cache.set(self.MOBILENET_CACHE_KEY, local_path, timeout=3600)  # 1 hour
             return local_path
 
-        # Check if the model exists in S3
-        s3_client = boto3.client("s3")
+        # Download from S3 to temporary file; the transfer's own HEAD request
+        # fails with 404 if the model is not in S3 yet
+        s3_client = get_s3_client()
         try:
-            s3_client.head_object(Bucket=self.s3_bucket, Key=s3_key)
-            logger.info(f"Found MobileNet model in S3 at {s3_key}")
-
-            # Download from S3 to temporary file
-            s3_client.download_file(self.s3_bucket, s3_key, local_path)
+            s3_client.download_file(
+                self.s3_bucket, s3_key, local_path, Config=get_transfer_config()
+            )
             logger.info(f"Downloaded MobileNet model from S3 to {local_path}")
 
         except ClientError as e:
@@ -155,9 +180,13 @@ class ModelStorageService:
         """Upload a local file to S3."""
         try:
             logger.info(f"Uploading {local_path} to S3 at {s3_key}")
-            s3_client = boto3.client("s3")
+            s3_client = get_s3_client()
             s3_client.upload_file(
-                local_path, self.s3_bucket, s3_key, ExtraArgs={"ACL": "public-read"}
+                local_path,
+                self.s3_bucket,
+                s3_key,
+                ExtraArgs={"ACL": "public-read"},
+                Config=get_transfer_config(),
             )
             logger.info("Upload complete")
             return True
@@ -165,6 +194,137 @@ class ModelStorageService:
             logger.error(f"Error uploading to S3: {str(e)}")
             return False
 
+    def _get_local_artifact_dir(self):
+        """Get the local directory used for downloaded or generated artifacts."""
+        if self.use_s3:
+            return tempfile.gettempdir()
+        return self.local_models_dir
+
+    def get_template_embeddings_name(self, model_hash, template_version):
+        """Get the artifact name for a model hash and template set version."""
+        return f"{self.TEMPLATE_EMBEDDINGS_PREFIX}_{model_hash}_{template_version}"
+
+    def _get_template_embeddings_paths(self, name):
+        """Get local paths of the embedding matrix and its metadata file."""
+        local_dir = self._get_local_artifact_dir()
+        return (
+            os.path.join(local_dir, f"{name}.npy"),
+            os.path.join(local_dir, f"{name}.json"),
+        )
+
+    def save_template_embeddings(
+        self,
+        model_hash: str,
+        template_version: str,
+        names: List[str],
+        matrix: np.ndarray,
+        upload: bool = True,
+    ) -> bool:
+        """
+        Save precomputed template embeddings.
+
+        The matrix is written as an .npy file so workers can memory-map it, with
+        template names and shape kept in a JSON metadata file next to it.
+
+        Args:
+            model_hash: Hash of the embedding model (see get_model_hash)
+            template_version: Version of the template set
+            names: Template names, one per matrix row
+            matrix: 2D float32 array of template embeddings
+            upload: Also upload the files to S3 when S3 storage is enabled
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        name = self.get_template_embeddings_name(model_hash, template_version)
+        npy_path, meta_path = self._get_template_embeddings_paths(name)
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        metadata = {
+            "names": list(names),
+            "shape": list(matrix.shape),
+            "model_hash": model_hash,
+            "template_version": template_version,
+        }
+
+        try:
+            os.makedirs(os.path.dirname(npy_path), exist_ok=True)
+
+            with _replacing(npy_path) as tmp_path, open(tmp_path, "wb") as f:
+                np.save(f, matrix)
+            with _replacing(meta_path) as tmp_path, open(tmp_path, "w") as f:
+                json.dump(metadata, f)
+            logger.info(f"Saved {len(names)} template embeddings to {npy_path}")
+        except Exception as e:
+            logger.error(f"Error saving template embeddings: {str(e)}")
+            return False
+
+        if self.use_s3 and upload:
+            return self._upload_to_s3(
+                npy_path, f"{self.s3_prefix}{name}.npy"
+            ) and self._upload_to_s3(meta_path, f"{self.s3_prefix}{name}.json")
+
+        return True
+
+    def load_template_embeddings(
+        self, model_hash: str, template_version: str
+    ) -> Optional[Tuple[List[str], np.ndarray]]:
+        """
+        Load precomputed template embeddings.
+
+        Args:
+            model_hash: Hash of the embedding model (see get_model_hash)
+            template_version: Version of the template set
+
+        Returns:
+            Optional[Tuple[List[str], np.ndarray]]: Template names and a read-only
+            memory-mapped embedding matrix, or None if no matching artifact exists
+        """
+        name = self.get_template_embeddings_name(model_hash, template_version)
+        npy_path, meta_path = self._get_template_embeddings_paths(name)
+
+        if self.use_s3 and not (os.path.exists(npy_path) and os.path.exists(meta_path)):
+            if not self._download_template_embeddings(name, npy_path, meta_path):
+                return None
+
+        if not (os.path.exists(npy_path) and os.path.exists(meta_path)):
+            return None
+
+        try:
+            with open(meta_path, "r") as f:
+                metadata = json.load(f)
+            matrix = np.load(npy_path, mmap_mode="r")
+        except Exception as e:
+            logger.error(f"Error loading template embeddings: {str(e)}")
+            return None
+
+        names = metadata.get("names", [])
+        if list(matrix.shape) != metadata.get("shape") or len(names) != len(matrix):
+            logger.warning(f"Ignoring inconsistent template embeddings at {npy_path}")
+            return None
+
+        logger.info(f"Loaded {len(names)} template embeddings from {npy_path}")
+        return names, matrix
+
+    def _download_template_embeddings(self, name, npy_path, meta_path):
+        """Download template embedding files from S3."""
+        s3_client = get_s3_client()
+        try:
+            for path, suffix in ((npy_path, ".npy"), (meta_path, ".json")):
+                with _replacing(path) as tmp_path:
+                    s3_client.download_file(
+                        self.s3_bucket,
+                        f"{self.s3_prefix}{name}{suffix}",
+                        tmp_path,
+                        Config=get_transfer_config(),
+                    )
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                logger.info(f"Template embeddings {name} not found in S3")
+            else:
+                logger.error(f"Error downloading template embeddings: {str(e)}")
+            return False
+
     def get_model_hash(self, model_path):
         """Calculate the MD5 hash of a model file."""
         hash_md5 = hashlib.md5()
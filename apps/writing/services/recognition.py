@@ -4,6 +4,8 @@ Service for recognizing Sitelen Pona characters.
 
 import base64
 import logging
+import threading
+from contextlib import ExitStack
 from io import BytesIO
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -22,7 +24,12 @@ except ImportError:
     MEDIAPIPE_AVAILABLE = False
     mp = None
 
+from django.conf import settings
+
+from apps.core.executor import BoundedExecutor
+from apps.core.pool import InstancePool, PoolTimeoutError
 from apps.writing.services.ml_storage import model_storage
+from apps.writing.services.result_cache import RecognitionResultCache
 from apps.writing.services.templates import template_service
 
 logger = logging.getLogger(__name__)
@@ -33,13 +40,26 @@ class CharacterRecognitionService:
     Service for recognizing Sitelen Pona characters using MediaPipe and MobileNet.
     """
 
+    # Bump when preprocessing changes so stored template embeddings are rebuilt
+    EMBEDDINGS_FORMAT_VERSION = 1
+
     def __init__(self):
         """Initialize the character recognition service."""
-        self.embedder = None
+        # Pool of MediaPipe embedders; an embedder serves one call at a time
+        self.embedder_pool: Optional[InstancePool] = None
         self.templates = {}
-        self.embeddings = {}
+        # Template embeddings packed row-wise, with template_names[i] naming row i
+        self.template_names: List[str] = []
+        self.template_matrix = np.empty((0, 0), dtype=np.float32)
+        # (model hash, template set version) of the loaded template embeddings
+        self.embeddings_key: Optional[Tuple[str, str]] = None
+        self.result_cache = RecognitionResultCache(
+            max_size=settings.WRITING_RECOGNITION["RESULT_CACHE_SIZE"],
+            use_django_cache=settings.WRITING_RECOGNITION["RESULT_CACHE_SHARED"],
+            timeout=settings.WRITING_RECOGNITION["RESULT_CACHE_TIMEOUT"],
+        )
         self.initialized = False
-        self.all_scores = {}
+        self._init_lock = threading.Lock()
 
     def initialize(self):
         """Initialize the character recognition service with the MobileNet model."""
@@ -52,26 +72,173 @@ class CharacterRecognitionService:
             )
             return
 
+        with self._init_lock:
+            # Another thread may have finished initializing while we waited
+            if self.initialized:
+                return
+
+            try:
+                # Get the model path from storage service
+                model_path = model_storage.get_mobilenet_model_path()
+
+                self.embedder_pool = self._create_embedder_pool(model_path)
+                self.embedder_pool.prefill(1)
+
+                # Prefer precomputed embeddings, computing them from templates otherwise
+                if not self.load_template_embeddings(model_path):
+                    self.load_templates()
+                    self.save_template_embeddings(model_path, upload=False)
+
+                self.initialized = True
+                logger.info("Character recognition service initialized successfully")
+            except Exception as e:
+                logger.error(
+                    f"Error initializing character recognition service: {str(e)}"
+                )
+                raise
+
+    def warm_up(self):
+        """
+        Initialize the service and create all pooled embedders ahead of traffic.
+
+        Raises:
+            RuntimeError: If the service could not be initialized
+        """
+        self.initialize()
+        if not self.initialized:
+            raise RuntimeError("Character recognition is not available")
+
+        # Run a blank canvas through every embedder once, holding them all so
+        # the pool cannot hand the same embedder out twice
+        blank = mp.Image(
+            image_format=mp.ImageFormat.SRGB,
+            data=np.full((224, 224, 3), 255, dtype=np.uint8),
+        )
+        with ExitStack() as stack:
+            for _ in range(self.embedder_pool.size):
+                stack.enter_context(self.embedder_pool.acquire()).embed(blank)
+
+    def _create_embedder(self, model_path):
+        """Create a MediaPipe Image Embedder for the given model."""
+        base_options = mp.tasks.BaseOptions(model_asset_path=model_path)
+        options = mp.tasks.vision.ImageEmbedderOptions(
+            base_options=base_options,
+            l2_normalize=True,  # Enable L2 normalization for better similarity comparison
+        )
+        return mp.tasks.vision.ImageEmbedder.create_from_options(options)
+
+    def _create_embedder_pool(self, model_path) -> InstancePool:
+        """Create a pool of embedders sized from the WRITING_RECOGNITION settings."""
+        return InstancePool(
+            lambda: self._create_embedder(model_path),
+            size=settings.WRITING_RECOGNITION["EMBEDDER_POOL_SIZE"],
+            name="recognition-embedders",
+        )
+
+    def _embed(self, rgb_image: np.ndarray) -> np.ndarray:
+        """Embed a preprocessed 224x224 uint8 RGB image with a pooled embedder."""
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb_image)
+        timeout = settings.WRITING_RECOGNITION["EMBEDDER_POOL_TIMEOUT"]
+
+        with self.embedder_pool.acquire(timeout=timeout) as embedder:
+            embedding_result = embedder.embed(mp_image)
+
+        return embedding_result.embeddings[0].embedding
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get recognition result cache hit/miss counters."""
+        return self.result_cache.stats()
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get embedder pool usage and queue-wait metrics."""
+        if self.embedder_pool is None:
+            return {}
+        return self.embedder_pool.stats()
+
+    def _get_embeddings_key(self, model_path) -> Tuple[str, str]:
+        """Get the (model hash, template set version) key for stored embeddings."""
+        model_hash = model_storage.get_model_hash(model_path)
+        template_version = (
+            f"{template_service.get_template_set_version()}"
+            f"v{self.EMBEDDINGS_FORMAT_VERSION}"
+        )
+        return model_hash, template_version
+
+    def load_template_embeddings(self, model_path) -> bool:
+        """
+        Load precomputed template embeddings for the given model.
+
+        Args:
+            model_path: Path to the embedding model file
+
+        Returns:
+            bool: True if stored embeddings were found and loaded
+        """
         try:
-            # Get the model path from storage service
-            model_path = model_storage.get_mobilenet_model_path()
-
-            # Initialize MediaPipe Image Embedder with proper options
-            base_options = mp.tasks.BaseOptions(model_asset_path=model_path)
-            options = mp.tasks.vision.ImageEmbedderOptions(
-                base_options=base_options,
-                l2_normalize=True,  # Enable L2 normalization for better similarity comparison
-            )
-            self.embedder = mp.tasks.vision.ImageEmbedder.create_from_options(options)
+            embeddings_key = self._get_embeddings_key(model_path)
+            stored = model_storage.load_template_embeddings(*embeddings_key)
+        except Exception as e:
+            logger.error(f"Error loading stored template embeddings: {str(e)}")
+            return False
 
-            # Load templates
-            self.load_templates()
+        if not stored:
+            return False
 
-            self.initialized = True
-            logger.info("Character recognition service initialized successfully")
+        names, matrix = stored
+        self.set_template_embeddings(names, matrix)
+        self.embeddings_key = embeddings_key
+        return True
+
+    def save_template_embeddings(self, model_path, upload=True) -> bool:
+        """
+        Save the current template embeddings for the given model.
+
+        Args:
+            model_path: Path to the embedding model file
+            upload: Also upload the embeddings to S3 when S3 storage is enabled
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not self.template_names:
+            return False
+
+        try:
+            model_hash, template_version = self._get_embeddings_key(model_path)
         except Exception as e:
-            logger.error(f"Error initializing character recognition service: {str(e)}")
-            raise
+            logger.error(f"Error saving template embeddings: {str(e)}")
+            return False
+
+        # The current embeddings were computed for this model and template set
+        self.embeddings_key = (model_hash, template_version)
+
+        return model_storage.save_template_embeddings(
+            model_hash,
+            template_version,
+            self.template_names,
+            self.template_matrix,
+            upload=upload,
+        )
+
+    def build_template_embeddings(self) -> int:
+        """
+        Compute embeddings for all templates and store them for worker processes.
+
+        Returns:
+            int: Number of template embeddings stored
+        """
+        if not MEDIAPIPE_AVAILABLE:
+            raise RuntimeError("MediaPipe is not available")
+
+        model_path = model_storage.get_mobilenet_model_path()
+        if self.embedder_pool is None:
+            self.embedder_pool = self._create_embedder_pool(model_path)
+
+        self.load_templates()
+        if not self.save_template_embeddings(model_path):
+            raise RuntimeError("Failed to save template embeddings")
+
+        return len(self.template_names)
 
     def load_templates(self):
         """
@@ -89,6 +256,9 @@ class CharacterRecognitionService:
 
             logger.info(f"Loading {len(template_list)} templates")
 
+            names = []
+            vectors = []
+
             # Process each template
             for template_name in template_list:
                 # Get template image
@@ -108,87 +278,47 @@ class CharacterRecognitionService:
                 # Store images for display
                 self.templates[template_name] = {
                     "original": original_image,
-                    "processed": (processed * 255).astype(np.uint8),
+                    "processed": processed,
                 }
 
-                # Convert to uint8 for MediaPipe (it doesn't like float input)
-                mp_input = (processed * 255).astype(np.uint8)
-                mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=mp_input)
-
                 # Get and store embedding values
-                embedding_result = self.embedder.embed(mp_image)
-                self.embeddings[template_name] = embedding_result.embeddings[
-                    0
-                ].embedding
+                names.append(template_name)
+                vectors.append(self._embed(processed))
+
+            self.set_template_embeddings(names, vectors)
 
             logger.info(
-                f"Successfully loaded {len(self.embeddings)} template embeddings"
+                f"Successfully loaded {len(self.template_names)} template embeddings"
             )
 
         except Exception as e:
             logger.error(f"Error loading templates: {str(e)}")
 
-    def preprocess_image(self, image) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
-        """Preprocess image for MediaPipe."""
-        debug_steps = {}
-        debug_steps["original"] = image.copy()
-
-        # Convert to RGB if needed
-        if len(image.shape) == 3:
-            if image.shape[2] == 4:  # RGBA
-                # For canvas input, properly handle alpha channel
-                mask = image[:, :, 3] > 0  # Get mask of non-transparent pixels
-                rgb = image[:, :, :3]
-                # Set transparent pixels to white (background color)
-                white_bg = np.ones_like(rgb) * 255
-                rgb = np.where(mask[:, :, None], rgb, white_bg)
-                image = rgb
-                debug_steps["alpha_handled"] = image.copy()
-            elif image.shape[2] == 3:  # BGR
-                image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-                debug_steps["rgb_converted"] = image.copy()
-        elif len(image.shape) == 2:  # Grayscale
-            image = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
-            debug_steps["rgb_converted"] = image.copy()
-
-        # Find bounding box of non-white pixels to crop the drawing tightly
-        # This helps with alignment and improves recognition
-        if image.shape[2] == 3:  # RGB image
-            gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-        else:
-            gray = image
+    def _ink_bounding_box(self, thresh: np.ndarray) -> Tuple[int, int, int, int]:
+        """Get the padded bounding box (x, y, w, h) of the ink in a binary image."""
+        height, width = thresh.shape[:2]
 
-        # Threshold to find ink pixels
-        _, thresh = cv2.threshold(gray, 240, 255, cv2.THRESH_BINARY_INV)
-        debug_steps["thresholded"] = thresh.copy()
+        # The bounding box of all ink pixels is the box around all contours
+        points = cv2.findNonZero(thresh)
 
-        # Find contours
-        contours, _ = cv2.findContours(
-            thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
-        )
+        # If no ink is found, use the entire image
+        if points is None:
+            return 0, 0, width, height
 
-        # If no contours are found, use the entire image
-        if not contours:
-            x, y, w, h = 0, 0, image.shape[1], image.shape[0]
-        else:
-            # Combine all contours to get the bounding box of the drawing
-            all_points = np.concatenate(list(contours))
-            x, y, w, h = cv2.boundingRect(all_points)
-
-            # Add some padding around the bounding box
-            padding = int(min(w, h) * 0.1)  # 10% padding
-            x = max(0, x - padding)
-            y = max(0, y - padding)
-            w = min(image.shape[1] - x, w + padding * 2)
-            h = min(image.shape[0] - y, h + padding * 2)
-
-        # Crop the image to the bounding box
-        cropped = image[y : y + h, x : x + w]
-        debug_steps["cropped"] = cropped.copy()
+        x, y, w, h = cv2.boundingRect(points)
 
-        # Resize while maintaining aspect ratio
-        target_size = (224, 224)  # MobileNet default size
+        # Add some padding around the bounding box
+        padding = int(min(w, h) * 0.1)  # 10% padding
+        x = max(0, x - padding)
+        y = max(0, y - padding)
+        w = min(width - x, w + padding * 2)
+        h = min(height - y, h + padding * 2)
+        return x, y, w, h
 
+    def _resize_preserving_aspect(
+        self, cropped: np.ndarray, target_size: Tuple[int, int]
+    ) -> np.ndarray:
+        """Resize a cropped drawing to fit the target size, keeping its aspect."""
         # Slightly adjust the aspect ratio to better match typical glyph proportions
         # This helps when user drawings have different proportions from templates
         cropped_h, cropped_w = cropped.shape[:2]
@@ -210,42 +340,94 @@ class CharacterRecognitionService:
         else:
             interpolation = cv2.INTER_CUBIC
 
-        resized = cv2.resize(cropped, (new_w, new_h), interpolation=interpolation)
-        debug_steps["aspect_preserved"] = resized.copy()
+        return cv2.resize(cropped, (new_w, new_h), interpolation=interpolation)
+
+    def preprocess_image(
+        self, image, debug: bool = False
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Preprocess image for MediaPipe.
+
+        The image stays uint8 throughout and is only converted to RGB once it
+        has been cropped and resized. Intermediate images are copied into
+        ``debug_steps`` only when ``debug`` is set.
+
+        Args:
+            image: RGBA, BGR or grayscale image as a numpy array
+            debug: Whether to capture intermediate images
+
+        Returns:
+            tuple: (224x224 uint8 RGB image, intermediate images by step name)
+        """
+        debug_steps = {}
+        if debug:
+            debug_steps["original"] = image.copy()
+
+        # Work out how to get grayscale and RGB from the input channels
+        if image.ndim == 3 and image.shape[2] == 4:  # RGBA
+            # For canvas input, set transparent pixels to white (background color)
+            alpha = image[:, :, 3]
+            image = cv2.cvtColor(image, cv2.COLOR_RGBA2RGB)
+            image[alpha == 0] = 255
+            gray_code, rgb_code = cv2.COLOR_RGB2GRAY, None
+            if debug:
+                debug_steps["alpha_handled"] = image.copy()
+        elif image.ndim == 3:  # BGR
+            gray_code, rgb_code = cv2.COLOR_BGR2GRAY, cv2.COLOR_BGR2RGB
+        else:  # Grayscale
+            gray_code, rgb_code = None, cv2.COLOR_GRAY2RGB
+
+        # Find bounding box of non-white pixels to crop the drawing tightly
+        # This helps with alignment and improves recognition
+        gray = image if gray_code is None else cv2.cvtColor(image, gray_code)
+
+        # Threshold to find ink pixels
+        _, thresh = cv2.threshold(gray, 240, 255, cv2.THRESH_BINARY_INV)
+        if debug:
+            debug_steps["thresholded"] = thresh.copy()
+
+        x, y, w, h = self._ink_bounding_box(thresh)
 
-        # Create white canvas of target size
-        canvas = np.ones((target_size[1], target_size[0], 3), dtype=np.uint8) * 255
+        # Crop the image to the bounding box (a view, not a copy)
+        cropped = image[y : y + h, x : x + w]
+        if debug:
+            debug_steps["cropped"] = cropped.copy()
 
-        # Center the image on the canvas
+        target_size = (224, 224)  # MobileNet default size
+        resized = self._resize_preserving_aspect(cropped, target_size)
+        new_h, new_w = resized.shape[:2]
+
+        # Channel conversion commutes with cropping and resizing, so only the
+        # small resized image needs converting to RGB
+        if rgb_code is not None:
+            resized = cv2.cvtColor(resized, rgb_code)
+        if debug:
+            debug_steps["aspect_preserved"] = resized.copy()
+
+        # Create white canvas of target size and center the image on it
+        canvas = np.full((target_size[1], target_size[0], 3), 255, dtype=np.uint8)
         y_offset = (target_size[1] - new_h) // 2
         x_offset = (target_size[0] - new_w) // 2
         canvas[y_offset : y_offset + new_h, x_offset : x_offset + new_w] = resized
-        debug_steps["centered"] = canvas.copy()
-
-        # Normalize pixel values to [0, 1]
-        processed = canvas.astype(np.float32) / 255.0
+        if debug:
+            debug_steps["centered"] = canvas.copy()
 
-        return processed, debug_steps
+        return canvas, debug_steps
 
-    def get_embedding(self, image) -> Tuple[List[float], Dict[str, np.ndarray]]:
+    def get_embedding(
+        self, image, debug: bool = False
+    ) -> Tuple[List[float], Dict[str, np.ndarray]]:
         """Get embedding from preprocessed image using MediaPipe."""
         try:
             # Ensure we're initialized
             if not self.initialized:
                 self.initialize()
 
-            # Preprocess and create MediaPipe image
-            processed, debug_steps = self.preprocess_image(image)
+            # Preprocess straight to the uint8 RGB input MediaPipe expects
+            processed, debug_steps = self.preprocess_image(image, debug=debug)
 
-            # Convert to uint8 for MediaPipe (it doesn't like float input)
-            mp_input = (processed * 255).astype(np.uint8)
-            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=mp_input)
-
-            # Get embedding
-            embedding_result = self.embedder.embed(mp_image)
-
-            # Return the embedding values (already a numpy array) and debug image
-            return embedding_result.embeddings[0].embedding, debug_steps
+            # Return the embedding values (already a numpy array) and debug images
+            return self._embed(processed), debug_steps
         except Exception as e:
             logger.error(f"Failed to get embedding: {str(e)}")
             raise
@@ -259,37 +441,207 @@ class CharacterRecognitionService:
         # Return raw similarity score
         return similarity
 
-    def recognize(self, drawn_image, threshold=0.7) -> Tuple[Optional[str], float]:
-        """Recognize drawn character by comparing embeddings."""
-        # Get embedding for drawn image
-        input_embedding, debug_steps = self.get_embedding(drawn_image)
+    def set_template_embeddings(self, names: List[str], vectors) -> None:
+        """
+        Replace the template embeddings used for matching.
 
-        if input_embedding is None:
-            return None, 0
+        Args:
+            names: Template names, one per embedding
+            vectors: Sequence of embedding vectors (or a 2D array) in the same order
+        """
+        # Cached scores belong to the previous templates
+        self.embeddings_key = None
+        self.result_cache.clear()
 
-        # Compare with all templates
-        best_match = None
-        best_score = 0
-        all_scores = {}
+        if len(names) == 0:
+            self.template_names = []
+            self.template_matrix = np.empty((0, 0), dtype=np.float32)
+            return
 
-        for char_name, template_embedding in self.embeddings.items():
-            # Calculate similarity score
-            score = self.cosine_similarity(input_embedding, template_embedding)
-            all_scores[char_name] = float(score)
+        # Arrays (including memory-mapped ones) are used without copying
+        if not (isinstance(vectors, np.ndarray) and vectors.ndim == 2):
+            vectors = np.vstack(vectors)
+        matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+        if matrix.shape[0] != len(names):
+            raise ValueError(
+                f"Got {len(names)} template names for {matrix.shape[0]} embeddings"
+            )
+
+        self.template_names = list(names)
+        self.template_matrix = matrix
+
+    def _rank_scores(
+        self, scores: np.ndarray, top_k: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """Order one row of template scores best first, keeping the top k."""
+        count = len(self.template_names)
+
+        if top_k is None or top_k >= count:
+            order = np.argsort(scores)[::-1]
+        else:
+            top = np.argpartition(scores, -top_k)[-top_k:]
+            order = top[np.argsort(scores[top])[::-1]]
 
-            if score > best_score:
-                best_score = score
-                best_match = char_name
+        return [(self.template_names[i], float(scores[i])) for i in order]
 
-        # Store scores for debug display
-        self.all_scores = all_scores
+    def _match_ranked(
+        self, ranked: List[Tuple[str, float]], threshold
+    ) -> Tuple[Optional[str], float, Dict[str, float]]:
+        """Turn ranked template scores into a recognition result."""
+        if not ranked:
+            return None, 0, {}
+
+        best_match, best_score = ranked[0]
+        scores = dict(ranked)
+
+        # Non-positive similarity means nothing resembles the drawing
+        if best_score <= 0:
+            return None, 0, scores
 
         if best_score >= threshold:
-            return best_match, best_score
-        return None, best_score
+            return best_match, best_score, scores
+        return None, best_score, scores
+
+    def score_embedding(
+        self, embedding, top_k: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Score an embedding against every template.
+
+        All templates are scored with a single matrix-vector product against the
+        packed template matrix.
+
+        Args:
+            embedding: L2-normalized embedding of the drawn image
+            top_k: Only return the k best matches (all templates if None)
+
+        Returns:
+            List[Tuple[str, float]]: (template name, similarity) pairs, best first
+        """
+        if not self.template_names:
+            return []
+
+        scores = self.template_matrix @ np.asarray(embedding, dtype=np.float32)
+        return self._rank_scores(scores, top_k)
+
+    def match_embedding(
+        self, embedding, threshold=0.7, top_k: Optional[int] = None
+    ) -> Tuple[Optional[str], float, Dict[str, float]]:
+        """
+        Find the best matching template for an embedding.
+
+        Args:
+            embedding: L2-normalized embedding of the drawn image
+            threshold: Recognition threshold
+            top_k: Number of scores to include in the result (all if None)
+
+        Returns:
+            tuple: (character_name, confidence_score, scores by template name)
+        """
+        return self._match_ranked(self.score_embedding(embedding, top_k), threshold)
+
+    def _score_images(
+        self, images: List[np.ndarray], debug: bool = False
+    ) -> List[Tuple[np.ndarray, Dict[str, np.ndarray], bool]]:
+        """
+        Score drawings against every template, reusing cached scores.
+
+        Args:
+            images: Drawings as numpy arrays
+            debug: Whether to capture intermediate preprocessing images
+
+        Returns:
+            List of (template scores, debug steps, served from cache) per drawing
+        """
+        if not self.initialized:
+            self.initialize()
+
+        namespace = ":".join(self.embeddings_key) if self.embeddings_key else None
+        results = []
+        pending = []
+
+        for image in images:
+            processed, debug_steps = self.preprocess_image(image, debug=debug)
+            if not self.template_names:
+                results.append((np.empty(0, dtype=np.float32), debug_steps, False))
+                continue
+
+            fingerprint = self.result_cache.fingerprint(processed)
+            scores = self.result_cache.get(namespace, fingerprint)
+            results.append((scores, debug_steps, scores is not None))
+            if scores is None:
+                pending.append((len(results) - 1, fingerprint, processed))
+
+        if pending:
+            embeddings = np.asarray(
+                [self._embed(processed) for _, _, processed in pending],
+                dtype=np.float32,
+            )
+            for (i, fingerprint, _), scores in zip(
+                pending, embeddings @ self.template_matrix.T, strict=True
+            ):
+                self.result_cache.set(namespace, fingerprint, scores)
+                results[i] = (scores, results[i][1], False)
+
+        return results
+
+    def recognize(self, drawn_image, threshold=0.7) -> Tuple[Optional[str], float]:
+        """Recognize drawn character by comparing embeddings."""
+        [(scores, _, _)] = self._score_images([drawn_image])
+
+        character, score, _ = self._match_ranked(self._rank_scores(scores), threshold)
+        return character, score
+
+    def recognize_batch(
+        self, drawn_images: List[np.ndarray], threshold=0.7, top_k: Optional[int] = None
+    ) -> List[Tuple[Optional[str], float, Dict[str, float]]]:
+        """
+        Recognize several drawn characters at once.
+
+        Each drawing is preprocessed and embedded, then all embeddings are scored
+        against all templates with a single matrix product. Drawings with cached
+        scores are not embedded again.
+
+        Args:
+            drawn_images: Drawings as numpy arrays
+            threshold: Recognition threshold
+            top_k: Number of scores to include in each result (all if None)
+
+        Returns:
+            List of (character_name, confidence_score, scores) tuples, one per drawing
+        """
+        return [
+            self._match_ranked(self._rank_scores(scores, top_k), threshold)
+            for scores, _, _ in self._score_images(drawn_images)
+        ]
+
+    def decode_base64_image(self, base64_image: str) -> np.ndarray:
+        """Decode a base64-encoded image (optionally a data URL) to a numpy array."""
+        if "," in base64_image:
+            base64_image = base64_image.split(",")[1]
+
+        image_data = base64.b64decode(base64_image)
+        image = Image.open(BytesIO(image_data))
+
+        return np.array(image)
+
+    def encode_debug_steps(self, debug_steps: Dict[str, np.ndarray]) -> Dict[str, str]:
+        """Encode intermediate preprocessing images as PNG data URLs."""
+        encoded = {}
+        for name, step in debug_steps.items():
+            if step.ndim == 3:
+                # OpenCV writes BGR(A); the steps are RGB(A) after alpha handling
+                code = cv2.COLOR_RGBA2BGRA if step.shape[2] == 4 else cv2.COLOR_RGB2BGR
+                step = cv2.cvtColor(step, code)
+            success, png = cv2.imencode(".png", step)
+            if success:
+                encoded[name] = "data:image/png;base64," + base64.b64encode(png).decode(
+                    "ascii"
+                )
+        return encoded
 
     def recognize_base64(
-        self, base64_image: str, threshold=0.7
+        self, base64_image: str, threshold=0.7, debug: bool = False
     ) -> Tuple[Optional[str], float, Dict[str, Any]]:
         """
         Recognize a character from a base64-encoded image.
@@ -297,36 +649,104 @@ class CharacterRecognitionService:
         Args:
             base64_image: Base64-encoded image string
             threshold: Recognition threshold
+            debug: Whether to include intermediate preprocessing images
 
         Returns:
             tuple: (character_name, confidence_score, debug_info)
+
+        Raises:
+            PoolTimeoutError: If no embedder became free in time, so the caller
+                can ask the client to retry instead of scoring a failure
         """
         try:
-            # Decode base64 image
-            if "," in base64_image:
-                base64_image = base64_image.split(",")[1]
-
-            image_data = base64.b64decode(base64_image)
-            image = Image.open(BytesIO(image_data))
-
-            # Convert to numpy array
-            image_np = np.array(image)
+            image_np = self.decode_base64_image(base64_image)
 
             # Recognize
-            character, score = self.recognize(image_np, threshold)
+            [(template_scores, debug_steps, cached)] = self._score_images(
+                [image_np], debug=debug
+            )
+            character, score, scores = self._match_ranked(
+                self._rank_scores(template_scores), threshold
+            )
 
             debug_info = {
-                "scores": getattr(self, "all_scores", {}),
+                "scores": scores,
                 "threshold": threshold,
                 "input_shape": image_np.shape,
+                "cached": cached,
             }
+            if debug:
+                debug_info["steps"] = self.encode_debug_steps(debug_steps)
 
             return character, score, debug_info
 
+        except PoolTimeoutError:
+            raise
         except Exception as e:
             logger.error(f"Error recognizing base64 image: {str(e)}")
             return None, 0, {"error": str(e)}
 
+    def recognize_base64_batch(
+        self, base64_images: List[str], threshold=0.7
+    ) -> List[Tuple[Optional[str], float, Dict[str, Any]]]:
+        """
+        Recognize several characters from base64-encoded images.
+
+        Images that fail to decode get an error result without affecting the rest.
+
+        Args:
+            base64_images: Base64-encoded image strings
+            threshold: Recognition threshold
+
+        Returns:
+            List of (character_name, confidence_score, debug_info) tuples
+
+        Raises:
+            PoolTimeoutError: If no embedder became free in time
+        """
+        results: List[Tuple[Optional[str], float, Dict[str, Any]]] = [
+            (None, 0, {}) for _ in base64_images
+        ]
+        images = []
+        positions = []
+
+        for i, base64_image in enumerate(base64_images):
+            try:
+                images.append(self.decode_base64_image(base64_image))
+                positions.append(i)
+            except Exception as e:
+                logger.error(f"Error decoding base64 image: {str(e)}")
+                results[i] = (None, 0, {"error": str(e)})
+
+        try:
+            recognized = self.recognize_batch(images, threshold)
+        except PoolTimeoutError:
+            raise
+        except Exception as e:
+            logger.error(f"Error recognizing base64 images: {str(e)}")
+            for i in positions:
+                results[i] = (None, 0, {"error": str(e)})
+            return results
+
+        for i, image_np, (character, score, scores) in zip(
+            positions, images, recognized, strict=True
+        ):
+            debug_info = {
+                "scores": scores,
+                "threshold": threshold,
+                "input_shape": image_np.shape,
+            }
+            results[i] = (character, score, debug_info)
+
+        return results
+
 
 # Create a singleton instance
 character_recognition = CharacterRecognitionService()
+
+# Worker threads that run recognitions for async views
+recognition_executor = BoundedExecutor(
+    max_workers=settings.WRITING_RECOGNITION["EXECUTOR_WORKERS"],
+    max_pending=settings.WRITING_RECOGNITION["EXECUTOR_MAX_PENDING"],
+    name="recognition",
+)
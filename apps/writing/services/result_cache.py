@@ -0,0 +1,168 @@
+"""
+Cache of recognition scores keyed by a perceptual fingerprint of the drawing.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import cv2
+import numpy as np
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class RecognitionResultCache:
+    """
+    Bounded LRU cache of per-template scores for preprocessed drawings.
+
+    Drawings are keyed by a difference hash of the preprocessed canvas, so
+    resubmitting the same (or an almost identical) drawing skips the embedder.
+    Entries live in a per-process LRU and can also be shared between processes
+    through the Django cache. Keys are namespaced by the model hash and
+    template set version, which covers the content of every template, so stale
+    scores are never served after the model or any template image changes.
+    """
+
+    CACHE_PREFIX = "writing_recognition_scores"
+
+    # Fingerprints compare neighbouring pixels on a HASH_SIZE x HASH_SIZE grid
+    HASH_SIZE = 16
+
+    def __init__(
+        self, max_size: int = 256, use_django_cache: bool = False, timeout: int = 3600
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of entries kept in memory (0 disables caching)
+            use_django_cache: Also store entries in the Django cache
+            timeout: Django cache timeout in seconds
+        """
+        self.max_size = max_size
+        self.use_django_cache = use_django_cache
+        self.timeout = timeout
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether results are cached at all."""
+        return self.max_size > 0
+
+    def fingerprint(self, canvas: np.ndarray) -> str:
+        """
+        Compute a perceptual hash of a preprocessed drawing.
+
+        Args:
+            canvas: Preprocessed uint8 RGB image
+
+        Returns:
+            str: Hex digest of the difference hash
+        """
+        gray = cv2.cvtColor(canvas, cv2.COLOR_RGB2GRAY) if canvas.ndim == 3 else canvas
+        small = cv2.resize(
+            gray, (self.HASH_SIZE + 1, self.HASH_SIZE), interpolation=cv2.INTER_AREA
+        )
+        bits = small[:, 1:] > small[:, :-1]
+        return np.packbits(bits).tobytes().hex()
+
+    def _django_key(self, namespace: str, fingerprint: str) -> str:
+        """Build the Django cache key for an entry."""
+        return f"{self.CACHE_PREFIX}:{namespace}:{fingerprint}"
+
+    def get(self, namespace: Optional[str], fingerprint: str) -> Optional[np.ndarray]:
+        """
+        Get cached template scores for a drawing.
+
+        Args:
+            namespace: Model hash and template version the scores belong to
+            fingerprint: Fingerprint of the preprocessed drawing
+
+        Returns:
+            Optional[np.ndarray]: Scores for every template, or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        key = (namespace, fingerprint)
+        with self._lock:
+            scores = self._entries.get(key)
+            if scores is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return scores
+
+        if self.use_django_cache and namespace:
+            try:
+                scores = cache.get(self._django_key(namespace, fingerprint))
+            except Exception as e:
+                logger.warning(f"Error reading recognition cache: {e}")
+                scores = None
+
+            if scores is not None:
+                self._remember(key, scores)
+                with self._lock:
+                    self.hits += 1
+                return scores
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, namespace: Optional[str], fingerprint: str, scores: np.ndarray):
+        """
+        Cache template scores for a drawing.
+
+        Args:
+            namespace: Model hash and template version the scores belong to
+            fingerprint: Fingerprint of the preprocessed drawing
+            scores: Scores for every template
+        """
+        if not self.enabled:
+            return
+
+        self._remember((namespace, fingerprint), scores)
+
+        if self.use_django_cache and namespace:
+            try:
+                cache.set(
+                    self._django_key(namespace, fingerprint), scores, self.timeout
+                )
+            except Exception as e:
+                logger.warning(f"Error writing recognition cache: {e}")
+
+    def _remember(self, key, scores: np.ndarray):
+        """Store an entry in the in-memory LRU, evicting the oldest if full."""
+        with self._lock:
+            self._entries[key] = scores
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all in-memory entries (shared entries expire by namespace)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache usage counters.
+
+        Returns:
+            Dict[str, Any]: Size, capacity, hits, misses and hit rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
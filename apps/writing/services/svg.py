@@ -7,11 +7,12 @@ import os
 from pathlib import Path
 from typing import List, Optional
 
-import boto3
 from botocore.exceptions import ClientError
 from django.conf import settings
 from django.core.cache import cache
 
+from apps.core.s3 import get_s3_client
+
 logger = logging.getLogger(__name__)
 
 
@@ -53,7 +54,7 @@ class SVGManagementService:
 
         if self.use_s3:
             # List SVGs in S3
-            s3_client = boto3.client("s3")
+            s3_client = get_s3_client()
             try:
                 response = s3_client.list_objects_v2(
                     Bucket=self.s3_bucket, Prefix=self.s3_prefix
@@ -107,7 +108,7 @@ class SVGManagementService:
 
         if self.use_s3:
             # Get SVG from S3
-            s3_client = boto3.client("s3")
+            s3_client = get_s3_client()
             s3_key = f"{self.s3_prefix}{svg_name}.svg"
 
             try:
@@ -168,7 +169,7 @@ class SVGManagementService:
 
             if self.use_s3:
                 # Upload to S3
-                s3_client = boto3.client("s3")
+                s3_client = get_s3_client()
                 s3_key = f"{self.s3_prefix}{svg_name}.svg"
 
                 s3_client.put_object(
@@ -207,7 +208,7 @@ class SVGManagementService:
 
             if self.use_s3:
                 # Delete from S3
-                s3_client = boto3.client("s3")
+                s3_client = get_s3_client()
                 s3_key = f"{self.s3_prefix}{svg_name}.svg"
 
                 s3_client.delete_object(Bucket=self.s3_bucket, Key=s3_key)
@@ -2,19 +2,21 @@
 Service for managing Sitelen Pona template images.
 """
 
+import hashlib
 import logging
 import os
 import tempfile
 from pathlib import Path
 from typing import Dict, List, Optional
 
-import boto3
 import cv2
 import numpy as np
 from botocore.exceptions import ClientError
 from django.conf import settings
 from django.core.cache import cache
 
+from apps.core.s3 import get_s3_client, get_transfer_config
+
 logger = logging.getLogger(__name__)
 
 
@@ -27,7 +29,6 @@ class TemplateManagementService:
     """
 
     # Cache keys
-    TEMPLATE_LIST_CACHE_KEY = "sitelen_pona_template_list"
     TEMPLATE_CACHE_PREFIX = "sitelen_pona_template_"
 
     def __init__(self):
@@ -45,50 +46,64 @@ class TemplateManagementService:
         """
         Get a list of available template names.
 
+        The list is not cached, so it always matches get_template_set_version.
+
         Returns:
             List[str]: List of template names (without extension)
         """
-        # Check cache first
-        cached_list = cache.get(self.TEMPLATE_LIST_CACHE_KEY)
-        if cached_list:
-            return cached_list
+        return sorted(self._list_template_files())
 
-        template_list = []
+    def _list_template_files(self) -> Dict[str, str]:
+        """
+        List template files with a fingerprint of each file's current content.
+
+        Returns:
+            Dict[str, str]: Template name (without extension) to its S3 ETag and
+                size, or its local size and modification time
+        """
+        files = {}
 
         if self.use_s3:
-            # List templates in S3
-            s3_client = boto3.client("s3")
+            # List templates in S3, following pagination
             try:
-                response = s3_client.list_objects_v2(
-                    Bucket=self.s3_bucket, Prefix=self.s3_prefix
-                )
-
-                if "Contents" in response:
-                    for item in response["Contents"]:
+                paginator = get_s3_client().get_paginator("list_objects_v2")
+                pages = paginator.paginate(Bucket=self.s3_bucket, Prefix=self.s3_prefix)
+                for page in pages:
+                    for item in page.get("Contents", []):
                         key = item["Key"]
                         if key.endswith(".png"):
                             # Extract the template name without extension
-                            name = Path(key).stem
-                            template_list.append(name)
+                            files[Path(key).stem] = f"{item['ETag']}:{item['Size']}"
             except Exception as e:
                 logger.error(f"Error listing templates from S3: {str(e)}")
         else:
             # List templates in local directory
             try:
-                for file in os.listdir(self.templates_dir):
-                    if file.endswith(".png"):
-                        name = Path(file).stem
-                        template_list.append(name)
+                with os.scandir(self.templates_dir) as entries:
+                    for entry in entries:
+                        if entry.name.endswith(".png"):
+                            stat = entry.stat()
+                            files[Path(entry.name).stem] = (
+                                f"{stat.st_size}:{stat.st_mtime_ns}"
+                            )
             except Exception as e:
                 logger.error(f"Error listing local templates: {str(e)}")
 
-        # Sort the list
-        template_list.sort()
+        return files
+
+    def get_template_set_version(self) -> str:
+        """
+        Get a short version identifier for the current set of templates.
 
-        # Cache the list
-        cache.set(self.TEMPLATE_LIST_CACHE_KEY, template_list, timeout=3600)  # 1 hour
+        Replacing a template under the same name changes the version too, so
+        embeddings stored for the old images are not reused.
 
-        return template_list
+        Returns:
+            str: Hash of the sorted template names and their content fingerprints
+        """
+        files = self._list_template_files()
+        listing = "\n".join(f"{name}\t{files[name]}" for name in sorted(files))
+        return hashlib.md5(listing.encode("utf-8")).hexdigest()[:12]
 
     def get_template_image(self, template_name: str) -> Optional[np.ndarray]:
         """
@@ -113,15 +128,16 @@ class TemplateManagementService:
 
         if self.use_s3:
             # Get template from S3
-            s3_client = boto3.client("s3")
+            s3_client = get_s3_client()
             s3_key = f"{self.s3_prefix}{template_name}.png"
 
             try:
-                with tempfile.NamedTemporaryFile() as tmp_file:
-                    s3_client.download_file(self.s3_bucket, s3_key, tmp_file.name)
-                    image = cv2.imread(tmp_file.name)
+                # One GET decoded in memory, without a HEAD or a temporary file
+                response = s3_client.get_object(Bucket=self.s3_bucket, Key=s3_key)
+                image_bytes = np.frombuffer(response["Body"].read(), dtype=np.uint8)
+                image = cv2.imdecode(image_bytes, cv2.IMREAD_COLOR)
             except ClientError as e:
-                if e.response["Error"]["Code"] == "404":
+                if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
                     logger.warning(f"Template not found in S3: {template_name}")
                 else:
                     logger.error(f"Error downloading template from S3: {str(e)}")
@@ -202,12 +218,11 @@ class TemplateManagementService:
         """
         try:
             # Invalid cache
-            cache.delete(self.TEMPLATE_LIST_CACHE_KEY)
             cache.delete(f"{self.TEMPLATE_CACHE_PREFIX}{template_name}")
 
             if self.use_s3:
                 # Upload to S3
-                s3_client = boto3.client("s3")
+                s3_client = get_s3_client()
                 s3_key = f"{self.s3_prefix}{template_name}.png"
 
                 with tempfile.NamedTemporaryFile() as tmp_file:
@@ -219,6 +234,7 @@ class TemplateManagementService:
                         self.s3_bucket,
                         s3_key,
                         ExtraArgs={"ACL": "public-read", "ContentType": "image/png"},
+                        Config=get_transfer_config(),
                     )
             else:
                 # Save locally
@@ -244,12 +260,11 @@ class TemplateManagementService:
         """
         try:
             # Invalid cache
-            cache.delete(self.TEMPLATE_LIST_CACHE_KEY)
             cache.delete(f"{self.TEMPLATE_CACHE_PREFIX}{template_name}")
 
             if self.use_s3:
                 # Delete from S3
-                s3_client = boto3.client("s3")
+                s3_client = get_s3_client()
                 s3_key = f"{self.s3_prefix}{template_name}.png"
 
                 s3_client.delete_object(Bucket=self.s3_bucket, Key=s3_key)
@@ -100,7 +100,7 @@ class MockCharacterRecognitionService:
         return None, self.match_probability
 
     def recognize_base64(
-        self, base64_image: str, threshold=0.7
+        self, base64_image: str, threshold=0.7, debug: bool = False
     ) -> Tuple[Optional[str], float, Dict[str, Any]]:
         """Mock base64 image recognition."""
         # Generate deterministic but random-seeming result based on the image hash
@@ -133,6 +133,12 @@ class MockCharacterRecognitionService:
             return char_name, match_score, {"scores": all_scores}
         return None, match_score, {"scores": all_scores}
 
+    def recognize_base64_batch(
+        self, base64_images: List[str], threshold=0.7
+    ) -> List[Tuple[Optional[str], float, Dict[str, Any]]]:
+        """Mock batch recognition of base64 images."""
+        return [self.recognize_base64(image, threshold) for image in base64_images]
+
     def set_match_probability(self, probability: float):
         """Set the match probability for testing different scenarios."""
         self.match_probability = probability
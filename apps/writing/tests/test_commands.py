@@ -10,8 +10,12 @@ from apps.writing.models import Glyph
 
 class CommandsTestCase(TestCase):
     @pytest.mark.django_db
+    @patch(
+        "apps.writing.services.recognition.character_recognition.build_template_embeddings",
+        return_value=3,
+    )
     @patch("cairosvg.svg2png")
-    def test_load_glyphs(self, mock_svg2png):
+    def test_load_glyphs(self, mock_svg2png, mock_build_embeddings):
         """Test that the load_glyphs command creates or updates glyph records from static SVGs"""
         # Set up test SVGs
         pytest.importorskip("pytest_django")
@@ -47,6 +51,8 @@ class CommandsTestCase(TestCase):
         # Check command output
         output = out.getvalue()
         self.assertIn("Loading Sitelen Pona glyphs from static files", output)
+        self.assertIn("Stored embeddings for 3 templates", output)
+        mock_build_embeddings.assert_called_once()
 
         # Check that at least some glyphs were processed
         self.assertTrue(Glyph.objects.exists())
@@ -7,16 +7,18 @@ import io
 import os
 import shutil
 import tempfile
-from unittest.mock import patch
+import threading
+from unittest.mock import MagicMock, patch
 
 import numpy as np
 import pytest
 from django.conf import settings
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from PIL import Image
 
 from apps.writing.services.ml_storage import ModelStorageService
 from apps.writing.services.recognition import CharacterRecognitionService
+from apps.writing.services.templates import TemplateManagementService
 from apps.writing.tests.mocks import (
     MockCharacterRecognitionService,
     MockModelStorageService,
@@ -106,6 +108,28 @@ class TestModelStorageService:
         # Verify our mock was called
         mock_download.assert_called_once()
 
+    def test_template_embeddings_round_trip(self, temp_model_dir):
+        """Test that stored template embeddings are loaded memory-mapped."""
+        service = ModelStorageService()
+        matrix = np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+
+        assert service.load_template_embeddings("hash", "v1") is None
+        assert service.save_template_embeddings("hash", "v1", ["a", "b"], matrix)
+
+        names, loaded = service.load_template_embeddings("hash", "v1")
+        assert names == ["a", "b"]
+        assert isinstance(loaded, np.memmap)
+        np.testing.assert_array_equal(loaded, matrix)
+        assert not [
+            name
+            for name in os.listdir(service._get_local_artifact_dir())
+            if name.endswith(".part")
+        ]
+
+        # A different model hash or template version needs its own embeddings
+        assert service.load_template_embeddings("other", "v1") is None
+        assert service.load_template_embeddings("hash", "v2") is None
+
 
 class CharacterRecognitionServiceTests(TestCase):
     """Tests for the CharacterRecognitionService class."""
@@ -124,6 +148,57 @@ class CharacterRecognitionServiceTests(TestCase):
         # Verify the service is not initialized since MediaPipe is not available
         self.assertFalse(service.initialized)
 
+    @patch("apps.writing.services.recognition.model_storage", MockModelStorageService())
+    @patch("apps.writing.services.recognition.MEDIAPIPE_AVAILABLE", True)
+    def test_initialize_is_thread_safe(self):
+        """Test that concurrent first requests initialize the service only once."""
+        service = CharacterRecognitionService()
+        barrier = threading.Barrier(4)
+
+        def worker():
+            barrier.wait()
+            service.initialize()
+
+        with (
+            patch.object(service, "_create_embedder", return_value=object()) as create,
+            patch.object(
+                service, "load_template_embeddings", return_value=True
+            ) as load,
+        ):
+            threads = [threading.Thread(target=worker) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertTrue(service.initialized)
+        load.assert_called_once()
+        create.assert_called_once()
+        self.assertEqual(
+            service.get_pool_stats()["size"],
+            settings.WRITING_RECOGNITION["EMBEDDER_POOL_SIZE"],
+        )
+
+    @patch("apps.writing.services.recognition.model_storage")
+    def test_replaced_template_changes_result_cache_namespace(self, model_storage):
+        """Test that shared cached scores are not reused after a template changes."""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        with override_settings(MEDIA_ROOT=media_root):
+            templates = TemplateManagementService()
+        model_storage.get_model_hash.return_value = "model-hash"
+        service = CharacterRecognitionService()
+
+        with patch("apps.writing.services.recognition.template_service", templates):
+            templates.upload_template("a", b"first drawing")
+            first = service._get_embeddings_key("model.tflite")
+            templates.upload_template("a", b"redrawn template")
+            second = service._get_embeddings_key("model.tflite")
+
+        # The key is the namespace of every cached score
+        self.assertEqual(first[0], second[0])
+        self.assertNotEqual(first, second)
+
     def test_recognize_returns_expected_result(self):
         """Test that recognize method returns expected results."""
         # Create a simple test image
@@ -172,6 +247,109 @@ class CharacterRecognitionServiceTests(TestCase):
         self.assertLessEqual(confidence, 1.0)
         self.assertIn("scores", debug_info)
 
+    def test_preprocess_image_stays_uint8(self):
+        """Test that preprocessing yields MediaPipe-ready uint8 RGB images."""
+        service = CharacterRecognitionService()
+        drawing = np.zeros((120, 80, 4), dtype=np.uint8)
+        drawing[30:90, 20:60] = (10, 20, 30, 255)
+
+        processed, debug_steps = service.preprocess_image(drawing)
+
+        self.assertEqual(processed.shape, (224, 224, 3))
+        self.assertEqual(processed.dtype, np.uint8)
+        self.assertEqual(debug_steps, {})
+        # Transparent pixels become white background
+        self.assertTrue((processed[0, 0] == 255).all())
+        self.assertTrue((drawing[0, 0] == 0).all())
+
+        _, debug_steps = service.preprocess_image(drawing, debug=True)
+        self.assertIn("alpha_handled", debug_steps)
+        self.assertIn("centered", debug_steps)
+        encoded = service.encode_debug_steps(debug_steps)
+        self.assertTrue(encoded["centered"].startswith("data:image/png;base64,"))
+
+    def test_score_embedding_ranks_all_templates(self):
+        """Test that templates are scored from the packed matrix, best first."""
+        service = CharacterRecognitionService()
+        service.set_template_embeddings(
+            ["a", "b", "c"], [[1.0, 0.0], [0.0, 1.0], [0.6, 0.8]]
+        )
+
+        self.assertEqual(service.template_matrix.dtype, np.float32)
+        self.assertTrue(service.template_matrix.flags["C_CONTIGUOUS"])
+
+        ranked = service.score_embedding([0.96, 0.28])
+        self.assertEqual([name for name, _ in ranked], ["a", "c", "b"])
+        self.assertAlmostEqual(ranked[0][1], 0.96, places=5)
+
+        top = service.score_embedding([0.96, 0.28], top_k=2)
+        self.assertEqual([name for name, _ in top], ["a", "c"])
+
+    def test_match_embedding_returns_scores_per_call(self):
+        """Test that match results carry their own scores instead of shared state."""
+        service = CharacterRecognitionService()
+        service.set_template_embeddings(["a", "b"], [[1.0, 0.0], [0.0, 1.0]])
+
+        character, score, scores = service.match_embedding([0.0, 1.0], threshold=0.7)
+        self.assertEqual(character, "b")
+        self.assertAlmostEqual(score, 1.0)
+        self.assertEqual(set(scores), {"a", "b"})
+
+        character, score, _ = service.match_embedding([0.6, 0.8], threshold=0.9)
+        self.assertIsNone(character)
+        self.assertAlmostEqual(score, 0.8, places=5)
+        self.assertFalse(hasattr(service, "all_scores"))
+
+    def _drawing(self, x, y):
+        """Create a white test drawing with a bar and an ink square at (x, y)."""
+        image = np.full((100, 100, 3), 255, dtype=np.uint8)
+        image[y : y + 20, x : x + 20] = 0
+        image[10:15, 10:90] = 0
+        return image
+
+    def test_recognize_batch_scores_all_drawings(self):
+        """Test that a batch of drawings is matched against all templates."""
+        service = CharacterRecognitionService()
+        service.initialized = True
+        service.set_template_embeddings(["a", "b"], [[1.0, 0.0], [0.0, 1.0]])
+        embeddings = iter([[1.0, 0.0], [0.0, 1.0], [0.6, 0.6]])
+
+        with patch.object(
+            service, "_embed", side_effect=lambda image: next(embeddings)
+        ):
+            images = [
+                self._drawing(10, 70),
+                self._drawing(70, 70),
+                self._drawing(40, 40),
+            ]
+            results = service.recognize_batch(images, threshold=0.7)
+
+        self.assertEqual([result[0] for result in results], ["a", "b", None])
+        self.assertAlmostEqual(results[2][1], 0.6, places=5)
+        self.assertEqual(set(results[0][2]), {"a", "b"})
+
+    def test_resubmitted_drawing_uses_cached_scores(self):
+        """Test that the same drawing is scored from the cache without embedding."""
+        service = CharacterRecognitionService()
+        service.initialized = True
+        service.set_template_embeddings(["a", "b"], [[1.0, 0.0], [0.0, 1.0]])
+
+        with patch.object(service, "_embed", return_value=[0.0, 1.0]) as embed:
+            first = service.recognize(self._drawing(10, 70))
+            second = service.recognize(self._drawing(10, 70))
+            embed.assert_called_once()
+
+            # New templates invalidate the cached scores
+            service.set_template_embeddings(["a", "b"], [[0.0, 1.0], [1.0, 0.0]])
+            third = service.recognize(self._drawing(10, 70))
+            self.assertEqual(embed.call_count, 2)
+
+        self.assertEqual(first, ("b", 1.0))
+        self.assertEqual(second, first)
+        self.assertEqual(third, ("a", 1.0))
+        stats = service.get_cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+
 
 class SVGManagementServiceTests(TestCase):
     """Tests for the SVGManagementService class."""
@@ -246,6 +424,55 @@ class TemplateManagementServiceTests(TestCase):
         self.assertEqual(template_image.width, 100)
         self.assertEqual(template_image.height, 100)
 
+    def test_template_set_version_follows_content(self):
+        """Test that replacing a template under the same name changes the version."""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        with override_settings(MEDIA_ROOT=media_root):
+            service = TemplateManagementService()
+
+        service.upload_template("a", b"first drawing")
+        first = service.get_template_set_version()
+        self.assertEqual(service.get_template_set_version(), first)
+
+        service.upload_template("a", b"redrawn template")
+        self.assertNotEqual(service.get_template_set_version(), first)
+
+    def test_template_list_matches_template_set_version(self):
+        """Test that templates added by another process are listed right away."""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        with override_settings(MEDIA_ROOT=media_root):
+            service = TemplateManagementService()
+
+        service.upload_template("a", b"first drawing")
+        self.assertEqual(service.get_template_list(), ["a"])
+        version = service.get_template_set_version()
+
+        with open(os.path.join(service.templates_dir, "b.png"), "wb") as f:
+            f.write(b"second drawing")
+
+        self.assertNotEqual(service.get_template_set_version(), version)
+        self.assertEqual(service.get_template_list(), ["a", "b"])
+
+    def test_s3_template_set_version_uses_etags(self):
+        """Test that the S3 listing's ETags and sizes are part of the version."""
+        service = TemplateManagementService()
+        service.use_s3 = True
+        client = MagicMock()
+
+        def version(etag):
+            client.get_paginator.return_value.paginate.return_value = [
+                {"Contents": [{"Key": "templates/a.png", "ETag": etag, "Size": 10}]}
+            ]
+            with patch(
+                "apps.writing.services.templates.get_s3_client", return_value=client
+            ):
+                return service.get_template_set_version()
+
+        self.assertEqual(version('"1"'), version('"1"'))
+        self.assertNotEqual(version('"1"'), version('"2"'))
+
     def test_load_all_templates(self):
         """Test loading all templates."""
         templates = self.mock_service.load_all_templates()
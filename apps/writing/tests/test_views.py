@@ -4,16 +4,22 @@ Tests for Writing app views.
 
 import base64
 import json
+import threading
 from io import BytesIO
 from unittest.mock import patch
 
+import numpy as np
 import pytest
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.test import Client, TestCase
+from django.test import Client, TestCase, TransactionTestCase, override_settings
 from django.urls import reverse
 from PIL import Image
 
+from apps.core.executor import ExecutorBusyError
+from apps.core.pool import InstancePool
 from apps.writing.models import Glyph, GlyphPracticeProgress
+from apps.writing.services.recognition import CharacterRecognitionService
 from apps.writing.tests.mocks import (
     MockCharacterRecognitionService,
     MockSVGService,
@@ -150,6 +156,169 @@ class WritingViewsTests(TestCase):
         )
         self.assertEqual(progress.attempts, 6)  # 5 existing + 1 new
 
+    @patch(
+        "apps.writing.views.character_recognition", MockCharacterRecognitionService()
+    )
+    def test_check_drawing_async(self):
+        """Test that the async drawing check evaluates and records the attempt."""
+        response = self.client.post(
+            reverse("writing:check_drawing_async"),
+            json.dumps({"glyph_name": "a", "image_data": "data"}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertIn("is_correct", data)
+        self.assertEqual(data["attempts"], 6)
+
+        progress = GlyphPracticeProgress.objects.get(
+            user=self.user, glyph=self.beginner_glyph
+        )
+        self.assertEqual(progress.attempts, 6)
+
+    def test_check_drawing_async_busy(self):
+        """Test that a full recognition executor sheds load with a 503."""
+        with patch(
+            "apps.writing.views.recognition_executor.submit",
+            side_effect=ExecutorBusyError("recognition is at capacity"),
+        ):
+            response = self.client.post(
+                reverse("writing:check_drawing_async"),
+                json.dumps({"glyph_name": "a", "image_data": "data"}),
+                content_type="application/json",
+            )
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+        progress = GlyphPracticeProgress.objects.get(
+            user=self.user, glyph=self.beginner_glyph
+        )
+        self.assertEqual(progress.attempts, 5)
+
+    @patch(
+        "apps.writing.views.character_recognition", MockCharacterRecognitionService()
+    )
+    def test_check_drawings(self):
+        """Test that several drawings are evaluated and progress is bulk updated."""
+        image = Image.new("RGB", (100, 100), color=(255, 255, 255))
+        buffer = BytesIO()
+        image.save(buffer, format="PNG")
+        base64_image = (
+            "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+        )
+
+        post_data = {
+            "drawings": [
+                {"glyph_name": "a", "image_data": base64_image},
+                {"glyph_name": "b", "image_data": base64_image},
+                {"glyph_name": "a", "image_data": base64_image},
+            ]
+        }
+
+        response = self.client.post(
+            reverse("writing:check_drawings"),
+            json.dumps(post_data),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+
+        self.assertEqual(
+            [result["glyph_name"] for result in data["results"]], ["a", "b", "a"]
+        )
+        for result in data["results"]:
+            self.assertIn("is_correct", result)
+            self.assertIn("similarity", result)
+            self.assertIn("feedback", result)
+
+        # Existing progress is updated and missing progress is created
+        self.assertEqual(data["progress"]["a"]["attempts"], 7)  # 5 existing + 2 new
+        self.assertEqual(data["progress"]["b"]["attempts"], 1)
+        progress = GlyphPracticeProgress.objects.get(
+            user=self.user, glyph=self.beginner_glyph
+        )
+        self.assertEqual(progress.attempts, 7)
+        self.assertTrue(
+            GlyphPracticeProgress.objects.filter(
+                user=self.user, glyph=self.intermediate_glyph, attempts=1
+            ).exists()
+        )
+
+    def test_saturated_embedder_pool_asks_to_retry(self):
+        """Test that no attempt is recorded while every embedder is busy."""
+        service = CharacterRecognitionService()
+        service.set_template_embeddings(["a"], np.ones((1, 4), dtype=np.float32))
+        service.embedder_pool = InstancePool(object, size=1, name="test")
+        service.initialized = True
+
+        image = Image.new("RGB", (100, 100), color=(255, 255, 255))
+        buffer = BytesIO()
+        image.save(buffer, format="PNG")
+        image_data = base64.b64encode(buffer.getvalue()).decode()
+        requests = [
+            ("writing:check_drawing", {"glyph_name": "a", "image_data": image_data}),
+            (
+                "writing:check_drawing_async",
+                {"glyph_name": "a", "image_data": image_data},
+            ),
+            (
+                "writing:check_drawings",
+                {"drawings": [{"glyph_name": "a", "image_data": image_data}]},
+            ),
+        ]
+        recognition = {**settings.WRITING_RECOGNITION, "EMBEDDER_POOL_TIMEOUT": 0.01}
+
+        with (
+            patch("apps.writing.views.character_recognition", service),
+            override_settings(WRITING_RECOGNITION=recognition),
+            service.embedder_pool.acquire(),
+        ):
+            for url, body in requests:
+                response = self.client.post(
+                    reverse(url), json.dumps(body), content_type="application/json"
+                )
+                self.assertEqual(response.status_code, 503, url)
+                self.assertEqual(response["Retry-After"], "1")
+
+        progress = GlyphPracticeProgress.objects.get(
+            user=self.user, glyph=self.beginner_glyph
+        )
+        self.assertEqual(progress.attempts, 5)
+
+    def test_check_drawings_rejects_unknown_glyphs(self):
+        """Test that a batch with unknown glyphs is rejected without changes."""
+        response = self.client.post(
+            reverse("writing:check_drawings"),
+            json.dumps({"drawings": [{"glyph_name": "zzz", "image_data": ""}]}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(
+            GlyphPracticeProgress.objects.get(
+                user=self.user, glyph=self.beginner_glyph
+            ).attempts,
+            5,
+        )
+
+    def test_check_drawings_rejects_malformed_items(self):
+        """Test that items without string glyph names or images are rejected."""
+        for drawing in (
+            {"glyph_name": ["a"], "image_data": ""},
+            {"glyph_name": {"a": 1}, "image_data": ""},
+            {"glyph_name": self.beginner_glyph.name},
+            {"glyph_name": self.beginner_glyph.name, "image_data": 1},
+        ):
+            with self.subTest(drawing=drawing):
+                response = self.client.post(
+                    reverse("writing:check_drawings"),
+                    json.dumps({"drawings": [drawing]}),
+                    content_type="application/json",
+                )
+                self.assertEqual(response.status_code, 400)
+
     @patch("apps.writing.views.svg_service", MockSVGService())
     def test_get_svg_content(self):
         """Test getting SVG content."""
@@ -193,3 +362,51 @@ class WritingViewsTests(TestCase):
 
         self.assertEqual(svg_response.status_code, 302)
         self.assertIn("/accounts/login/", svg_response.url)
+
+
+class ConcurrentDrawingChecksTests(TransactionTestCase):
+    """Tests for progress updates from concurrent requests."""
+
+    def setUp(self):
+        """Set up a user and a glyph with some progress."""
+        self.user = User.objects.create_user(username="testuser", password="test")
+        self.glyph = Glyph.objects.create(name="a", meaning="test")
+        GlyphPracticeProgress.objects.create(
+            user=self.user, glyph=self.glyph, attempts=5
+        )
+
+    def test_concurrent_batches_keep_every_attempt(self):
+        """Test that overlapping batch checks for a glyph do not lose attempts."""
+        service = MockCharacterRecognitionService()
+        recognize = service.recognize_base64_batch
+        # Both requests finish recognizing before either updates progress
+        barrier = threading.Barrier(2, timeout=10)
+
+        def recognize_together(*args, **kwargs):
+            barrier.wait()
+            return recognize(*args, **kwargs)
+
+        body = json.dumps({"drawings": [{"glyph_name": "a", "image_data": "data"}] * 2})
+        statuses = []
+
+        def check():
+            client = Client()
+            client.force_login(self.user)
+            response = client.post(
+                reverse("writing:check_drawings"), body, content_type="application/json"
+            )
+            statuses.append(response.status_code)
+
+        with (
+            patch("apps.writing.views.character_recognition", service),
+            patch.object(service, "recognize_base64_batch", recognize_together),
+        ):
+            threads = [threading.Thread(target=check) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(statuses, [200, 200])
+        progress = GlyphPracticeProgress.objects.get(user=self.user, glyph=self.glyph)
+        self.assertEqual(progress.attempts, 9)
@@ -8,5 +8,11 @@ urlpatterns = [
     path("", views.index, name="index"),
     path("practice/<str:glyph_name>/", views.practice, name="practice"),
     path("check-drawing/", views.check_drawing, name="check_drawing"),
+    path(
+        "check-drawing/async/",
+        views.check_drawing_async,
+        name="check_drawing_async",
+    ),
+    path("check-drawings/", views.check_drawings, name="check_drawings"),
     path("svg/<str:glyph_name>/", views.get_svg_content, name="get_svg_content"),
 ]
@@ -1,13 +1,22 @@
 import json
 import logging
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
 from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import transaction
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, render
+from django.utils import timezone
+from django.views.decorators.http import require_POST
+
+from apps.core.executor import ExecutorBusyError
+from apps.core.pool import PoolTimeoutError
 
 from .models import Glyph, GlyphPracticeProgress
-from .services import character_recognition, svg_service
+from .services import character_recognition, recognition_executor, svg_service
 
 logger = logging.getLogger(__name__)
 
@@ -91,6 +100,92 @@ def practice(request, glyph_name):
     return render(request, "writing/practice.html", context)
 
 
+# Maximum number of drawings accepted by check_drawings
+MAX_BATCH_DRAWINGS = 50
+
+
+def _evaluate_drawing(glyph, character, similarity, recognition_debug_info):
+    """Score a recognition result for a glyph and build feedback and debug info."""
+    # Apply a slight boost to similarity score (empirically tuned)
+    # This helps account for the inherent differences between user drawings and templates
+    adjusted_similarity = min(1.0, similarity * 1.15)  # 15% boost, capped at 1.0
+
+    # Round similarity score to percentage
+    similarity_percentage = round(adjusted_similarity * 100)
+    is_correct = adjusted_similarity >= 0.65 and character == glyph.name
+
+    # Comprehensive debugging info
+    debug_info = {
+        "glyph_name": glyph.name,
+        "glyph_id": glyph.id,
+        "has_image": bool(glyph.image),
+        "image_url": glyph.image.url if glyph.image else None,
+        "recognition": {
+            "raw_similarity": round(similarity * 100),
+            "adjusted_similarity": similarity_percentage,
+            "raw_threshold": 0.6,
+            "effective_threshold": 0.65,
+            "recognized_as": character,
+            "is_match": character == glyph.name,
+        },
+        "scores": recognition_debug_info.get("scores", {}),
+    }
+    if "steps" in recognition_debug_info:
+        debug_info["steps"] = recognition_debug_info["steps"]
+
+    # Generate feedback based on adjusted score with more encouraging feedback
+    if adjusted_similarity >= 0.85:
+        feedback = "Excellent! Your glyph looks great."
+    elif adjusted_similarity >= 0.75:
+        feedback = "Good job! Your glyph is clearly recognizable."
+    elif adjusted_similarity >= 0.65:
+        feedback = "Well done! Keep practicing to perfect your strokes."
+    elif adjusted_similarity >= 0.55:
+        feedback = "Getting better. Try to make your strokes more precise."
+    elif adjusted_similarity >= 0.45:
+        feedback = "Not bad. Keep practicing to improve your accuracy."
+    else:
+        feedback = "Keep practicing. Focus on the overall shape of the glyph."
+
+    return {
+        "is_correct": bool(is_correct),
+        "similarity": similarity_percentage,
+        "feedback": str(feedback),
+        "debug_info": debug_info,
+    }
+
+
+def _record_attempt(progress, is_correct):
+    """Count an attempt on a progress record without saving it."""
+    progress.attempts += 1
+    if is_correct:
+        progress.successful_attempts += 1
+
+        # Mark as mastered if they've succeeded at least 3 times
+        # with >70% accuracy
+        if progress.successful_attempts >= 3 and progress.accuracy >= 70:
+            progress.mastered = True
+
+
+def _busy_response():
+    """Ask the client to retry a recognition that found no free capacity."""
+    response = JsonResponse(
+        {"error": "Recognition is busy, please try again"}, status=503
+    )
+    response["Retry-After"] = "1"
+    return response
+
+
+def _progress_summary(progress):
+    """Serialize the progress fields returned to the client."""
+    return {
+        "attempts": int(progress.attempts),
+        "successful_attempts": int(progress.successful_attempts),
+        "accuracy": int(progress.accuracy),
+        "mastered": bool(progress.mastered),
+    }
+
+
 @login_required
 def check_drawing(request):
     """Process and evaluate a user's glyph drawing."""
@@ -104,83 +199,27 @@ def check_drawing(request):
             glyph = get_object_or_404(Glyph, name=glyph_name)
 
             # Call the character recognition service with lower threshold for better results
-            character, similarity, recognition_debug_info = (
-                character_recognition.recognize_base64(
-                    image_data,
-                    threshold=0.6,  # Lower threshold for more lenient matching
+            try:
+                character, similarity, recognition_debug_info = (
+                    character_recognition.recognize_base64(
+                        image_data,
+                        threshold=0.6,  # Lower threshold for more lenient matching
+                        debug=request.user.is_staff,
+                    )
                 )
-            )
+            except PoolTimeoutError:
+                # Not the learner's fault, so no attempt is recorded
+                return _busy_response()
 
-            # Apply a slight boost to similarity score (empirically tuned)
-            # This helps account for the inherent differences between user drawings and templates
-            adjusted_similarity = min(
-                1.0, similarity * 1.15
-            )  # 15% boost, capped at 1.0
-
-            # Round similarity score to percentage
-            similarity_percentage = round(adjusted_similarity * 100)
-            is_correct = adjusted_similarity >= 0.65 and character == glyph_name
-
-            # Comprehensive debugging info
-            debug_info = {
-                "glyph_name": glyph_name,
-                "glyph_id": glyph.id,
-                "has_image": bool(glyph.image),
-                "image_url": glyph.image.url if glyph.image else None,
-                "recognition": {
-                    "raw_similarity": round(similarity * 100),
-                    "adjusted_similarity": similarity_percentage,
-                    "raw_threshold": 0.6,
-                    "effective_threshold": 0.65,
-                    "recognized_as": character,
-                    "is_match": character == glyph_name,
-                },
-                "scores": recognition_debug_info.get("scores", {}),
-            }
-
-            # Update user progress
-            progress, created = GlyphPracticeProgress.objects.get_or_create(
-                user=request.user, glyph=glyph
+            evaluation = _evaluate_drawing(
+                glyph, character, similarity, recognition_debug_info
             )
 
-            progress.attempts += 1
-            if is_correct:
-                progress.successful_attempts += 1
-
-                # Mark as mastered if they've succeeded at least 3 times
-                # with >70% accuracy
-                if progress.successful_attempts >= 3 and progress.accuracy >= 70:
-                    progress.mastered = True
-
-            progress.save()
-
-            # Generate feedback based on adjusted score with more encouraging feedback
-            if adjusted_similarity >= 0.85:
-                feedback = "Excellent! Your glyph looks great."
-            elif adjusted_similarity >= 0.75:
-                feedback = "Good job! Your glyph is clearly recognizable."
-            elif adjusted_similarity >= 0.65:
-                feedback = "Well done! Keep practicing to perfect your strokes."
-            elif adjusted_similarity >= 0.55:
-                feedback = "Getting better. Try to make your strokes more precise."
-            elif adjusted_similarity >= 0.45:
-                feedback = "Not bad. Keep practicing to improve your accuracy."
-            else:
-                feedback = "Keep practicing. Focus on the overall shape of the glyph."
+            # Update user progress
+            progress = _save_attempt(request.user, glyph, evaluation["is_correct"])
 
             # Return results
-            return JsonResponse(
-                {
-                    "is_correct": bool(is_correct),
-                    "similarity": similarity_percentage,
-                    "feedback": str(feedback),
-                    "debug_info": debug_info,
-                    "attempts": int(progress.attempts),
-                    "successful_attempts": int(progress.successful_attempts),
-                    "accuracy": int(progress.accuracy),
-                    "mastered": bool(progress.mastered),
-                }
-            )
+            return JsonResponse({**evaluation, **_progress_summary(progress)})
 
         except Exception as e:
             import traceback
@@ -204,6 +243,201 @@ def check_drawing(request):
     return JsonResponse({"error": "Invalid request method"}, status=400)
 
 
+def _authenticated_user(request):
+    """Resolve the lazily loaded request user, or None for anonymous users."""
+    return request.user if request.user.is_authenticated else None
+
+
+def _save_attempt(user, glyph, is_correct):
+    """Record a drawing attempt on the user's progress for a glyph."""
+    with transaction.atomic():
+        progress, created = (
+            GlyphPracticeProgress.objects.select_for_update().get_or_create(
+                user=user, glyph=glyph
+            )
+        )
+        _record_attempt(progress, is_correct)
+        progress.save()
+    return progress
+
+
+def _lock_progress(user, glyphs):
+    """
+    Lock the user's progress records for glyphs, creating missing ones in bulk.
+
+    Must run inside a transaction; concurrent batches for the same glyphs wait
+    for each other instead of overwriting each other's counts.
+    """
+    glyph_ids = sorted(glyph.id for glyph in glyphs)
+    existing_ids = set(
+        GlyphPracticeProgress.objects.filter(
+            user=user, glyph_id__in=glyph_ids
+        ).values_list("glyph_id", flat=True)
+    )
+    GlyphPracticeProgress.objects.bulk_create(
+        [
+            GlyphPracticeProgress(user=user, glyph_id=glyph_id)
+            for glyph_id in glyph_ids
+            if glyph_id not in existing_ids
+        ],
+        ignore_conflicts=True,
+    )
+    # Lock in glyph order so overlapping batches cannot deadlock
+    return {
+        progress.glyph_id: progress
+        for progress in GlyphPracticeProgress.objects.select_for_update()
+        .filter(user=user, glyph_id__in=glyph_ids)
+        .order_by("glyph_id")
+    }
+
+
+def _is_drawing(drawing):
+    """Whether a batch item has a string glyph name and image data."""
+    return (
+        isinstance(drawing, dict)
+        and isinstance(drawing.get("glyph_name"), str)
+        and isinstance(drawing.get("image_data"), str)
+    )
+
+
+@transaction.non_atomic_requests
+async def check_drawing_async(request):
+    """
+    Process and evaluate a user's glyph drawing without blocking the event loop.
+
+    Recognition runs on the bounded recognition executor. When it is full the
+    request is rejected with a 503, and a recognition that takes longer than
+    the configured timeout returns a 504.
+    """
+    user = await sync_to_async(_authenticated_user)(request)
+    if user is None:
+        return redirect_to_login(request.get_full_path())
+
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid request method"}, status=405)
+
+    try:
+        data = json.loads(request.body)
+        glyph_name = data.get("glyph_name")
+        image_data = data.get("image_data", "")
+
+        glyph = await Glyph.objects.filter(name=glyph_name).afirst()
+        if glyph is None:
+            return JsonResponse({"error": f"Unknown glyph: {glyph_name}"}, status=404)
+
+        try:
+            (
+                character,
+                similarity,
+                recognition_debug_info,
+            ) = await recognition_executor.run(
+                character_recognition.recognize_base64,
+                image_data,
+                threshold=0.6,  # Lower threshold for more lenient matching
+                debug=user.is_staff,
+                timeout=settings.WRITING_RECOGNITION["REQUEST_TIMEOUT"],
+            )
+        except (ExecutorBusyError, PoolTimeoutError):
+            return _busy_response()
+        except TimeoutError:
+            return JsonResponse({"error": "Recognition timed out"}, status=504)
+
+        evaluation = _evaluate_drawing(
+            glyph, character, similarity, recognition_debug_info
+        )
+        progress = await sync_to_async(_save_attempt)(
+            user, glyph, evaluation["is_correct"]
+        )
+
+        return JsonResponse({**evaluation, **_progress_summary(progress)})
+
+    except Exception as e:
+        logger.exception(f"Error checking drawing: {e}")
+        return JsonResponse({"error": str(e)}, status=500)
+
+
+@login_required
+@require_POST
+def check_drawings(request):
+    """
+    Process and evaluate several glyph drawings in one request.
+
+    Expects {"drawings": [{"glyph_name": ..., "image_data": ...}, ...]}, e.g. the
+    glyphs of a whole sentence. All drawings are recognized in one batch and the
+    user's progress records are updated with a single bulk write.
+    """
+    try:
+        data = json.loads(request.body)
+        drawings = data.get("drawings")
+
+        if not isinstance(drawings, list) or not drawings:
+            return JsonResponse({"error": "No drawings provided"}, status=400)
+        if len(drawings) > MAX_BATCH_DRAWINGS:
+            return JsonResponse(
+                {"error": f"At most {MAX_BATCH_DRAWINGS} drawings can be checked"},
+                status=400,
+            )
+        if not all(_is_drawing(drawing) for drawing in drawings):
+            return JsonResponse({"error": "Invalid drawing data"}, status=400)
+
+        # Get all glyphs with one query
+        glyph_names = [drawing["glyph_name"] for drawing in drawings]
+        glyphs = {}
+        for glyph in Glyph.objects.filter(name__in=set(glyph_names)):
+            glyphs.setdefault(glyph.name, glyph)
+
+        missing = sorted({name for name in glyph_names if name not in glyphs})
+        if missing:
+            return JsonResponse(
+                {"error": f"Unknown glyphs: {', '.join(missing)}"}, status=404
+            )
+
+        try:
+            recognized = character_recognition.recognize_base64_batch(
+                [drawing["image_data"] for drawing in drawings],
+                threshold=0.6,  # Lower threshold for more lenient matching
+            )
+        except PoolTimeoutError:
+            return _busy_response()
+
+        with transaction.atomic():
+            progress_by_glyph = _lock_progress(request.user, glyphs.values())
+
+            results = []
+            for glyph_name, (character, similarity, recognition_debug_info) in zip(
+                glyph_names, recognized, strict=True
+            ):
+                glyph = glyphs[glyph_name]
+                evaluation = _evaluate_drawing(
+                    glyph, character, similarity, recognition_debug_info
+                )
+                _record_attempt(progress_by_glyph[glyph.id], evaluation["is_correct"])
+                results.append({"glyph_name": glyph_name, **evaluation})
+
+            # bulk_update skips auto_now, so set the practice time explicitly
+            now = timezone.now()
+            for progress in progress_by_glyph.values():
+                progress.last_practiced = now
+            GlyphPracticeProgress.objects.bulk_update(
+                list(progress_by_glyph.values()),
+                ["attempts", "successful_attempts", "mastered", "last_practiced"],
+            )
+
+        return JsonResponse(
+            {
+                "results": results,
+                "progress": {
+                    glyph.name: _progress_summary(progress_by_glyph[glyph.id])
+                    for glyph in glyphs.values()
+                },
+            }
+        )
+
+    except Exception as e:
+        logger.exception(f"Error checking drawings: {e}")
+        return JsonResponse({"error": str(e)}, status=500)
+
+
 @login_required
 def get_svg_content(request, glyph_name):
     """Get SVG content for a specific glyph."""
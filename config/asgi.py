@@ -21,13 +21,30 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.production")
 django_asgi_app = get_asgi_application()
 
 # Import after initializing Django
+from django.conf import settings  # noqa: E402
+
+from apps.core.warmup import warmup  # noqa: E402
+from apps.signing import routing as signing_routing  # noqa: E402
 from apps.tutor import routing  # noqa: E402
 
+# Load ML models before the health check reports this process ready
+if settings.WARMUP["ENABLED"]:
+    warmup.start(
+        background=settings.WARMUP["BACKGROUND"],
+        retry_delay=settings.WARMUP["RETRY_DELAY"],
+        max_retry_delay=settings.WARMUP["MAX_RETRY_DELAY"],
+    )
+
 application = ProtocolTypeRouter(
     {
         "http": django_asgi_app,
         "websocket": AllowedHostsOriginValidator(
-            AuthMiddlewareStack(URLRouter(routing.websocket_urlpatterns))
+            AuthMiddlewareStack(
+                URLRouter(
+                    routing.websocket_urlpatterns
+                    + signing_routing.websocket_urlpatterns
+                )
+            )
         ),
     }
 )
@@ -141,6 +141,100 @@ ML_MODELS_STORAGE = {
     "MOBILENET_MODEL_URL": "https://storage.googleapis.com/mediapipe-models/image_embedder/mobilenet_v3_small/float32/1/mobilenet_v3_small.tflite",
 }
 
+# Shared S3 client used by every storage service (apps.core.s3)
+S3_CLIENT = {
+    # Kept-alive connections per process; concurrent transfers should fit in it
+    "MAX_POOL_CONNECTIONS": env.int("S3_MAX_POOL_CONNECTIONS", default=32),
+    "TCP_KEEPALIVE": env.bool("S3_TCP_KEEPALIVE", default=True),
+    "MAX_ATTEMPTS": env.int("S3_MAX_ATTEMPTS", default=5),
+    # Concurrent requests per upload or download
+    "TRANSFER_CONCURRENCY": env.int("S3_TRANSFER_CONCURRENCY", default=8),
+    # Files larger than this are transferred in ranged parts of this size
+    "TRANSFER_CHUNK_BYTES": env.int("S3_TRANSFER_CHUNK_BYTES", default=8 * 1024 * 1024),
+}
+
+# Sitelen Pona character recognition settings
+WRITING_RECOGNITION = {
+    # Number of MediaPipe embedders that can run recognitions in parallel
+    "EMBEDDER_POOL_SIZE": env.int("RECOGNITION_EMBEDDER_POOL_SIZE", default=2),
+    # Seconds to wait for a free embedder before failing a recognition
+    "EMBEDDER_POOL_TIMEOUT": env.float("RECOGNITION_EMBEDDER_POOL_TIMEOUT", default=30),
+    # Worker threads used by the async drawing check
+    "EXECUTOR_WORKERS": env.int("RECOGNITION_EXECUTOR_WORKERS", default=2),
+    # Recognitions allowed to wait for a worker before requests get a 503
+    "EXECUTOR_MAX_PENDING": env.int("RECOGNITION_EXECUTOR_MAX_PENDING", default=8),
+    # Seconds an async drawing check waits for its recognition
+    "REQUEST_TIMEOUT": env.float("RECOGNITION_REQUEST_TIMEOUT", default=10),
+    # Recognition results kept per process for resubmitted drawings (0 disables)
+    "RESULT_CACHE_SIZE": env.int("RECOGNITION_RESULT_CACHE_SIZE", default=256),
+    # Share cached results between processes through the Django cache
+    "RESULT_CACHE_SHARED": env.bool("RECOGNITION_RESULT_CACHE_SHARED", default=False),
+    "RESULT_CACHE_TIMEOUT": env.int("RECOGNITION_RESULT_CACHE_TIMEOUT", default=3600),
+}
+
+# Sign language practice settings
+SIGNING = {
+    # MediaPipe Hands instances kept per process for each kind of tracking
+    "COMPARER_POOL_SIZE": env.int("SIGN_COMPARER_POOL_SIZE", default=2),
+    # Seconds to wait for a free instance before failing a request
+    "COMPARER_POOL_TIMEOUT": env.float("SIGN_COMPARER_POOL_TIMEOUT", default=30),
+    # Hand tracking websockets per process, each with its own MediaPipe graph
+    "MAX_TRACKING_CONNECTIONS": env.int("SIGN_MAX_TRACKING_CONNECTIONS", default=8),
+    # Largest encoded webcam frame accepted for hand tracking
+    "MAX_FRAME_BYTES": env.int("SIGN_MAX_FRAME_BYTES", default=512 * 1024),
+    # Sakoe-Chiba band for DTW as a fraction of the longer sequence (0 disables)
+    "DTW_WINDOW": env.float("SIGN_DTW_WINDOW", default=0.25),
+    # Normalized reference sequences cached per process (0 disables caching)
+    "REFERENCE_CACHE_SIZE": env.int("SIGN_REFERENCE_CACHE_SIZE", default=128),
+    "REFERENCE_CACHE_BYTES": env.int(
+        "SIGN_REFERENCE_CACHE_BYTES", default=64 * 1024 * 1024
+    ),
+    # Frame rate attempts are analyzed at; references are resampled to match
+    "ANALYSIS_FPS": env.float("SIGN_ANALYSIS_FPS", default=10),
+    # Most frames analyzed per attempt, evenly spread over longer attempts
+    "ANALYSIS_MAX_FRAMES": env.int("SIGN_ANALYSIS_MAX_FRAMES", default=60),
+    # Longest side in pixels of analyzed frames
+    "ANALYSIS_MAX_FRAME_SIZE": env.int("SIGN_ANALYSIS_MAX_FRAME_SIZE", default=480),
+    # Largest analyze_sign request body accepted
+    "ANALYSIS_MAX_PAYLOAD_BYTES": env.int(
+        "SIGN_ANALYSIS_MAX_PAYLOAD_BYTES", default=8 * 1024 * 1024
+    ),
+    # Annotated reference clips drawn by process_sign_videos
+    "REFERENCE_CLIP_FPS": env.float("SIGN_REFERENCE_CLIP_FPS", default=10),
+    "REFERENCE_CLIP_SIZE": env.int("SIGN_REFERENCE_CLIP_SIZE", default=240),
+    # Free practice recognition: sequences are stretched to this many frames
+    # for the lower-bound prefilter, then only the closest candidates get DTW
+    "RECOGNITION_LENGTH": env.int("SIGN_RECOGNITION_LENGTH", default=32),
+    "RECOGNITION_CANDIDATES": env.int("SIGN_RECOGNITION_CANDIDATES", default=5),
+    # Downscaled frames kept per attempt for the comparison visualization
+    "ATTEMPT_KEYFRAMES": env.int("SIGN_ATTEMPT_KEYFRAMES", default=4),
+    "ATTEMPT_KEYFRAME_SIZE": env.int("SIGN_ATTEMPT_KEYFRAME_SIZE", default=240),
+    # Score attempts on Celery workers and push results over a websocket
+    "ANALYSIS_ASYNC": env.bool("SIGN_ANALYSIS_ASYNC", default=False),
+    # Celery queue of sign analysis tasks, so workers for it scale separately
+    "ANALYSIS_QUEUE": env("SIGN_ANALYSIS_QUEUE", default="signing"),
+    # Seconds a streamed attempt may record before frames are dropped again
+    "ATTEMPT_RECORDING_TIMEOUT": env.float(
+        "SIGN_ATTEMPT_RECORDING_TIMEOUT", default=30
+    ),
+    # Concurrent ranged GETs when syncing reference videos from S3
+    "VIDEO_SYNC_WORKERS": env.int("SIGN_VIDEO_SYNC_WORKERS", default=8),
+}
+
+# Recorded attempts are the largest request bodies, so let Django read them
+# up to the sign analysis limit instead of its 2.5 MB default
+DATA_UPLOAD_MAX_MEMORY_SIZE = SIGNING["ANALYSIS_MAX_PAYLOAD_BYTES"]
+
+# Model warm-up run by the ASGI server before it reports ready
+WARMUP = {
+    "ENABLED": env.bool("WARMUP_ENABLED", default=False),
+    # Warm up in a background thread so liveness checks pass while models load
+    "BACKGROUND": env.bool("WARMUP_BACKGROUND", default=True),
+    # Failed tasks are retried after this many seconds, doubling up to the max
+    "RETRY_DELAY": env.float("WARMUP_RETRY_DELAY", default=5),
+    "MAX_RETRY_DELAY": env.float("WARMUP_MAX_RETRY_DELAY", default=300),
+}
+
 # Django AllAuth settings
 AUTHENTICATION_BACKENDS = [
     "django.contrib.auth.backends.ModelBackend",
@@ -204,6 +298,9 @@ CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
 CELERY_WORKER_SEND_TASK_EVENTS = True
 CELERY_TASK_SEND_SENT_EVENT = True
 CELERY_WORKER_HIJACK_ROOT_LOGGER = False
+CELERY_TASK_ROUTES = {
+    "apps.signing.tasks.analyze_sign_attempt": {"queue": SIGNING["ANALYSIS_QUEUE"]},
+}
 
 # Tutor settings
 ANTHROPIC_API_KEY = env("ANTHROPIC_API_KEY", default="")
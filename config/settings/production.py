@@ -8,7 +8,7 @@ import sentry_sdk
 from sentry_sdk.integrations.django import DjangoIntegration
 
 from .base import *  # noqa: F403, F405
-from .base import BASE_DIR, ML_MODELS_STORAGE, STORAGES, env
+from .base import BASE_DIR, ML_MODELS_STORAGE, STORAGES, WARMUP, env
 
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = env("SECRET_KEY")
@@ -21,6 +21,8 @@ ALLOWED_HOSTS = env.list("ALLOWED_HOSTS")
 # Security settings
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
 SECURE_SSL_REDIRECT = env.bool("SECURE_SSL_REDIRECT", default=True)
+# Fly.io health checks call the machine over plain HTTP
+SECURE_REDIRECT_EXEMPT = [r"^health-check/"]
 SESSION_COOKIE_SECURE = True
 CSRF_COOKIE_SECURE = True
 SECURE_HSTS_SECONDS = 60 * 60 * 24 * 30  # 30 days
@@ -61,6 +63,9 @@ ML_MODELS_STORAGE.update(
     }
 )
 
+# Load ML models before a machine reports ready for traffic
+WARMUP["ENABLED"] = env.bool("WARMUP_ENABLED", default=True)
+
 # Configure loggers for production
 LOGGING = {
     "version": 1,
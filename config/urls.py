@@ -1,16 +1,24 @@
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 from django.urls import include, path
 from django.views.generic import RedirectView
 
+from apps.core.warmup import warmup
+
 
 def health_check(request):
     """Simple health check endpoint for Fly.io."""
     return HttpResponse("OK")
 
 
+def readiness_check(request):
+    """Report whether model warm-up has finished, so only warm machines get traffic."""
+    status = warmup.status()
+    return JsonResponse(status, status=200 if status["ready"] else 503)
+
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("accounts/", include("allauth.urls")),
@@ -19,6 +27,7 @@ urlpatterns = [
     path("writing/", include("apps.writing.urls")),
     path("signing/", include("apps.signing.urls")),
     path("health-check/", health_check, name="health_check"),
+    path("health-check/ready/", readiness_check, name="readiness_check"),
     # Redirect the root URL to the dashboard
     path("", RedirectView.as_view(pattern_name="dashboard:home", permanent=False)),
 ]
@@ -87,7 +87,7 @@ if [ -n "$FLY_PROCESS_GROUP" ]; then
       ;;
     worker)
       echo "Starting Celery worker..."
-      exec celery -A config worker --loglevel=info
+      exec celery -A config worker -Q celery,signing --loglevel=info
       ;;
     beat)
       echo "Starting Celery beat..."